@@ -27,6 +27,9 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
+# Addresses that see the debug panels (template context 'debug')
+INTERNAL_IPS = ['127.0.0.1']
+
 
 # Application definition
 
@@ -48,7 +51,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'events.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'events.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -86,9 +91,135 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Keep connections open across requests; health checks replace broken ones
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Seconds a writer waits for the lock before "database is locked"
+            'timeout': 20,
+        },
+        # A file rather than shared-cache memory, so concurrent test
+        # connections wait on the lock like production ones do
+        'TEST': {
+            'NAME': os.path.join(BASE_DIR, 'test_db.sqlite3'),
+        },
     }
 }
 
+# SQLITE_PROFILE=production in the environment runs SQLITE_PRAGMAS on every new
+# SQLite connection (see events.db for each one); development and the test
+# runner keep SQLite's defaults
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'default')
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Negative means KiB rather than pages: 64 MiB per connection
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Caches
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+
+# 'default' is per process. Event fragments use the file backend so every
+# worker of this checkout shares them together with their version stamps;
+# keys are namespaced by database (see events.cache.make_key).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'event-management',
+    },
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'fragments'),
+        'KEY_FUNCTION': 'events.cache.make_key',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
+}
+
+# Seconds a rendered event fragment is kept; edits invalidate it sooner
+EVENT_FRAGMENT_CACHE_TIMEOUT = 600
+
+# Public pages served whole from the cache to visitors without a session
+ANONYMOUS_PAGE_CACHE_URLS = ['public-events', 'public-event-detail']
+ANONYMOUS_PAGE_CACHE_TIMEOUT = 600
+# Browsers and proxies revalidate every time; unchanged pages answer 304
+ANONYMOUS_PAGE_MAX_AGE = 0
+
+# Database task queue (events/tasks.py), worked by 'manage.py run_worker'.
+# Failed tasks are retried after TASK_RETRY_DELAY seconds, doubling up to
+# TASK_RETRY_MAX_DELAY; a task running longer than TASK_LOCK_TIMEOUT is
+# assumed to have lost its worker and is retried.
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_DELAY = 10
+TASK_RETRY_MAX_DELAY = 3600
+TASK_LOCK_TIMEOUT = 600
+# Days finished tasks are kept before workers delete them
+TASK_KEEP_DONE_DAYS = 7
+
+# Query budgets per URL name, enforced by QueryBudgetMiddleware and checked
+# in CI by 'manage.py check_query_budgets'. Over budget logs a warning, or
+# raises when QUERY_BUDGET_RAISE is set (tests).
+QUERY_BUDGETS = {
+    'default': 30,
+    'dashboard': 6,
+    'user-dashboard': 6,
+    'public-events': 6,
+    'public-event-detail': 6,
+    'event-list': 6,
+    'join-event-list': 6,
+    'user-events': 6,
+    'event-detail-with-comments': 10,
+    'event-comment-page': 6,
+    'admin-message-list': 6,
+    'user-messages': 6,
+    # One query per page, plus the agenda prefetch when asked for
+    'api-events': 2,
+    'api-event-detail': 2,
+    'api-event-batch': 2,
+    'api-categories': 1,
+    # Streamed in chunks of 500 events, each with its agenda prefetch
+    'calendar-feed': None,
+    'category-calendar-feed': None,
+    'user-calendar-feed': None,
+    # Chunked by design: two lookups per 450 rows plus the inserts
+    'import-registrations': None,
+    # A fixed set of statements plus UserCoin inserts in batches of 500
+    'close-out-event': None,
+}
+QUERY_BUDGET_RAISE = False
+
+# The event close-out form posts one checkbox per registration
+DATA_UPLOAD_MAX_NUMBER_FIELDS = 10000
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'events.performance': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+        },
+        'events.tasks': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+        'events.lifecycle': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -127,11 +258,23 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# Files under these directories that no template needs are left out of collectstatic
+STATIC_PRUNE_DIRS = ['plugins']
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # Hashed names, gzip/Brotli siblings and WOFF2 fonts; served by events.staticfiles in wsgi.py
+    'staticfiles': {'BACKEND': 'events.staticfiles.CompressedManifestStaticFilesStorage'},
+}
 
 # Media files (Images)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploaded photos are rotated upright and shrunk to fit this many pixels by a background task
+IMAGE_MAX_DIMENSION = 2560
+
 # Crispy forms configuration
 CRISPY_TEMPLATE_PACK = 'bootstrap4'
 
@@ -3,10 +3,14 @@ from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 
-from django.contrib.auth.models import User
-from events.models import EventCategory, Event
+from django.utils import timezone
+
+from events.models import DashboardStats, Event
 from .forms import LoginForm, CustomUserCreationForm
 
+DASHBOARD_EVENT_LIMIT = 10
+
+
 def dashboard(request):
     # If user is not authenticated, redirect to public events
     if not request.user.is_authenticated:
@@ -16,17 +20,17 @@ def dashboard(request):
     if not request.user.is_staff:
         return redirect('user-dashboard')
     
-    # Admin dashboard data
-    user = User.objects.count()
-    event_ctg = EventCategory.objects.count()
-    event = Event.objects.count()
-    complete_event = Event.objects.filter(status='completed').count()
-    events = Event.objects.all()
+    # Admin dashboard data: totals come from the snapshot row, the table is
+    # limited to the next events by start date
+    stats = DashboardStats.current()
+    events = Event.objects.filter(end_date__gte=timezone.localdate()).with_capacity().select_related(
+        'category'
+    ).order_by('start_date', 'id')[:DASHBOARD_EVENT_LIMIT]
     context = {
-        'user': user,
-        'event_ctg': event_ctg,
-        'event': event,
-        'complete_event': complete_event,
+        'user': stats.user_count,
+        'event_ctg': stats.category_count,
+        'event': stats.event_count,
+        'complete_event': stats.completed_event_count,
         'events': events,
         'is_admin': True
     }
@@ -39,11 +43,13 @@ def user_dashboard(request):
     from events.models import EventMember
     
     # Get user's registered events - ONLY for current user
-    user_events = EventMember.objects.filter(user=request.user, status='active')
-    available_events = Event.objects.filter(status='active')[:5]  # Show 5 latest events
+    user_events = EventMember.objects.filter(user=request.user, status='active').select_related('event__category')
+    available_events = Event.objects.filter(status='active').select_related('category')[:5]  # Show 5 latest events
     
     context = {
         'user_events': user_events,
+        # All of them are listed, so this fetches the rows the table shows
+        'registration_total': len(user_events),
         'available_events': available_events,
         'user': request.user,
         'is_admin': False
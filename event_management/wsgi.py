@@ -13,4 +13,8 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'event_management.settings')
 
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+from events.staticfiles import PrecompressedStaticFiles  # noqa: E402
+
+application = PrecompressedStaticFiles(application)
\ No newline at end of file
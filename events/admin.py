@@ -1,4 +1,5 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils import timezone
 
 from .models import (
     EventCategory,
@@ -8,6 +9,9 @@ from .models import (
     EventMember,
     EventUserWishList,
     UserCoin,
+    CoinTransaction,
+    Task,
+    EventLifecycleRun,
     AdminMessage,
     EventComment,
 )
@@ -48,10 +52,73 @@ class EventCommentAdmin(admin.ModelAdmin):
     comment_preview.short_description = 'Comment Preview'
 
 
+@admin.register(CoinTransaction)
+class CoinTransactionAdmin(admin.ModelAdmin):
+    """Read-only: the ledger is append-only, corrections are new transactions"""
+    list_display = ['user', 'delta', 'balance', 'gain_type', 'event', 'created_at']
+    list_filter = ['gain_type', 'created_at']
+    search_fields = ['user__username', 'note', 'event__name']
+    list_select_related = ['user', 'event']
+    date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'max_attempts', 'run_at', 'locked_by', 'finished_at']
+    list_filter = ['status', 'name']
+    readonly_fields = ['created_at', 'finished_at', 'locked_by', 'locked_at', 'last_error']
+    date_hierarchy = 'created_at'
+    actions = ['requeue']
+
+    def requeue(self, request, queryset):
+        """Give dead or stuck tasks a fresh set of attempts"""
+        count = queryset.exclude(status='queued').update(
+            status='queued', attempts=0, run_at=timezone.now(), locked_by='', locked_at=None, finished_at=None,
+        )
+        self.message_user(request, f'Requeued {count} task(s).')
+    requeue.short_description = 'Requeue selected tasks'
+
+
+@admin.register(EventMember)
+class EventMemberAdmin(admin.ModelAdmin):
+    list_display = ['user', 'event', 'attend_status', 'waitlist_position', 'status']
+    list_filter = ['attend_status', 'status']
+    search_fields = ['user__username', 'event__name']
+    list_select_related = ['user', 'event']
+
+    def save_model(self, request, obj, form, change):
+        requested = obj.attend_status
+        super().save_model(request, obj, form, change)
+        if requested != obj.attend_status:
+            # EventMember.save() waitlists instead of overbooking
+            self.message_user(request, f'{obj.event} is full, so {obj.user} was waitlisted.', messages.WARNING)
+
+
+@admin.register(EventLifecycleRun)
+class EventLifecycleRunAdmin(admin.ModelAdmin):
+    """Read-only history of advance_event_lifecycle runs"""
+    list_display = ['started_at', 'timed_out', 'completed', 'waitlist_cancelled', 'marked_absent', 'members_closed']
+    date_hierarchy = 'started_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 admin.site.register(EventCategory)
 admin.site.register(Event)
 admin.site.register(JobCategory)
 admin.site.register(EventJobCategoryLinking)
-admin.site.register(EventMember)
 admin.site.register(EventUserWishList)
 admin.site.register(UserCoin)
@@ -0,0 +1,161 @@
+"""Read-only JSON representation of active events, their categories and agenda.
+
+Every endpoint takes ?fields=name,start_date,... to choose the keys of each
+object. Only the columns those keys need are loaded, through .only() and
+select_related(), and the capacity keys come from Event.objects.with_capacity()
+in the same query, so a page of events is one query (plus one for the agenda
+when it is asked for).
+
+ETags are built from the version stamps in cache.py, which every change to
+an event, its image, agenda, registrations or category replaces, so a
+conditional GET is answered with a 304 before the database is touched.
+"""
+import hashlib
+from operator import attrgetter
+
+from django.db.models import Prefetch
+
+from . import cache as event_cache, images
+from .models import Event, EventAgenda, EventCategory
+
+# Most ids a batch lookup accepts
+BATCH_MAX = 100
+
+
+def image_data(instance):
+    """Original URL and variant URLs of an EventImage or EventCategory image"""
+    if not instance or not instance.image:
+        return None
+    variants = instance.image_variants or {}
+    storage = instance.image.storage
+    return {
+        'url': instance.image.url,
+        'variants': {
+            variant: {
+                'width': variants[variant]['width'],
+                'height': variants[variant]['height'],
+                **{key: storage.url(variants[variant][key]) for key, *_ in images.FORMATS},
+            }
+            for variant, _ in images.VARIANTS if variant in variants
+        },
+    }
+
+
+def event_image(event):
+    try:
+        return image_data(event.eventimage)
+    except Event.eventimage.RelatedObjectDoesNotExist:
+        return None
+
+
+def agenda_data(event):
+    return [
+        {
+            'id': session.id,
+            'session_name': session.session_name,
+            'speaker_name': session.speaker_name,
+            'start_time': session.start_time,
+            'end_time': session.end_time,
+            'venue_name': session.venue_name,
+        }
+        for session in event.eventagenda_set.all()
+    ]
+
+
+# Output key: (columns it needs loaded, how to read it off the instance)
+EVENT_FIELDS = {
+    'id': (('id',), attrgetter('id')),
+    'name': (('name',), attrgetter('name')),
+    'description': (('description',), attrgetter('description')),
+    'venue': (('venue',), attrgetter('venue')),
+    'location': (('location',), attrgetter('location')),
+    'start_date': (('start_date',), attrgetter('start_date')),
+    'end_date': (('end_date',), attrgetter('end_date')),
+    'scheduled_status': (('scheduled_status',), attrgetter('scheduled_status')),
+    'points': (('points',), attrgetter('points')),
+    'maximum_attende': (('maximum_attende',), attrgetter('maximum_attende')),
+    'category': (
+        ('category', 'category__name', 'category__code'),
+        lambda event: {'id': event.category.id, 'name': event.category.name, 'code': event.category.code},
+    ),
+    # Annotated by with_capacity(), which reads the counter columns in SQL
+    'registered': ((), attrgetter('capacity_registered')),
+    'available': ((), attrgetter('capacity_available')),
+    'full': ((), attrgetter('capacity_full')),
+    'image': (('eventimage__image', 'eventimage__image_variants'), event_image),
+    # Loaded with one prefetch query for the whole page
+    'agenda': ((), agenda_data),
+}
+DEFAULT_EVENT_FIELDS = tuple(name for name in EVENT_FIELDS if name not in ('description', 'agenda'))
+
+CATEGORY_FIELDS = {
+    'id': (('id',), attrgetter('id')),
+    'name': (('name',), attrgetter('name')),
+    'code': (('code',), attrgetter('code')),
+    'priority': (('priority',), attrgetter('priority')),
+    'image': (('image', 'image_variants'), image_data),
+}
+DEFAULT_CATEGORY_FIELDS = tuple(CATEGORY_FIELDS)
+
+
+def parse_fields(value, available, default):
+    """The keys named by a ?fields= value, in the order given; ValueError names any unknown"""
+    if not value:
+        return list(default)
+    fields = list(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise ValueError('Unknown field(s): %s. Available: %s.' % (', '.join(unknown), ', '.join(available)))
+    return fields or list(default)
+
+
+def parse_ids(value):
+    """Distinct positive ids from a comma separated ?ids= value, in the order given"""
+    try:
+        ids = list(dict.fromkeys(int(part) for part in value.split(',') if part.strip()))
+    except ValueError:
+        raise ValueError('ids must be a comma separated list of numbers.')
+    if not ids or len(ids) > BATCH_MAX or min(ids) < 1:
+        raise ValueError('Pass between 1 and %d ids.' % BATCH_MAX)
+    return ids
+
+
+def select_fields(queryset, fields, available, always=('id',)):
+    """Restrict queryset to the columns fields need, joining related tables as required"""
+    columns = list(always)
+    for name in fields:
+        columns.extend(available[name][0])
+    related = sorted({column.split('__')[0] for column in columns if '__' in column})
+    if related:
+        queryset = queryset.select_related(*related)
+    return queryset.only(*dict.fromkeys(columns))
+
+
+def events(fields, always=('id',)):
+    """Active events annotated with capacity and loading only what fields need"""
+    queryset = Event.objects.filter(status='active').with_capacity()
+    queryset = select_fields(queryset, fields, EVENT_FIELDS, always)
+    if 'agenda' in fields:
+        queryset = queryset.prefetch_related(Prefetch(
+            'eventagenda_set',
+            queryset=EventAgenda.objects.order_by('start_time', 'id'),
+        ))
+    return queryset
+
+
+def categories(fields):
+    return select_fields(EventCategory.objects.filter(status='active'), fields, CATEGORY_FIELDS).order_by('priority')
+
+
+def serialize(instance, fields, available):
+    return {name: available[name][1](instance) for name in fields}
+
+
+def etag(*parts):
+    """A strong ETag over the version stamps and request parts that decide a response"""
+    return '"%s"' % hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def events_etag(event_ids, *parts):
+    versions = event_cache.get_versions(event_ids)
+    return etag(*[versions[event_id] for event_id in event_ids], *parts)
@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class EventsConfig(AppConfig):
     name = 'events'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .cache import clear
+        from .db import configure_sqlite
+        connection_created.connect(configure_sqlite, dispatch_uid='events.db.configure_sqlite')
+        # A new or migrated database, the test database included, starts with an empty cache
+        post_migrate.connect(clear, sender=self, dispatch_uid='events.cache.clear')
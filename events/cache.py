@@ -0,0 +1,128 @@
+"""Per-event template fragment caching and the public page version.
+
+Fragments are keyed on the event id plus a version stamp stored alongside
+them in the fragment cache. The signals in signals.py replace an event's
+stamp whenever the event, its image, agenda or registrations change, so an
+edited event simply stops matching its old fragments and they age out.
+
+Whole anonymous public pages (see middleware.py) list many events, so they
+share a single stamp that any event change replaces.
+
+Keys are namespaced by the default database (make_key), so a test run or a
+second database never reads another one's stamps and pages, and the cache
+is cleared whenever migrate runs, which is also how a test database starts.
+"""
+import hashlib
+import time
+import uuid
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.db import DEFAULT_DB_ALIAS, connections
+
+FRAGMENT_CACHE_ALIAS = 'template_fragments'
+FRAGMENT_TIMEOUT = getattr(settings, 'EVENT_FRAGMENT_CACHE_TIMEOUT', 600)
+
+# Hit/miss totals for this process, shown in the debug panel
+fragment_stats = Counter()
+
+
+def fragment_cache():
+    try:
+        return caches[FRAGMENT_CACHE_ALIAS]
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+@lru_cache(maxsize=None)
+def database_namespace(name):
+    return hashlib.md5(str(name).encode()).hexdigest()[:8]
+
+
+def make_key(key, key_prefix, version):
+    """KEY_FUNCTION for the fragment cache: Django's key format plus the database in use"""
+    name = connections[DEFAULT_DB_ALIAS].settings_dict['NAME']
+    return '%s:%s:%s:%s' % (key_prefix, database_namespace(name), version, key)
+
+
+def clear(sender=None, **kwargs):
+    """post_migrate receiver: drop every fragment, page and stamp"""
+    fragment_cache().clear()
+
+
+def version_key(event_id):
+    return 'event-version:%s' % event_id
+
+
+def fragment_key(name, event_id, version, vary_on=()):
+    return make_template_fragment_key('event.%s.%s.%s' % (name, event_id, version), vary_on)
+
+
+def new_version():
+    # A random stamp rather than a counter: if the stamp itself is evicted,
+    # the replacement can never collide with fragments rendered under the old one.
+    return uuid.uuid4().hex[:12]
+
+
+def get_versions(event_ids):
+    """Return {event_id: version} for event_ids, creating missing stamps"""
+    cache = fragment_cache()
+    keys = {version_key(event_id): event_id for event_id in event_ids}
+    found = cache.get_many(list(keys))
+    versions = {keys[key]: version for key, version in found.items()}
+    for key, event_id in keys.items():
+        if event_id not in versions:
+            cache.add(key, new_version(), None)
+            versions[event_id] = cache.get(key)
+    return versions
+
+
+def attach_versions(events):
+    """Set cache_version on each event with one cache round trip; returns the list"""
+    events = list(events)
+    versions = get_versions([event.pk for event in events])
+    for event in events:
+        event.cache_version = versions[event.pk]
+    return events
+
+
+def bump_versions(event_ids):
+    # Dropping the stamps is enough: get_versions() replaces a missing stamp
+    # with a fresh random one. Deletes also skip the culling scan the file
+    # cache does on every set, which matters for bulk changes.
+    fragment_cache().delete_many([version_key(event_id) for event_id in event_ids])
+
+
+def expire_events(event_ids):
+    """Invalidate the fragments of event_ids and every cached public page"""
+    bump_versions(event_ids)
+    bump_page_version()
+
+
+PAGE_VERSION_KEY = 'public-page-version'
+
+
+def page_version():
+    """Return the public page stamp: the time of the last event change, as a float"""
+    cache = fragment_cache()
+    version = cache.get(PAGE_VERSION_KEY)
+    if version is None:
+        cache.add(PAGE_VERSION_KEY, time.time(), None)
+        version = cache.get(PAGE_VERSION_KEY)
+    return version
+
+
+def bump_page_version():
+    fragment_cache().set(PAGE_VERSION_KEY, time.time(), None)
+
+
+def record(hit, request=None):
+    outcome = 'hits' if hit else 'misses'
+    fragment_stats[outcome] += 1
+    if request is not None:
+        if not hasattr(request, 'fragment_cache_stats'):
+            request.fragment_cache_stats = Counter()
+        request.fragment_cache_stats[outcome] += 1
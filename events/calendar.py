@@ -0,0 +1,194 @@
+"""iCalendar (.ics) feeds of events with their agenda sessions.
+
+Three feeds are served: every active event, the active events of one
+category, and one user's registrations. Events become all-day VEVENTs and
+each EventAgenda session a timed VEVENT RELATED-TO its event. A feed is
+written chunk by chunk from an iterator() over the events and streamed to
+the client, and the finished text is kept in the fragment cache under the
+public page version (see cache.py), which every event, agenda or
+registration change replaces. Feed readers poll, so the ETag and
+Last-Modified come from that version alone and an unchanged feed is a 304
+without touching the database or the cached text.
+
+Calendar clients cannot log in, so the personal feed URL carries a signed
+user id instead; see feed_token().
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import F, Prefetch
+from django.utils import timezone
+
+from . import cache as event_cache
+from .models import Event, EventAgenda
+
+CHUNK_SIZE = 500
+FEED_TIMEOUT = getattr(settings, 'CALENDAR_FEED_CACHE_TIMEOUT', 3600)
+PRODID = '-//Event Management//Events//EN'
+# Right-hand side of every UID, so ids stay unique across calendars
+UID_DOMAIN = getattr(settings, 'CALENDAR_UID_DOMAIN', 'event-management')
+TOKEN_SALT = 'events.calendar'
+
+# Registrations that show up in the personal feed; waitlisted ones are tentative
+MEMBER_FEED_STATUSES = ('waiting', 'attending', 'waitlisted', 'completed')
+EVENT_STATUS = {'cancel': 'CANCELLED', 'deleted': 'CANCELLED'}
+
+EVENT_COLUMNS = (
+    'id', 'name', 'description', 'venue', 'location', 'start_date', 'end_date', 'status',
+    'category', 'category__name',
+)
+
+
+def feed_token(user):
+    """Signed token identifying user in their personal feed URL"""
+    return signing.Signer(salt=TOKEN_SALT).sign(str(user.pk))
+
+
+def user_id_from_token(token):
+    try:
+        return int(signing.Signer(salt=TOKEN_SALT).unsign(token))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def with_agenda(queryset):
+    return queryset.select_related('category').only(*EVENT_COLUMNS).prefetch_related(Prefetch(
+        'eventagenda_set',
+        queryset=EventAgenda.objects.order_by('start_time', 'id'),
+    )).order_by('start_date', 'id')
+
+
+def public_events():
+    return with_agenda(Event.objects.filter(status='active'))
+
+
+def category_events(category_id):
+    return with_agenda(Event.objects.filter(status='active', category_id=category_id))
+
+
+def member_events(user_id):
+    """The user's registered events, each annotated with member_status"""
+    return with_agenda(Event.objects.exclude(status='deleted').filter(
+        eventmember__user_id=user_id, eventmember__attend_status__in=MEMBER_FEED_STATUSES,
+    ).annotate(member_status=F('eventmember__attend_status')))
+
+
+def escape(text):
+    return (
+        str(text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '\\n')
+    )
+
+
+def fold(line):
+    """Split a content line into 75-octet pieces as RFC 5545 requires, never inside a character"""
+    if len(line.encode()) <= 75:
+        return line + '\r\n'
+    pieces, current, size = [], [], 0
+    for char in line:
+        width = len(char.encode())
+        if size + width > (75 if not pieces else 74):
+            pieces.append(''.join(current))
+            current, size = [], 0
+        current.append(char)
+        size += width
+    pieces.append(''.join(current))
+    return '\r\n '.join(pieces) + '\r\n'
+
+
+def utc_stamp(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def session_times(date, session):
+    """Aware start and end of an agenda session held on date; a session ending before it
+    starts runs past midnight"""
+    start = timezone.make_aware(datetime.combine(date, session.start_time))
+    end = timezone.make_aware(datetime.combine(date, session.end_time))
+    if end <= start:
+        end += timedelta(days=1)
+    return start, end
+
+
+def event_lines(event, stamp, url):
+    uid = 'event-%d@%s' % (event.pk, UID_DOMAIN)
+    status = EVENT_STATUS.get(event.status, 'CONFIRMED')
+    if getattr(event, 'member_status', None) == 'waitlisted' and status == 'CONFIRMED':
+        status = 'TENTATIVE'
+    location = ', '.join(part for part in (event.venue, event.location) if part)
+    lines = [
+        'BEGIN:VEVENT',
+        'UID:' + uid,
+        'DTSTAMP:' + stamp,
+        'DTSTART;VALUE=DATE:' + event.start_date.strftime('%Y%m%d'),
+        # DTEND of an all-day event is exclusive
+        'DTEND;VALUE=DATE:' + (max(event.end_date, event.start_date) + timedelta(days=1)).strftime('%Y%m%d'),
+        'SUMMARY:' + escape(event.name),
+        'DESCRIPTION:' + escape(event.description),
+        'LOCATION:' + escape(location),
+        'CATEGORIES:' + escape(event.category.name),
+        'STATUS:' + status,
+        'URL:' + url,
+        'END:VEVENT',
+    ]
+    for session in event.eventagenda_set.all():
+        start, end = session_times(event.start_date, session)
+        lines += [
+            'BEGIN:VEVENT',
+            'UID:agenda-%d@%s' % (session.pk, UID_DOMAIN),
+            'DTSTAMP:' + stamp,
+            'DTSTART:' + utc_stamp(start),
+            'DTEND:' + utc_stamp(end),
+            'SUMMARY:' + escape('%s: %s' % (event.name, session.session_name)),
+            'DESCRIPTION:' + escape('Speaker: %s' % session.speaker_name),
+            'LOCATION:' + escape(session.venue_name),
+            'RELATED-TO;RELTYPE=PARENT:' + uid,
+            'STATUS:' + status,
+            'END:VEVENT',
+        ]
+    return ''.join(fold(line) for line in lines)
+
+
+def render_feed(title, events, version, event_url):
+    """Yield the feed text a few events at a time; event_url(event) gives each event's page"""
+    stamp = utc_stamp(datetime.fromtimestamp(version, dt_timezone.utc))
+    yield ''.join(fold(line) for line in (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:' + PRODID,
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        'X-WR-CALNAME:' + escape(title),
+        'REFRESH-INTERVAL;VALUE=DURATION:PT15M',
+        'X-PUBLISHED-TTL:PT15M',
+    ))
+    batch = []
+    for event in events.iterator(chunk_size=CHUNK_SIZE):
+        batch.append(event_lines(event, stamp, event_url(event)))
+        if len(batch) == 50:
+            yield ''.join(batch)
+            batch = []
+    yield ''.join(batch) + 'END:VCALENDAR\r\n'
+
+
+def feed_key(feed, host, version):
+    return 'calendar:%s:%s:%r' % (feed, host, version)
+
+
+def feed_etag(key):
+    return '"%s"' % hashlib.md5(key.encode()).hexdigest()
+
+
+def cached_feed(key):
+    return event_cache.fragment_cache().get(key)
+
+
+def caching(key, chunks):
+    """Pass chunks through and store their text under key once all have been sent"""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    event_cache.fragment_cache().set(key, ''.join(parts), FEED_TIMEOUT)
@@ -0,0 +1,96 @@
+"""Bulk close-out of an event: mark attendance and credit points in one go.
+
+Everything happens in one transaction with set-based statements: the
+event row is locked and marked completed, the attendance of every
+registration is set with a single UPDATE, and Event.points are credited
+to every new attendee through one CoinTransaction.award() batch.
+EventMember.points_awarded records who has been credited, so submitting
+the same close-out twice changes nothing the second time.
+
+Credited points are final. The ledger allows one event credit per user and
+event, so a credit that was reversed could never be given again. A credited
+registration therefore stays completed when it is unticked on a later
+close-out; a mistaken credit is corrected with a coin correction
+(CreateUserMark) instead.
+"""
+from django.db import transaction
+from django.db.models import Case, Q, Value, When
+from django.utils import timezone
+
+from . import cache as event_cache
+from .models import CoinTransaction, DashboardStats, Event, EventMember
+
+# Registrations whose attendance is decided at close-out; the waitlist and
+# cancelled members are left alone
+CLOSE_OUT_ATTEND_STATUSES = ('waiting', 'attending', 'completed', 'absent')
+# Events that were called off cannot be closed out
+NOT_CLOSABLE_STATUSES = ('cancel', 'deleted')
+
+
+class CloseOutResult:
+    def __init__(self, completed=0, absent=0, credited=0, newly_completed=False):
+        self.completed = completed
+        self.absent = absent
+        self.credited = credited
+        self.newly_completed = newly_completed
+
+
+def close_out_members(event):
+    """The registrations a close-out marks as completed or absent"""
+    return EventMember.objects.filter(event=event, attend_status__in=CLOSE_OUT_ATTEND_STATUSES)
+
+
+def credit_points(event, closed_by):
+    """Credit event.points to completed members not yet credited; returns how many were.
+
+    A user the ledger already holds an event credit for (a credited member
+    who was removed and registered again) is marked credited without a
+    second award, which cointransaction_event_once would refuse.
+    """
+    pending = EventMember.objects.filter(event=event, attend_status='completed', points_awarded=False)
+    user_ids = list(pending.values_list('user', flat=True))
+    credited_before = set(CoinTransaction.objects.filter(
+        event=event, gain_type='event', user_id__in=user_ids,
+    ).values_list('user', flat=True))
+    awarded = CoinTransaction.award(
+        [user_id for user_id in user_ids if user_id not in credited_before], event.points, closed_by,
+        event=event, note=f'Attended {event.name}',
+    )
+    pending.update(points_awarded=True)
+    return len(awarded)
+
+
+def close_out_event(event, attended_ids, closed_by):
+    """Mark attended_ids completed and the event's other uncredited registrations absent,
+    complete the event and credit its points; returns a CloseOutResult.
+
+    attended_ids must be registrations from close_out_members(event).
+    """
+    attended_ids = list(attended_ids)
+    result = CloseOutResult()
+    with transaction.atomic():
+        previous = Event.objects.select_for_update().values_list('status', flat=True).get(pk=event.pk)
+        # Nobody holds a seat once the event is over, so the seat counters go to zero
+        Event.objects.filter(pk=event.pk).update(status='completed', registered_count=0, waiting_count=0)
+        result.newly_completed = previous != 'completed'
+        if result.newly_completed:
+            DashboardStats.adjust(completed_event_count=1)
+
+        marked = close_out_members(event).update(
+            attend_status=Case(
+                When(Q(pk__in=attended_ids) | Q(points_awarded=True), then=Value('completed')),
+                default=Value('absent'),
+            ),
+            waitlist_position=None,
+            updated_user=closed_by,
+            updated_date=timezone.localdate(),
+        )
+        result.completed = close_out_members(event).filter(attend_status='completed').count()
+        result.absent = marked - result.completed
+        result.credited = credit_points(event, closed_by)
+
+        # update() sends no post_save, so expire the cached pages here
+        transaction.on_commit(lambda: event_cache.expire_events([event.pk]))
+    event.status = 'completed'
+    event.registered_count = event.waiting_count = 0
+    return result
@@ -0,0 +1,46 @@
+"""SQLite connection tuning for the production profile.
+
+SQLITE_PRAGMAS in settings lists the PRAGMAs to run when Django opens a
+SQLite connection (see EventsConfig.ready). They run only when
+SQLITE_PROFILE is 'production'; development and tests stay on SQLite's
+defaults. The production profile:
+
+* journal_mode=WAL lets readers keep reading while one writer commits,
+  instead of every write locking the whole file;
+* synchronous=NORMAL is safe with WAL and skips an fsync per commit;
+* busy_timeout makes a writer wait for the lock instead of failing with
+  "database is locked" straight away;
+* mmap_size and cache_size keep the hot pages of the file in memory.
+
+Together with CONN_MAX_AGE, which keeps connections open across requests,
+the PRAGMAs run once per connection rather than once per request.
+`manage.py benchmark_sqlite` measures the difference.
+"""
+from django.conf import settings
+
+
+def pragmas():
+    """The PRAGMAs for a new connection: SQLITE_PRAGMAS under the production profile, else none"""
+    if settings.SQLITE_PROFILE != 'production':
+        return {}
+    return settings.SQLITE_PRAGMAS
+
+
+def apply_pragmas(cursor, values):
+    for name, value in values.items():
+        # Names and values come from settings, never from a request
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created receiver: run SQLITE_PRAGMAS on a new SQLite connection"""
+    if connection.vendor != 'sqlite':
+        return
+    values = dict(pragmas())
+    if connection.is_in_memory_db():
+        # An in-memory database has no journal file to switch
+        values.pop('journal_mode', None)
+    if not values:
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, values)
@@ -0,0 +1,114 @@
+"""Streaming CSV / JSON Lines exports for the admin registration lists and coin ledger.
+
+Rows are read with values_list().iterator(chunk_size=...), so the related
+user/event columns come from the same joined query and only one chunk is
+held in memory no matter how large the table is.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import CoinTransaction, EventMember
+
+CHUNK_SIZE = 2000
+
+MEMBER_COLUMNS = (
+    ('registration_id', 'id'),
+    ('event_id', 'event_id'),
+    ('event', 'event__name'),
+    ('category', 'event__category__name'),
+    ('event_start_date', 'event__start_date'),
+    ('username', 'user__username'),
+    ('email', 'user__email'),
+    ('attend_status', 'attend_status'),
+    ('status', 'status'),
+    ('registered_date', 'created_date'),
+)
+
+COIN_COLUMNS = (
+    ('transaction_id', 'id'),
+    ('username', 'user__username'),
+    ('email', 'user__email'),
+    ('delta', 'delta'),
+    ('balance', 'balance'),
+    ('gain_type', 'gain_type'),
+    ('event_id', 'event_id'),
+    ('event', 'event__name'),
+    ('note', 'note'),
+    ('created_by', 'created_user__username'),
+    ('created_at', 'created_at'),
+)
+
+
+def _filter_dates(queryset, filters, field):
+    if filters.get('date_from'):
+        queryset = queryset.filter(**{f'{field}__gte': filters['date_from']})
+    if filters.get('date_to'):
+        queryset = queryset.filter(**{f'{field}__lte': filters['date_to']})
+    return queryset
+
+
+def _filter_members(queryset, filters):
+    if filters.get('event'):
+        queryset = queryset.filter(event_id=filters['event'])
+    if filters.get('category'):
+        queryset = queryset.filter(event__category_id=filters['category'])
+    if filters.get('status'):
+        queryset = queryset.filter(attend_status=filters['status'])
+    return _filter_dates(queryset, filters, 'created_date')
+
+
+def registrations(filters):
+    return _filter_members(EventMember.objects.all(), filters), MEMBER_COLUMNS
+
+
+def attendance(filters):
+    queryset = EventMember.objects.filter(attend_status__in=['completed', 'absent'])
+    return _filter_members(queryset, filters), MEMBER_COLUMNS
+
+
+def coins(filters):
+    # The ledger, not the UserCoin balances: one row per award or correction
+    queryset = CoinTransaction.objects.all()
+    if filters.get('event'):
+        queryset = queryset.filter(event_id=filters['event'])
+    if filters.get('category'):
+        queryset = queryset.filter(event__category_id=filters['category'])
+    if filters.get('status'):
+        # The ledger has no status; it selects the gain type here
+        queryset = queryset.filter(gain_type=filters['status'])
+    return _filter_dates(queryset, filters, 'created_at__date'), COIN_COLUMNS
+
+
+DATASETS = {
+    'registrations': registrations,
+    'attendance': attendance,
+    'coins': coins,
+}
+
+
+def export_rows(dataset, filters):
+    """Return (headers, row iterator) for a dataset; filters come from ExportFilterForm"""
+    queryset, columns = DATASETS[dataset](filters)
+    lookups = [lookup for _, lookup in columns]
+    rows = queryset.order_by('id').values_list(*lookups).iterator(chunk_size=CHUNK_SIZE)
+    return [header for header, _ in columns], rows
+
+
+class Echo:
+    """File-like object whose write() hands back the line for streaming"""
+    def write(self, value):
+        return value
+
+
+def stream_csv(headers, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_jsonl(headers, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder) + '\n'
@@ -2,7 +2,7 @@ from django import forms
 from betterforms.multiform import MultiModelForm
 from django.contrib.auth.models import User
 
-from .models import Event, EventImage, EventAgenda, AdminMessage, EventComment
+from .models import Event, EventImage, EventAgenda, AdminMessage, EventComment, EventMember, UserCoin
 
 
 class EventForm(forms.ModelForm):
@@ -164,4 +164,56 @@ class ContactForm(forms.Form):
             'placeholder': 'Your message...',
             'required': True
         })
-    )
\ No newline at end of file
+    )
+
+class CoinAwardForm(forms.Form):
+    """Award or correct a user's coins; every submission is a new ledger row"""
+    user = forms.ModelChoiceField(queryset=User.objects.filter(is_active=True).order_by('username'))
+    gain_type = forms.ChoiceField(choices=UserCoin.CHOICE_GAIN_TYPE, initial='others')
+    gain_coin = forms.IntegerField(label='Coins', help_text='Use a negative number to take coins back.')
+    note = forms.CharField(max_length=255, required=False)
+
+    def clean_gain_coin(self):
+        coins = self.cleaned_data['gain_coin']
+        if coins == 0:
+            raise forms.ValidationError('Enter a non-zero number of coins.')
+        return coins
+
+
+class ExportFilterForm(forms.Form):
+    """Query-string filters for the streaming export endpoints"""
+    event = forms.IntegerField(required=False, min_value=1)
+    category = forms.IntegerField(required=False, min_value=1)
+    status = forms.CharField(required=False, max_length=10)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+
+
+class EventApiFilterForm(forms.Form):
+    """Query-string filters for the JSON event list"""
+    category = forms.IntegerField(required=False, min_value=1)
+    q = forms.CharField(required=False, max_length=100)
+    start_from = forms.DateField(required=False)
+    start_to = forms.DateField(required=False)
+
+
+class RegistrationImportForm(forms.Form):
+    """CSV upload for bulk registration: one username or email per row"""
+    file = forms.FileField(help_text='CSV with one username or email per row; a header row is optional.')
+    attend_status = forms.ChoiceField(
+        choices=[('waiting', 'Waiting'), ('attending', 'Attending')],
+        initial='waiting',
+    )
+
+
+class EventCloseOutForm(forms.Form):
+    """Attendance for closing out an event: the ticked registrations attended"""
+    attended = forms.ModelMultipleChoiceField(
+        queryset=EventMember.objects.none(),
+        required=False,
+        widget=forms.CheckboxSelectMultiple,
+    )
+
+    def __init__(self, members, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['attended'].queryset = members
@@ -0,0 +1,183 @@
+"""Processing of uploaded event and category images, run off the request path.
+
+Saving an EventImage or EventCategory with a new image queues a task (see
+signals.py) that rotates the upload upright, shrinks it to
+IMAGE_MAX_DIMENSION and writes resized JPEG and WebP variants next to it.
+The variant paths and sizes are stored in the model's image_variants:
+
+    {'source': 'event_image/photo.jpg',
+     'card': {'width': 480, 'height': 320,
+              'jpeg': 'event_image/variants/photo_card.jpg',
+              'webp': 'event_image/variants/photo_card.webp'}, ...}
+
+Templates use the srcset helpers in templatetags/event_images.py, which
+fall back to the original upload until the variants exist.
+"""
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from PIL import ExifTags, Image, ImageOps
+
+from . import cache as event_cache
+from .models import Event, EventCategory, EventImage
+from .tasks import task
+
+# Variant name and width in pixels, smallest first
+VARIANTS = (
+    ('thumb', 160),
+    ('card', 480),
+    ('hero', 1280),
+)
+# Variant format key, Pillow format, file extension and encoder options
+FORMATS = (
+    ('jpeg', 'JPEG', '.jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    ('webp', 'WEBP', '.webp', {'quality': 80, 'method': 4}),
+)
+
+
+def needs_processing(instance):
+    """Whether instance.image has changed since its variants were made"""
+    variants = instance.image_variants or {}
+    if not instance.image:
+        return bool(variants)
+    return variants.get('source') != instance.image.name
+
+
+def variant_path(name, variant, extension):
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, 'variants', f'{stem}_{variant}{extension}')
+
+
+def load_upright(field_file, max_dimension):
+    """Decode the upload, rotated upright and no larger than max_dimension.
+
+    Returns (image, changed), changed being whether it differs from the file.
+    """
+    with field_file.open('rb') as source, Image.open(source) as original:
+        upright = original.getexif().get(ExifTags.Base.Orientation, 1) == 1
+        oversized = max(original.size) > max_dimension
+        # Re-encoding would keep only the first frame of an animation
+        animated = getattr(original, 'is_animated', False)
+        image_format = original.format
+        # JPEGs can be decoded straight at a fraction of their size
+        original.draft('RGB', (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(original)
+    if max(image.size) > max_dimension:
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    image.format = image_format
+    return image, (not upright or oversized) and not animated
+
+
+def encode(image, image_format, options):
+    if image_format in ('JPEG', 'WEBP') and image.mode not in ('RGB', 'L'):
+        # Flatten transparency onto white instead of black
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.convert('RGBA').getchannel('A'))
+        image = background
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def write_variants(image, name, storage):
+    """Write every variant of image for the upload called name and return the mapping"""
+    variants = {'source': name}
+    resized = image
+    # Largest first, each variant resized from the one before, which is much
+    # cheaper than going back to the full-size image every time
+    for variant, width in reversed(VARIANTS):
+        if resized.width > width:
+            resized = resized.resize(
+                (width, round(resized.height * width / resized.width)), Image.LANCZOS, reducing_gap=3.0,
+            )
+        variants[variant] = {'width': resized.width, 'height': resized.height}
+        for key, image_format, extension, options in FORMATS:
+            path = variant_path(name, variant, extension)
+            storage.delete(path)
+            variants[variant][key] = storage.save(path, encode(resized, image_format, options))
+    return variants
+
+
+def variant_files(variants):
+    return {
+        path for variant, _ in VARIANTS for key, *_ in FORMATS
+        for path in [variants.get(variant, {}).get(key)] if path
+    }
+
+
+def process(instance):
+    """Normalize instance.image and write its variants; returns whether anything changed.
+
+    The results are stored with a conditional UPDATE, so an image replaced
+    while this ran is left for its own task and the files written here are
+    removed again.
+    """
+    model = type(instance)
+    previous = instance.image_variants or {}
+    storage = instance.image.storage
+    name = instance.image.name or ''
+    variants = {}
+    written = set()
+    if name:
+        image, changed = load_upright(instance.image, getattr(settings, 'IMAGE_MAX_DIMENSION', 2560))
+        if changed:
+            image_format = image.format or 'JPEG'
+            options = {'quality': 85, 'optimize': True, 'progressive': True} if image_format == 'JPEG' else {}
+            name = storage.save(name, encode(image, image_format, options))
+            written.add(name)
+        variants = write_variants(image, name, storage)
+        written |= variant_files(variants)
+
+    unchanged = Q(image=instance.image.name) if instance.image.name else Q(image='') | Q(image__isnull=True)
+    if not model.objects.filter(unchanged, pk=instance.pk).update(image=name, image_variants=variants):
+        for path in written:
+            storage.delete(path)
+        return False
+    for path in variant_files(previous) - written:
+        storage.delete(path)
+    if name != instance.image.name:
+        storage.delete(instance.image.name)
+    instance.image.name = name
+    instance.image_variants = variants
+    return True
+
+
+@task
+def process_event_image(image_id):
+    event_image = EventImage.objects.filter(pk=image_id).first()
+    if event_image is not None and needs_processing(event_image) and process(event_image):
+        # update() sends no post_save, so expire the cached cards here
+        transaction.on_commit(lambda: event_cache.expire_events([event_image.event_id]))
+
+
+@task
+def process_category_image(category_id):
+    category = EventCategory.objects.filter(pk=category_id).first()
+    if category is not None and needs_processing(category) and process(category):
+        event_ids = list(Event.objects.filter(category=category).values_list('id', flat=True))
+        transaction.on_commit(lambda: event_cache.expire_events(event_ids))
+
+
+def variant_url(instance, variant, key='jpeg'):
+    """URL of one variant, or of the original upload while there are no variants"""
+    if not instance or not instance.image:
+        return ''
+    path = (instance.image_variants or {}).get(variant, {}).get(key)
+    return instance.image.storage.url(path) if path else instance.image.url
+
+
+def srcset(instance, key='jpeg'):
+    """srcset value listing every variant of instance's image with its width"""
+    if not instance or not instance.image:
+        return ''
+    variants = instance.image_variants or {}
+    storage = instance.image.storage
+    return ', '.join(
+        f'{storage.url(variants[variant][key])} {variants[variant]["width"]}w'
+        for variant, _ in VARIANTS if variant in variants
+    )
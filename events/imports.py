@@ -0,0 +1,173 @@
+"""Bulk registration import from an uploaded CSV of usernames or emails.
+
+Rows are validated in chunks with one IN lookup against auth_user and one
+against the event's registrations, seats for the whole batch are claimed
+with a single conditional UPDATE on Event.registered_count, and the members
+are written with bulk_create, all in one transaction. Nothing is written if
+the import fails part way. A user who registers on their own while the file
+is being imported is rejected as already registered and their claimed seat
+handed back.
+"""
+import csv
+import io
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+from . import cache as event_cache
+from .models import Event, EventMember, member_counter_updates
+
+# Both IN lists of a chunk together stay under the 999 parameters older SQLite builds allow
+CHUNK_SIZE = 450
+HEADER_NAMES = ('username', 'email', 'user')
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.rejected = []
+
+    def reject(self, line, value, reason):
+        self.rejected.append((line, value, reason))
+
+
+def read_identifiers(upload):
+    """Yield (line number, username or email) from the first non-empty cell of each CSV row"""
+    reader = csv.reader(io.TextIOWrapper(upload, encoding='utf-8-sig', newline=''))
+    for line, row in enumerate(reader, start=1):
+        value = next((cell.strip() for cell in row if cell.strip()), '')
+        if not value or (line == 1 and value.lower() in HEADER_NAMES):
+            continue
+        yield line, value
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def resolve_users(event, identifiers, result, chunk_size):
+    """Return [(line, value, user_id)] for rows naming a known, unregistered user"""
+    accepted = []
+    seen = set()
+    for chunk in chunks(identifiers, chunk_size):
+        names = [value for _, value in chunk]
+        emails = [value for _, value in chunk if '@' in value]
+        by_username = {}
+        by_email = {}
+        for user_id, username, email in User.objects.filter(
+            Q(username__in=names) | Q(email__in=emails), is_active=True
+        ).values_list('id', 'username', 'email'):
+            by_username[username] = user_id
+            by_email.setdefault(email, []).append(user_id)
+        registered = set(EventMember.objects.filter(
+            event=event, user_id__in=list(by_username.values()) + [i for ids in by_email.values() for i in ids],
+        ).values_list('user_id', flat=True))
+
+        for line, value in chunk:
+            user_id = by_username.get(value)
+            if user_id is None and '@' in value:
+                matches = by_email.get(value, [])
+                if len(matches) > 1:
+                    result.reject(line, value, 'email matches several users')
+                    continue
+                user_id = matches[0] if matches else None
+            if user_id is None:
+                result.reject(line, value, 'no active user')
+            elif user_id in seen:
+                result.reject(line, value, 'duplicate in file')
+            elif user_id in registered:
+                result.reject(line, value, 'already registered')
+            else:
+                seen.add(user_id)
+                accepted.append((line, value, user_id))
+    return accepted
+
+
+def claim_seats(event, wanted, attend_status):
+    """Claim up to wanted seats in one conditional UPDATE; returns the number claimed.
+
+    If the whole batch does not fit, the free seats are read under a row
+    lock and claimed instead. Call inside a transaction.
+    """
+    if not wanted:
+        return 0
+    updates = member_counter_updates(attend_status, wanted)
+    events = Event.objects.filter(pk=event.pk, status='active')
+    if events.filter(Q(maximum_attende=0) | Q(registered_count__lte=F('maximum_attende') - wanted)).update(**updates):
+        return wanted
+    capacity = events.select_for_update().values_list('maximum_attende', 'registered_count').first()
+    if capacity is None:
+        return 0
+    free = min(max(capacity[0] - capacity[1], 0), wanted)
+    if free and events.filter(registered_count__lte=F('maximum_attende') - free).update(
+        **member_counter_updates(attend_status, free)
+    ):
+        return free
+    return 0
+
+
+def insert_members(event, rows, attend_status, created_by, result):
+    """bulk_create a member for each (line, value, user_id) in rows; returns how many were written.
+
+    A user who registered after resolve_users() looked makes the batch clash
+    on (event, user). The batch is then retried row by row and the clashing
+    rows are rejected.
+    """
+    def members(rows):
+        return [
+            EventMember(
+                event=event,
+                user_id=user_id,
+                attend_status=attend_status,
+                status='active',
+                created_user=created_by,
+                updated_user=created_by,
+            )
+            for _, _, user_id in rows
+        ]
+
+    try:
+        with transaction.atomic():
+            EventMember.objects.bulk_create(members(rows))
+        return len(rows)
+    except IntegrityError:
+        pass
+    created = 0
+    for row in rows:
+        try:
+            with transaction.atomic():
+                EventMember.objects.bulk_create(members([row]))
+            created += 1
+        except IntegrityError:
+            result.reject(row[0], row[1], 'already registered')
+    return created
+
+
+def import_registrations(event, upload, created_by, attend_status='waiting', chunk_size=CHUNK_SIZE):
+    """Register the users listed in upload for event and return an ImportResult"""
+    result = ImportResult()
+    with transaction.atomic():
+        accepted = resolve_users(event, read_identifiers(upload), result, chunk_size)
+        seats = claim_seats(event, len(accepted), attend_status)
+        for line, value, _ in accepted[seats:]:
+            result.reject(line, value, 'event is full' if event.status == 'active' else 'event is not open')
+        for chunk in chunks(accepted[:seats], chunk_size):
+            result.created += insert_members(event, chunk, attend_status, created_by, result)
+        clashed = seats - result.created
+        if clashed:
+            # Those users hold their own seats already; give back the ones claimed for them
+            Event.adjust_member_counters(event.pk, attend_status, -clashed)
+            for _ in range(clashed):
+                if Event.promote_waitlist(event.pk) is None:
+                    break
+        # bulk_create sends no post_save, so expire the cached pages here
+        transaction.on_commit(lambda: event_cache.expire_events([event.pk]))
+    result.rejected.sort()
+    return result
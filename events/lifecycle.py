@@ -0,0 +1,95 @@
+"""Scheduled status transitions for events that are over.
+
+An active event whose end_date has passed becomes:
+
+* 'completed' if attendance was taken, i.e. some registration is already
+  'completed'; registrations still 'waiting' or 'attending' are marked
+  'absent' and the seat counters go to zero, as a close-out would do;
+* 'time out' otherwise; registrations are left for a later close-out (see
+  closeout.py), which also credits the points.
+
+Either way, the waitlist is cancelled and the event's active registrations
+are closed (EventMember.status 'completed'). Every step is one UPDATE over
+a batch of event ids and only touches rows still in the state it moves them
+from, so overlapping or repeated runs change nothing twice. The candidates
+are read in order from the (status, end_date, id) index, so a run that finds
+nothing to do costs one index probe.
+"""
+import logging
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import cache as event_cache
+from .models import REGISTERED_ATTEND_STATUSES, DashboardStats, Event, EventLifecycleRun, EventMember
+from .tasks import task
+
+logger = logging.getLogger('events.lifecycle')
+
+# Event ids per transaction; also keeps every IN list well under SQLite's parameter limit
+BATCH_SIZE = 500
+
+
+def due_events(today):
+    return Event.objects.filter(status='active', end_date__lt=today)
+
+
+def advance_batch(ids, today, run):
+    """Move the events in ids on and cascade to their registrations; call inside a transaction"""
+    completed_ids = set(
+        EventMember.objects.filter(event_id__in=ids, attend_status='completed')
+        .values_list('event_id', flat=True).distinct()
+    )
+    timed_out_ids = [pk for pk in ids if pk not in completed_ids]
+
+    completed = Event.objects.filter(pk__in=completed_ids, status='active').update(
+        status='completed', registered_count=0, waiting_count=0,
+    )
+    run.completed += completed
+    run.timed_out += Event.objects.filter(pk__in=timed_out_ids, status='active').update(status='time out')
+    if completed:
+        DashboardStats.adjust(completed_event_count=completed)
+
+    members = EventMember.objects.filter(event_id__in=ids)
+    run.waitlist_cancelled += members.filter(attend_status='waitlisted').update(
+        attend_status='cancelled', waitlist_position=None, updated_date=today,
+    )
+    run.marked_absent += members.filter(
+        event_id__in=completed_ids, attend_status__in=REGISTERED_ATTEND_STATUSES,
+    ).update(attend_status='absent', updated_date=today)
+    run.members_closed += members.filter(status='active').update(status='completed', updated_date=today)
+
+    # update() sends no post_save, so expire the cached pages here
+    transaction.on_commit(lambda: event_cache.expire_events(ids))
+
+
+def advance(today=None, batch_size=BATCH_SIZE):
+    """Move every active event that ended before today on; returns the EventLifecycleRun,
+    saved only if something changed"""
+    today = today or timezone.localdate()
+    run = EventLifecycleRun(started_at=timezone.now())
+    lock = {'skip_locked': True} if connection.features.has_select_for_update_skip_locked else {}
+    while True:
+        with transaction.atomic():
+            ids = list(
+                due_events(today).select_for_update(**lock).order_by('end_date', 'id')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if ids:
+                advance_batch(ids, today, run)
+        if len(ids) < batch_size:
+            break
+    run.finished_at = timezone.now()
+    if run.timed_out or run.completed:
+        run.save()
+        logger.info(
+            'Lifecycle: %d event(s) timed out, %d completed; %d waitlisted cancelled, %d marked absent, '
+            '%d registration(s) closed', run.timed_out, run.completed, run.waitlist_cancelled,
+            run.marked_absent, run.members_closed,
+        )
+    return run
+
+
+@task
+def advance_event_lifecycle():
+    advance()
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from events import lifecycle
+
+
+class Command(BaseCommand):
+    help = (
+        "Move active events whose end date has passed to 'completed' or 'time out' and close "
+        'their registrations; safe to run every minute'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Count the events that are due without changing them')
+        parser.add_argument('--batch-size', type=int, default=lifecycle.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            due = lifecycle.due_events(timezone.localdate()).count()
+            self.stdout.write(f'{due} event(s) are due.')
+            return
+
+        run = lifecycle.advance(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{run.timed_out} event(s) timed out, {run.completed} completed; '
+            f'{run.waitlist_cancelled} waitlisted registration(s) cancelled, {run.marked_absent} marked absent, '
+            f'{run.members_closed} closed.'
+        ))
@@ -0,0 +1,85 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from events import search
+from events.models import Event, EventCategory
+
+SYLLABLES = 'ka lo mi ne ru sa te vi do ba ze fu gi pa ro li mu ta ke no'.split()
+
+
+class Command(BaseCommand):
+    help = (
+        'Time event search at scale on synthetic data, FTS5 against icontains. '
+        'Everything runs in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=100000)
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # A few thousand made-up words give realistic term selectivity
+        words = sorted({''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(5000)})
+        queries = []
+        for _ in range(options['queries']):
+            terms = rng.sample(words, rng.choice((1, 1, 2)))
+            # Every third query is a prefix of a single word, as typed in a search box
+            if len(queries) % 3 == 2:
+                terms = [terms[0][:4]]
+            queries.append(' '.join(terms))
+        with transaction.atomic():
+            self.seed(rng, words, options['events'])
+            if search.fts_available(connection):
+                self.report('fts5', queries, lambda q: Event.objects.search(q))
+            self.report('icontains', queries, self.icontains)
+            transaction.set_rollback(True)
+
+    def seed(self, rng, words, count):
+        category = EventCategory.objects.create(name='benchmark-search', code='bsrch', priority=-1)
+        started = time.perf_counter()
+        Event.objects.bulk_create(
+            (
+                Event(
+                    category=category,
+                    name=f'{" ".join(rng.sample(words, 3)).title()} #{i}',
+                    description=' '.join(rng.choices(words, k=40)),
+                    scheduled_status='scheduled',
+                    venue=f'{rng.choice(words).title()} Hall',
+                    location=rng.choice(words).title(),
+                    start_date='2030-01-01',
+                    end_date='2030-01-02',
+                    points=1,
+                    maximum_attende=100,
+                )
+                for i in range(count)
+            ),
+            batch_size=2000,
+        )
+        if search.fts_available(connection):
+            search.rebuild_index(using=connection)
+        self.stdout.write(f'Seeded and indexed {count} events in {time.perf_counter() - started:.1f}s')
+
+    def icontains(self, query):
+        queryset = Event.objects.all()
+        for term in search.search_terms(query):
+            queryset = queryset.filter(Q(name__icontains=term) | Q(description__icontains=term))
+        return queryset.order_by('-start_date')
+
+    def report(self, label, queries, run):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            list(run(query)[:20])
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f'{label:>10}: p50 {statistics.median(timings):.2f} ms, p95 {p95:.2f} ms over {len(timings)} queries'
+        )
@@ -0,0 +1,169 @@
+import multiprocessing
+import os
+import re
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from events.db import apply_pragmas
+from events.models import AdminMessage, Event, EventComment, EventMember, REGISTERED_ATTEND_STATUSES
+
+# The Python sqlite3 default, which Django used before OPTIONS['timeout']
+DEFAULT_TIMEOUT = 5
+
+
+def read_queries(event_id, user_id):
+    """(sql, params) for the reads and joins behind the busiest pages"""
+    querysets = [
+        Event.objects.filter(status='active').with_capacity().select_related(
+            'category', 'eventimage').order_by('-start_date', '-id')[:11],
+        Event.objects.filter(pk=event_id).with_capacity(live=True).select_related('category'),
+        EventMember.objects.filter(user_id=user_id, status='active').select_related('event__category'),
+        EventMember.objects.filter(event_id=event_id, attend_status__in=REGISTERED_ATTEND_STATUSES).values('id'),
+        EventComment.objects.filter(
+            event_id=event_id, status='active', parent=None).select_related('user').order_by('-id')[:21],
+        AdminMessage.objects.filter(sender_id=user_id).select_related('sender')[:10],
+    ]
+    # Django writes %s placeholders; the sqlite3 module wants ?
+    return [
+        (re.sub(r'(?<!%)%s', '?', sql).replace('%%', '%'), params)
+        for sql, params in (queryset.query.sql_with_params() for queryset in querysets)
+    ]
+
+
+def is_locked(error):
+    return 'locked' in str(error) or 'busy' in str(error)
+
+
+def open_connection(path, tuned):
+    if not tuned:
+        return sqlite3.connect(path, timeout=DEFAULT_TIMEOUT)
+    db = sqlite3.connect(path, timeout=20)
+    # The production profile is what is measured, whatever SQLITE_PROFILE says
+    values = {name: value for name, value in settings.SQLITE_PRAGMAS.items() if name != 'journal_mode'}
+    apply_pragmas(db.cursor(), values)
+    return db
+
+
+def reader(path, tuned, queries, duration, results):
+    """Run the read queries in turn for duration seconds, reconnecting per request unless tuned"""
+    latencies, errors = [], 0
+    db = open_connection(path, tuned) if tuned else None
+    deadline = time.perf_counter() + duration
+    i = 0
+    while time.perf_counter() < deadline:
+        sql, params = queries[i % len(queries)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            request_db = db or open_connection(path, tuned)
+            request_db.execute(sql, params).fetchall()
+            if not tuned:
+                request_db.close()
+        except sqlite3.OperationalError as error:
+            if not is_locked(error):
+                raise
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    results.put(('read', latencies, errors))
+
+
+def writer(path, tuned, event_ids, duration, results):
+    """Commit small registration-sized writes for duration seconds"""
+    latencies, errors = [], 0
+    db = open_connection(path, tuned)
+    db.isolation_level = None
+    deadline = time.perf_counter() + duration
+    i = 0
+    while time.perf_counter() < deadline:
+        event_id = event_ids[i % len(event_ids)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            db.execute(
+                'UPDATE events_event SET waitlist_sequence = waitlist_sequence + 1 WHERE id = ?', (event_id,)
+            )
+            db.execute('COMMIT')
+        except sqlite3.OperationalError as error:
+            if not is_locked(error):
+                raise
+            errors += 1
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            continue
+        latencies.append(time.perf_counter() - started)
+    results.put(('write', latencies, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare concurrent read/join throughput on copies of the database: the old '
+        'profile (rollback journal, a new connection per request) against WAL with '
+        'SQLITE_PRAGMAS and persistent connections'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=1)
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per profile')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('benchmark_sqlite needs the SQLite backend.')
+        event_id = Event.objects.order_by('-registered_count').values_list('id', flat=True).first()
+        user_id = EventMember.objects.values_list('user_id', flat=True).first()
+        if event_id is None or user_id is None:
+            raise CommandError('No events or registrations to read; seed data first.')
+        queries = read_queries(event_id, user_id)
+        event_ids = list(Event.objects.order_by('id').values_list('id', flat=True)[:100])
+
+        with tempfile.TemporaryDirectory() as directory:
+            for label, tuned in (('before', False), ('after', True)):
+                path = os.path.join(directory, f'{label}.sqlite3')
+                self.copy_database(path, 'wal' if tuned else 'delete')
+                self.report(label, self.run(path, tuned, queries, event_ids, options), options['duration'])
+
+    def copy_database(self, path, journal_mode):
+        # The backup API gives a consistent copy even while the site is writing
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        connection.connection.backup(target)
+        target.execute(f'PRAGMA journal_mode = {journal_mode}')
+        target.close()
+
+    def run(self, path, tuned, queries, event_ids, options):
+        context = multiprocessing.get_context('fork' if hasattr(os, 'fork') else 'spawn')
+        results = context.Queue()
+        workers = [
+            context.Process(target=reader, args=(path, tuned, queries, options['duration'], results))
+            for _ in range(options['readers'])
+        ] + [
+            context.Process(target=writer, args=(path, tuned, event_ids, options['duration'], results))
+            for _ in range(options['writers'])
+        ]
+        for worker in workers:
+            worker.start()
+        collected = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        return collected
+
+    def report(self, label, collected, duration):
+        for kind in ('read', 'write'):
+            latencies = sorted(t for k, times, _ in collected if k == kind for t in times)
+            errors = sum(e for k, _, e in collected if k == kind)
+            if not latencies and not errors:
+                continue
+            p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+            median = statistics.median(latencies) * 1000 if latencies else 0
+            self.stdout.write(
+                f'{label:7} {kind:6} {len(latencies) / duration:9.0f}/s  median {median:7.2f} ms  '
+                f'p95 {p95:8.2f} ms  locked {errors}'
+            )
@@ -0,0 +1,83 @@
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+# Pool processes import this module before Django is set up, so the
+# events modules are only imported inside the functions below
+MODELS = ('eventimage', 'eventcategory')
+
+
+def process_one(model_name, pk, force):
+    """Process one image in a pool process; returns (outcome, ids of the events showing it)"""
+    django.setup()
+    from django.apps import apps
+    from events import images
+    from events.models import Event
+
+    instance = apps.get_model('events', model_name).objects.filter(pk=pk).first()
+    if instance is None:
+        return 'missing', []
+    if not force and not images.needs_processing(instance):
+        return 'current', []
+    if force:
+        instance.image_variants = {}
+    try:
+        images.process(instance)
+    except Exception as error:
+        return f'failed: {error}', []
+    if model_name == 'eventimage':
+        return 'processed', [instance.event_id]
+    return 'processed', list(Event.objects.filter(category=instance).values_list('id', flat=True))
+
+
+class Command(BaseCommand):
+    help = (
+        'Write the resized JPEG and WebP variants for existing event and category '
+        'images in a pool of processes; images that are already current are skipped'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None, help='Pool size (default: one per CPU)')
+        parser.add_argument('--only', choices=MODELS, help='Process only this model')
+        parser.add_argument('--force', action='store_true', help='Rebuild variants that look current')
+
+    def handle(self, *args, **options):
+        from events import cache as event_cache
+        from events.models import EventCategory, EventImage
+
+        jobs = []
+        for model in (EventImage, EventCategory):
+            name = model._meta.model_name
+            if options['only'] in (None, name):
+                with_image = model.objects.exclude(image='').exclude(image__isnull=True)
+                jobs += [(name, pk) for pk in with_image.values_list('pk', flat=True)]
+        if not jobs:
+            self.stdout.write('No images to process.')
+            return
+
+        # Pool processes must open their own database connections
+        connections.close_all()
+        started = time.perf_counter()
+        outcomes = Counter()
+        event_ids = set()
+        with ProcessPoolExecutor(max_workers=options['processes']) as pool:
+            futures = {pool.submit(process_one, name, pk, options['force']): (name, pk) for name, pk in jobs}
+            for future in as_completed(futures):
+                outcome, events = future.result()
+                outcomes[outcome.split(':')[0]] += 1
+                event_ids.update(events)
+                if outcome.startswith('failed'):
+                    name, pk = futures[future]
+                    self.stderr.write(f'{name} #{pk} {outcome}')
+
+        # The variants were stored with update(), so expire the cached pages here
+        if event_ids:
+            event_cache.expire_events(sorted(event_ids))
+        summary = ', '.join(f'{count} {outcome}' for outcome, count in sorted(outcomes.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(jobs)} image(s) in {time.perf_counter() - started:.1f}s: {summary}.'
+        ))
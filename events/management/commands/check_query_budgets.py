@@ -0,0 +1,58 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from events.models import Event
+from events.profiling import KEY_VIEWS, QueryCounter, query_budget
+
+
+class Command(BaseCommand):
+    help = (
+        'Request the key views with the test client and fail if any runs more '
+        'queries than its QUERY_BUDGETS entry; run it in CI on seeded data'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--staff', help='Username for staff views (default: first superuser)')
+        parser.add_argument('--user', help='Username for user views (default: first non-staff user)')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        staff = self.get_user(options['staff'], is_staff=True)
+        user = self.get_user(options['user'], is_staff=False)
+        event = Event.objects.filter(status='active').order_by('-registered_count').first()
+        if event is None:
+            raise CommandError('No active event to request; seed data first.')
+
+        clients = {'anonymous': Client(), 'user': Client(), 'staff': Client()}
+        clients['user'].force_login(user)
+        clients['staff'].force_login(staff)
+
+        failures = 0
+        for url_name, role, needs_event in KEY_VIEWS:
+            url = reverse(url_name, args=[event.pk] if needs_event else [])
+            with QueryCounter() as counter:
+                response = clients[role].get(url)
+            budget = query_budget(url_name)
+            over = budget is not None and counter.count > budget
+            failures += over or response.status_code >= 400
+            line = f'{url_name:28} {response.status_code} {counter.count:3} queries (budget {budget})'
+            self.stdout.write(self.style.ERROR(line) if over else line)
+
+        if failures:
+            raise CommandError(f'{failures} view(s) failed or went over budget.')
+        self.stdout.write(self.style.SUCCESS('All key views are within their query budgets.'))
+
+    @staticmethod
+    def get_user(username, is_staff):
+        users = User.objects.filter(is_active=True)
+        if username:
+            users = users.filter(username=username)
+        else:
+            users = users.filter(is_staff=is_staff).order_by('id')
+        user = users.first()
+        if user is None:
+            raise CommandError(f'No {"staff" if is_staff else "regular"} user found; pass --staff/--user.')
+        return user
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from events.models import Event, EventMember
+from events.profiling import key_querysets, plan_problems
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the hot filters and fail if any plan scans a whole table or sorts '
+        'without an index; run it in CI after migrating'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not only failing ones')
+
+    def handle(self, *args, **options):
+        # Any ids do; the plan depends on the filters, not on the values
+        event_id = Event.objects.values_list('id', flat=True).first() or 1
+        user_id = EventMember.objects.values_list('user_id', flat=True).first() or 1
+
+        failures = 0
+        for label, queryset, allow_sort in key_querysets(event_id, user_id):
+            problems = plan_problems(queryset, allow_sort)
+            failures += bool(problems)
+            if problems:
+                self.stdout.write(self.style.ERROR(f'{label:32} FAIL'))
+                for line in problems:
+                    self.stdout.write(f'    {line}')
+            else:
+                self.stdout.write(f'{label:32} ok')
+            if options['verbose_plans']:
+                for line in queryset.explain().splitlines():
+                    self.stdout.write(f'    | {line}')
+
+        if failures:
+            raise CommandError(f'{failures} query plan(s) scan a whole table or sort without an index.')
+        self.stdout.write(self.style.SUCCESS('Every hot filter is served by an index.'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from events.models import DashboardStats
+
+FIELDS = ('user_count', 'category_count', 'event_count', 'completed_event_count')
+
+
+class Command(BaseCommand):
+    help = 'Recount the admin dashboard totals and report drift; run it periodically from cron'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing')
+
+    def handle(self, *args, **options):
+        stored = DashboardStats.objects.filter(pk=DashboardStats.SNAPSHOT_ID).values(*FIELDS).first() or {}
+        actual = DashboardStats.compute()
+        drift = [field for field in FIELDS if stored.get(field) != actual[field]]
+        for field in drift:
+            self.stdout.write(f'{field} {stored.get(field)} -> {actual[field]}')
+
+        if drift and not options['dry_run']:
+            DashboardStats.rebuild()
+
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} drift on {len(drift)} total(s).'))
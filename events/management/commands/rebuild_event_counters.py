@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from events import cache as event_cache
+from events.models import Event, EventComment, EventMember, REGISTERED_ATTEND_STATUSES
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute Event.registered_count, waiting_count and comment_count from '
+        'EventMember and EventComment rows and report drift'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        # One grouped query per source table for the real totals of every event
+        members = {
+            row['event']: (row['registered'], row['waiting'])
+            for row in EventMember.objects.values('event').annotate(
+                registered=Count('id', filter=Q(attend_status__in=REGISTERED_ATTEND_STATUSES)),
+                waiting=Count('id', filter=Q(attend_status='waiting')),
+            ).order_by()
+        }
+        comments = dict(
+            EventComment.objects.filter(status='active').values('event').annotate(
+                active=Count('id')
+            ).order_by().values_list('event', 'active')
+        )
+
+        fields = ['registered_count', 'waiting_count', 'comment_count']
+        drifted = []
+        events = Event.objects.only('id', 'name', *fields)
+        for event in events.iterator(chunk_size=options['batch_size']):
+            actual = members.get(event.id, (0, 0)) + (comments.get(event.id, 0),)
+            stored = tuple(getattr(event, field) for field in fields)
+            if stored != actual:
+                changes = ', '.join(
+                    f'{field} {old} -> {new}' for field, old, new in zip(fields, stored, actual) if old != new
+                )
+                self.stdout.write(f'{event.name} (#{event.id}): {changes}')
+                for field, value in zip(fields, actual):
+                    setattr(event, field, value)
+                drifted.append(event)
+
+        if drifted and not options['dry_run']:
+            with transaction.atomic():
+                Event.objects.bulk_update(drifted, fields, batch_size=options['batch_size'])
+                # bulk_update sends no post_save, so expire the cached pages here
+                transaction.on_commit(lambda: event_cache.expire_events([event.pk for event in drifted]))
+
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} drift on {len(drifted)} event(s).'))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, OuterRef, Q, Subquery, Sum
+
+from events.models import CoinTransaction, LeaderboardBucket, UserCoin
+
+
+class Command(BaseCommand):
+    help = (
+        'Recount the leaderboard buckets from UserCoin and report drift, and list '
+        'balances that disagree with the sum of their coin ledger'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing')
+
+    def handle(self, *args, **options):
+        stored = dict(LeaderboardBucket.objects.filter(user_count__gt=0).values_list('balance', 'user_count'))
+        actual = LeaderboardBucket.compute()
+        drift = sorted(balance for balance in set(stored) | set(actual) if stored.get(balance) != actual.get(balance))
+        for balance in drift:
+            self.stdout.write(f'balance {balance}: {stored.get(balance, 0)} -> {actual.get(balance, 0)} user(s)')
+
+        if drift and not options['dry_run']:
+            LeaderboardBucket.rebuild()
+
+        # The ledger is the history; a balance edited outside UserCoin.save()
+        # and CoinTransaction.award() needs a correcting transaction
+        ledger = CoinTransaction.objects.filter(user=OuterRef('user')).order_by().values('user').annotate(
+            total=Sum('delta')
+        ).values('total')
+        mismatched = UserCoin.objects.annotate(ledger_total=Subquery(ledger)).filter(
+            Q(ledger_total__isnull=True) | ~Q(ledger_total=F('gain_coin'))
+        ).values_list('user_id', 'gain_coin', 'ledger_total')
+        for user_id, balance, total in mismatched:
+            self.stdout.write(self.style.WARNING(f'user #{user_id}: balance {balance}, ledger total {total}'))
+
+        verb = 'Found' if options['dry_run'] else 'Fixed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} drift on {len(drift)} bucket(s); {len(mismatched)} balance(s) disagree with the ledger.'
+        ))
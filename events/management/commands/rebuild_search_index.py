@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+from events import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SQLite FTS5 event search index from the events table'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stdout.write('Database is not SQLite; search uses icontains matching and has no index to rebuild.')
+            return
+        with transaction.atomic():
+            if not search.fts_available(connection):
+                try:
+                    search.create_index(using=connection)
+                except OperationalError as e:
+                    raise CommandError(f'SQLite FTS5 is not available: {e}')
+            count = search.rebuild_index(using=connection)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} event(s).'))
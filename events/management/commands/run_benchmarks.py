@@ -0,0 +1,177 @@
+import json
+import statistics
+import subprocess
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from events import calendar
+from events.models import AdminMessage, Event, EventCategory, EventComment, EventMember, EventUserWishList
+from events.profiling import QueryCounter
+
+# Views that change data on GET
+SKIP = {'logout', 'join-event'}
+# Fixed arguments, and the model whose id fills 'pk' where it isn't the view's own model
+EXTRA_KWARGS = {'export-dataset': {'dataset': 'registrations', 'fmt': 'csv'}}
+PK_MODELS = {
+    'event-comment-page': Event, 'api-event-detail': Event, 'category-calendar-feed': EventCategory,
+    'import-registrations': Event, 'close-out-event': Event,
+}
+# Other path parameters, as the key in sample_ids() that fills them
+ID_MODELS = {'event_id': Event, 'comment_id': EventComment, 'token': 'feed_token'}
+# Query strings, as the key in sample_ids() that holds each value
+QUERY_SAMPLES = {'api-event-batch': {'ids': 'event_ids'}}
+
+
+def url_patterns(patterns, prefix=''):
+    """Yield (route, pattern) for every named URL, skipping the admin site"""
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            if getattr(pattern, 'app_name', None) != 'admin':
+                yield from url_patterns(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield route, pattern
+
+
+def percentile(timings, fraction):
+    return timings[max(int(len(timings) * fraction + 0.5) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every named URL of the site with the test client and report p50/p95 '
+        'latency and query counts as JSON, for comparing runs across commits'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--staff', help='Username to request pages as (default: first superuser)')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+        parser.add_argument('--only', nargs='*', help='Limit the run to these URL names')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        staff = User.objects.filter(is_superuser=True, is_active=True)
+        if options['staff']:
+            staff = User.objects.filter(username=options['staff'])
+        staff = staff.order_by('id').first()
+        if staff is None:
+            raise CommandError('No staff user; run seed_benchmark_data first.')
+        samples = self.sample_ids()
+
+        # Broken pages are reported with their 500 status instead of stopping the run
+        clients = {role: Client(raise_request_exception=False) for role in ('staff', 'anonymous')}
+        clients['staff'].force_login(staff)
+
+        results = {}
+        seen = set()
+        for route, pattern in url_patterns(get_resolver().url_patterns):
+            name = pattern.name
+            if name in SKIP or name in seen or (options['only'] and name not in options['only']):
+                continue
+            seen.add(name)
+            kwargs = self.url_kwargs(name, pattern, samples)
+            query = {param: samples[key] for param, key in QUERY_SAMPLES.get(name, {}).items()}
+            if kwargs is None or not all(query.values()):
+                self.stderr.write(f'Skipping {name}: no sample row')
+                continue
+            url = reverse(name, kwargs=kwargs)
+            if query:
+                url += '?' + urlencode(query)
+            roles = ['staff', 'anonymous'] if name.startswith('public-') else ['staff']
+            for role in roles:
+                label = name if role == 'staff' else f'{name} (anonymous)'
+                results[label] = self.measure(clients[role], url, options['iterations'], options['warmup'])
+                self.stderr.write(
+                    f'{label:40} {results[label]["status"]} p50 {results[label]["p50_ms"]:8.2f} ms  '
+                    f'p95 {results[label]["p95_ms"]:8.2f} ms  {results[label]["queries"]:3} queries'
+                )
+
+        report = json.dumps({
+            'commit': self.commit(),
+            'timestamp': timezone.now().isoformat(),
+            'iterations': options['iterations'],
+            'rows': {
+                model.__name__: model.objects.count()
+                for model in (User, Event, EventMember, EventComment, AdminMessage)
+            },
+            'results': results,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report + '\n')
+        else:
+            self.stdout.write(report)
+
+    def sample_ids(self):
+        event = Event.objects.filter(status='active').order_by('-registered_count', 'id').first()
+        root = EventComment.objects.filter(parent__isnull=True, thread_replies__isnull=False).first()
+        member = User.objects.filter(pk=EventMember.objects.values('user_id')[:1]).first()
+        return {
+            Event: event and event.pk,
+            EventCategory: EventCategory.objects.values_list('pk', flat=True).first(),
+            EventMember: EventMember.objects.values_list('pk', flat=True).first(),
+            EventUserWishList: EventUserWishList.objects.values_list('pk', flat=True).first(),
+            AdminMessage: AdminMessage.objects.values_list('pk', flat=True).first(),
+            EventComment: root and root.pk,
+            # A full page of the batch API
+            'event_ids': ','.join(str(pk) for pk in Event.objects.filter(status='active').order_by('id')
+                                  .values_list('pk', flat=True)[:20]),
+            'feed_token': member and calendar.feed_token(member),
+        }
+
+    @staticmethod
+    def url_kwargs(name, pattern, samples):
+        kwargs = dict(EXTRA_KWARGS.get(name, {}))
+        view_model = getattr(getattr(pattern.callback, 'view_class', None), 'model', None)
+        for param in pattern.pattern.converters:
+            if param in kwargs:
+                continue
+            model = PK_MODELS.get(name, view_model) if param == 'pk' else ID_MODELS.get(param)
+            kwargs[param] = samples.get(model)
+            if kwargs[param] is None:
+                return None
+        return kwargs
+
+    @staticmethod
+    def measure(client, url, iterations, warmup):
+        timings = []
+        queries = []
+        status = None
+        for i in range(warmup + iterations):
+            with QueryCounter() as counter:
+                started = time.perf_counter()
+                response = client.get(url)
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+                elapsed = (time.perf_counter() - started) * 1000
+            status = response.status_code
+            if i >= warmup:
+                timings.append(elapsed)
+                queries.append(counter.count)
+        timings.sort()
+        return {
+            'url': url,
+            'status': status,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'queries': max(queries),
+        }
+
+    @staticmethod
+    def commit():
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
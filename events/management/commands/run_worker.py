@@ -0,0 +1,79 @@
+import multiprocessing
+import signal
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+# Seconds between housekeeping passes (stale locks, old finished tasks)
+HOUSEKEEPING_INTERVAL = 60
+
+# Workers start from a fresh interpreter on every platform, rather than a
+# fork of the parent with its connections and threads (Linux's default)
+START_METHOD = 'spawn'
+
+
+def work(sleep, batch, burst):
+    """Claim and run tasks until stopped, or until the queue is empty with burst"""
+    # Started with spawn, the child has no apps loaded until setup()
+    django.setup()
+    from events import tasks
+
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *args: stopping.append(True))
+    signal.signal(signal.SIGINT, lambda *args: stopping.append(True))
+    worker = tasks.worker_id()
+    tasks.logger.info('Worker %s started', worker)
+    housekeeping = None
+    while not stopping:
+        if housekeeping is None or time.monotonic() - housekeeping > HOUSEKEEPING_INTERVAL:
+            tasks.release_stale()
+            tasks.purge_finished()
+            housekeeping = time.monotonic()
+        claimed = tasks.claim(worker, batch)
+        for task in claimed:
+            # A claimed batch is finished even when asked to stop
+            tasks.run(task)
+        if not claimed:
+            if burst:
+                break
+            time.sleep(sleep)
+    connections.close_all()
+    tasks.logger.info('Worker %s stopped', worker)
+
+
+class Command(BaseCommand):
+    help = (
+        'Run background tasks from the database queue. Stop with SIGTERM or Ctrl-C; '
+        'each worker finishes the tasks it has claimed first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes to run')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--batch', type=int, default=1, help='Tasks claimed at a time')
+        parser.add_argument('--burst', action='store_true', help='Exit once no task is due')
+
+    def handle(self, *args, **options):
+        args = (options['sleep'], options['batch'], options['burst'])
+        if options['processes'] <= 1:
+            work(*args)
+            return
+
+        # Children must open their own database connections
+        connections.close_all()
+        context = multiprocessing.get_context(START_METHOD)
+        workers = [context.Process(target=work, args=args) for _ in range(options['processes'])]
+        for worker in workers:
+            worker.start()
+
+        def stop(signum, frame):
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for worker in workers:
+            worker.join()
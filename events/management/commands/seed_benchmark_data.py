@@ -0,0 +1,292 @@
+import datetime
+import random
+import time
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from events import cache as event_cache, search
+from events.models import (
+    AdminMessage, CoinTransaction, DashboardStats, Event, EventCategory, EventComment, EventMember,
+    LeaderboardBucket, REGISTERED_ATTEND_STATUSES, UserCoin,
+)
+
+PREFIX = 'bench'
+WORDS = (
+    'annual summit workshop meetup launch gala training hackathon seminar forum expo '
+    'community cloud data design health music career science startup city open youth'
+).split()
+# Registration mix; the registered statuses hold seats. Past events are seeded
+# as closed out, so their registrations are completed or absent instead.
+UPCOMING_ATTEND_STATUSES = ('waiting', 'attending', 'attending')
+PAST_ATTEND_STATUSES = ('completed', 'completed', 'absent')
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate reproducible synthetic data for benchmarks with bulk_create: users, '
+        'categories, events, registrations, threaded comments, admin messages and coins. '
+        'Seed an empty database for results that compare across runs; seeding again appends.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--events', type=int, default=2000)
+        parser.add_argument('--members-per-event', type=int, default=50, help='Average registrations per event')
+        parser.add_argument('--comments-per-event', type=int, default=10, help='Average top-level comments per event')
+        parser.add_argument('--replies-per-comment', type=int, default=2, help='Average replies in each thread')
+        parser.add_argument('--messages', type=int, default=5000)
+        parser.add_argument('--coins', type=int, default=5000, help='Users given an opening coin balance, at most one per user; completed registrations add their event points')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        started = time.perf_counter()
+        with transaction.atomic():
+            staff = self.seed_staff()
+            user_ids = self.seed_users(options['users'])
+            category_ids = self.seed_categories(options['categories'])
+            event_ids = self.seed_events(options, category_ids, staff)
+            credits = self.seed_members(event_ids, user_ids, staff, options['members_per_event'])
+            self.seed_comments(event_ids, user_ids, options['comments_per_event'], options['replies_per_comment'])
+            self.seed_messages(user_ids, staff, options['messages'])
+            self.seed_coins(user_ids, staff, options['coins'], credits)
+
+            # bulk_create skips save() and signals, so rebuild what they maintain
+            self.sync_event_counters()
+            DashboardStats.rebuild()
+            LeaderboardBucket.rebuild()
+            if search.fts_available(connection):
+                search.rebuild_index(using=connection)
+            # Nor do the cached pages know about the new rows
+            transaction.on_commit(lambda: event_cache.expire_events(event_ids))
+        self.stdout.write(self.style.SUCCESS(f'Seeded benchmark data in {time.perf_counter() - started:.1f}s'))
+
+    def bulk(self, model, objects):
+        """bulk_create objects in batches; returns the created instances' ids"""
+        ids = []
+        count = 0
+        started = time.perf_counter()
+        for batch in batches(objects, self.batch_size):
+            created = model.objects.bulk_create(batch, batch_size=self.batch_size)
+            ids.extend(obj.pk for obj in created)
+            count += len(batch)
+        self.stdout.write(f'{model.__name__:>12}: {count} rows in {time.perf_counter() - started:.1f}s')
+        return ids
+
+    def insert_rows(self, model, fields, rows):
+        """INSERT value tuples with executemany.
+
+        Used for registrations, by far the largest table: it skips building and
+        compiling a model instance per row, which is most of bulk_create's cost.
+        """
+        qn = connection.ops.quote_name
+        sql = 'INSERT INTO %s (%s) VALUES (%s)' % (
+            qn(model._meta.db_table),
+            ', '.join(qn(model._meta.get_field(field).column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        count = 0
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            for batch in batches(rows, self.batch_size):
+                cursor.executemany(sql, batch)
+                count += len(batch)
+        self.stdout.write(f'{model.__name__:>12}: {count} rows in {time.perf_counter() - started:.1f}s')
+
+    def seed_staff(self):
+        staff, _ = User.objects.get_or_create(
+            username=f'{PREFIX}_staff',
+            defaults={'is_staff': True, 'is_superuser': True, 'password': make_password(PREFIX)},
+        )
+        return staff
+
+    def seed_users(self, count):
+        start = User.objects.filter(username__startswith=f'{PREFIX}_user_').count()
+        password = make_password(None)
+        return self.bulk(User, (
+            User(username=f'{PREFIX}_user_{i}', email=f'{PREFIX}_user_{i}@example.com', password=password)
+            for i in range(start, start + count)
+        ))
+
+    def seed_categories(self, count):
+        start = EventCategory.objects.filter(name__startswith=f'{PREFIX} ').count()
+        return self.bulk(EventCategory, (
+            EventCategory(name=f'{PREFIX} category {i}', code=f'B{i:05d}', priority=100000 + i)
+            for i in range(start, start + count)
+        ))
+
+    def seed_events(self, options, category_ids, staff):
+        rng = self.rng
+        today = timezone.localdate()
+        start = Event.objects.filter(name__startswith=f'{PREFIX} ').count()
+
+        def event(i):
+            start_date = today + datetime.timedelta(days=rng.randint(-365, 365))
+            capacity = rng.randint(options['members_per_event'], options['members_per_event'] * 3) or 10
+            return Event(
+                category_id=rng.choice(category_ids),
+                name=f'{PREFIX} {" ".join(rng.sample(WORDS, 3))} {i}',
+                description=' '.join(rng.choices(WORDS, k=60)),
+                scheduled_status=rng.choice(('yet to scheduled', 'scheduled')),
+                venue=f'{rng.choice(WORDS).title()} Hall',
+                location=f'{rng.choice(WORDS).title()} City',
+                start_date=start_date,
+                end_date=start_date + datetime.timedelta(days=rng.randint(0, 3)),
+                points=rng.randint(1, 50),
+                maximum_attende=capacity,
+                created_user=staff,
+                updated_user=staff,
+                status='completed' if start_date < today else 'active',
+            )
+
+        return self.bulk(Event, (event(i) for i in range(start, start + options['events'])))
+
+    def seed_members(self, event_ids, user_ids, staff, average):
+        """Insert registrations; returns the (user_id, event_id, points) credited to completed ones"""
+        rng = self.rng
+        events = {
+            pk: (capacity, points, start_date < timezone.localdate())
+            for pk, capacity, points, start_date in Event.objects.filter(name__startswith=f'{PREFIX} ').values_list(
+                'id', 'maximum_attende', 'points', 'start_date',
+            )
+        }
+        credits = []
+
+        today = connection.ops.adapt_datefield_value(timezone.localdate())
+        fields = (
+            'event', 'user', 'attend_status', 'points_awarded', 'status',
+            'created_user', 'updated_user', 'created_date', 'updated_date',
+        )
+
+        def members():
+            for event_id in event_ids:
+                capacity, points, started = events[event_id]
+                statuses = PAST_ATTEND_STATUSES if started else UPCOMING_ATTEND_STATUSES
+                count = min(rng.randint(0, average * 2), capacity, len(user_ids))
+                for user_id in rng.sample(user_ids, count):
+                    attend_status = rng.choice(statuses)
+                    # Completed registrations were closed out, so their points are in the ledger
+                    completed = attend_status == 'completed'
+                    if completed:
+                        credits.append((user_id, event_id, points))
+                    yield (
+                        event_id, user_id, attend_status, completed, 'active',
+                        staff.pk, staff.pk, today, today,
+                    )
+
+        self.insert_rows(EventMember, fields, members())
+        return credits
+
+    def seed_comments(self, event_ids, user_ids, per_event, replies_per_comment):
+        rng = self.rng
+
+        def comment(event_id, parent=None):
+            # parent is (id, event_id, root_id, depth)
+            return EventComment(
+                event_id=event_id,
+                user_id=rng.choice(user_ids),
+                comment=' '.join(rng.choices(WORDS, k=rng.randint(5, 40))).capitalize(),
+                parent_id=parent[0] if parent else None,
+                root_id=(parent[2] or parent[0]) if parent else None,
+                depth=parent[3] + 1 if parent else 0,
+                status='active' if rng.random() > 0.05 else 'hidden',
+            )
+
+        roots = [comment(event_id) for event_id in event_ids for _ in range(rng.randint(0, per_event * 2))]
+        ids = self.bulk(EventComment, roots)
+        parents = [(pk, c.event_id, None, 0) for pk, c in zip(ids, roots)]
+
+        # Replies go in level by level, as each level needs its parents' ids:
+        # half answer a top-level comment, a quarter each the two levels below
+        remaining = len(roots) * replies_per_comment
+        for depth in (1, 2, 3):
+            if not parents:
+                break
+            count = remaining if depth == 3 else remaining // 2
+            level = [comment(parent[1], parent) for parent in (rng.choice(parents) for _ in range(count))]
+            ids = self.bulk(EventComment, level)
+            parents = [(pk, c.event_id, c.root_id, depth) for pk, c in zip(ids, level)]
+            remaining -= count
+
+    def seed_messages(self, user_ids, staff, count):
+        rng = self.rng
+        statuses = [status for status, _ in AdminMessage.STATUS_CHOICES]
+        self.bulk(AdminMessage, (
+            AdminMessage(
+                sender_id=rng.choice(user_ids),
+                sender_email='sender@example.com',
+                subject=' '.join(rng.sample(WORDS, 4)).capitalize(),
+                message=' '.join(rng.choices(WORDS, k=50)),
+                status=rng.choice(statuses),
+                is_read=rng.random() < 0.5,
+            )
+            for _ in range(count)
+        ))
+
+    def seed_coins(self, user_ids, staff, count, credits):
+        """Write the coin ledger and the UserCoin balances it adds up to.
+
+        count users get an opening balance, then every completed registration
+        is credited its event's points, as close-out would have done.
+        """
+        rng = self.rng
+        balances = {}
+        transactions = []
+
+        def record(user_id, delta, gain_type, event_id=None, note=''):
+            balances[user_id] = balances.get(user_id, 0) + delta
+            transactions.append(CoinTransaction(
+                user_id=user_id, delta=delta, balance=balances[user_id], gain_type=gain_type,
+                event_id=event_id, note=note, created_user=staff,
+            ))
+
+        for user_id in rng.sample(user_ids, min(count, len(user_ids))):
+            record(user_id, rng.randint(1, 500), 'others', note='Opening balance')
+        credited = set()
+        for user_id, event_id, points in credits:
+            credited.add(user_id)
+            record(user_id, points, 'event', event_id)
+
+        self.bulk(CoinTransaction, transactions)
+        self.bulk(UserCoin, (
+            UserCoin(
+                user_id=user_id,
+                gain_type='event' if user_id in credited else 'others',
+                gain_coin=balance,
+                status='active',
+                created_user=staff,
+                updated_user=staff,
+            )
+            for user_id, balance in balances.items()
+        ))
+
+    def sync_event_counters(self):
+        """Set the denormalized Event counters that save() would have kept, in one UPDATE"""
+        def count(queryset):
+            return Coalesce(Subquery(queryset.order_by().values('event').annotate(c=Count('id')).values('c')), 0)
+
+        members = EventMember.objects.filter(event=OuterRef('pk'))
+        Event.objects.filter(name__startswith=f'{PREFIX} ').update(
+            registered_count=count(members.filter(attend_status__in=REGISTERED_ATTEND_STATUSES)),
+            waiting_count=count(members.filter(attend_status='waiting')),
+            comment_count=count(EventComment.objects.filter(event=OuterRef('pk'), status='active')),
+        )
@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from . import cache as event_cache
+from .profiling import QueryBudgetExceeded, QueryCounter, query_budget, record_view
+
+logger = logging.getLogger('events.performance')
+
+PAGE_KEY_PREFIX = 'public-page'
+
+
+class AnonymousPageCacheMiddleware:
+    """Serve whole public event pages to anonymous visitors from the cache.
+
+    Only GET/HEAD requests for the URL names in ANONYMOUS_PAGE_CACHE_URLS
+    that carry neither a session nor a messages cookie are eligible: such a
+    visitor is anonymous and has no flash messages, so the page is the same
+    for all of them and can be answered before sessions and auth are loaded.
+    Everyone else gets the normal per-user render, marked private. So do
+    INTERNAL_IPS with DEBUG on: their pages carry the debug panel, which must
+    neither be stored for nor served from the shared copy.
+
+    Cached pages are keyed on the public page version (see cache.py), which
+    event changes replace, and carry an ETag and Last-Modified so browsers
+    and proxies can revalidate with a 304. Put this directly after
+    SecurityMiddleware.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.url_names = set(getattr(settings, 'ANONYMOUS_PAGE_CACHE_URLS', ()))
+        self.timeout = getattr(settings, 'ANONYMOUS_PAGE_CACHE_TIMEOUT', 600)
+        self.max_age = getattr(settings, 'ANONYMOUS_PAGE_MAX_AGE', 0)
+
+    def __call__(self, request):
+        if not self.is_cacheable(request):
+            response = self.get_response(request)
+            if self.is_cache_url(request):
+                patch_vary_headers(response, ('Cookie',))
+                patch_cache_control(response, private=True)
+            return response
+
+        version = event_cache.page_version()
+        key = self.page_key(request, version)
+        cache = event_cache.fragment_cache()
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type, etag = cached
+            response = HttpResponse(content, content_type=content_type)
+            response['ETag'] = etag
+            response['X-Page-Cache'] = 'hit'
+        else:
+            response = self.get_response(request)
+            if response.status_code != 200 or response.streaming or response.cookies:
+                return response
+            response['ETag'] = '"%s"' % hashlib.md5(response.content).hexdigest()
+            response['X-Page-Cache'] = 'miss'
+            cache.set(key, (response.content, response['Content-Type'], response['ETag']), self.timeout)
+
+        response['Last-Modified'] = http_date(version)
+        patch_vary_headers(response, ('Cookie',))
+        patch_cache_control(response, public=True, max_age=self.max_age, must_revalidate=True)
+        return get_conditional_response(
+            request, etag=response['ETag'], last_modified=int(version), response=response,
+        )
+
+    def is_cache_url(self, request):
+        try:
+            return resolve(request.path_info).url_name in self.url_names
+        except Resolver404:
+            return False
+
+    def is_cacheable(self, request):
+        return (
+            request.method in ('GET', 'HEAD')
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+            and 'messages' not in request.COOKIES
+            and not self.is_debug(request)
+            and self.is_cache_url(request)
+        )
+
+    @staticmethod
+    def is_debug(request):
+        # The same test as the debug context processor that shows the panel
+        return settings.DEBUG and request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS
+
+    @staticmethod
+    def page_key(request, version):
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return '%s:%r:%s' % (PAGE_KEY_PREFIX, version, path)
+
+
+class QueryBudgetMiddleware:
+    """Record queries, SQL time, template time and wall time for every view.
+
+    Each request is logged to 'events.performance' at debug level and added
+    to profiling.view_stats. A view that runs more queries than its
+    QUERY_BUDGETS entry logs a warning, or raises QueryBudgetExceeded when
+    QUERY_BUDGET_RAISE is set (as in tests). Template time is measured for
+    TemplateResponse views; function views that call render() report it as
+    part of the view. With DEBUG on the numbers are also sent back in a
+    Server-Timing header. Put this first so the wall time covers the rest.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with QueryCounter() as counter:
+            response = self.get_response(request)
+        wall_ms = (time.perf_counter() - start) * 1000
+        sql_ms = counter.sql_time * 1000
+        template_ms = getattr(request, 'template_ms', None)
+        view_name = self.view_name(request)
+
+        record_view(view_name, counter.count, sql_ms, template_ms, wall_ms)
+        logger.debug(
+            '%s: %d queries, %.1fms SQL, %sms template, %.1fms total',
+            view_name, counter.count, sql_ms, '-' if template_ms is None else '%.1f' % template_ms, wall_ms,
+        )
+        if settings.DEBUG:
+            timings = ['db;dur=%.1f' % sql_ms, 'total;dur=%.1f' % wall_ms]
+            if template_ms is not None:
+                timings.insert(1, 'tpl;dur=%.1f' % template_ms)
+            response['Server-Timing'] = ', '.join(timings)
+
+        budget = query_budget(view_name)
+        if budget is not None and counter.count > budget:
+            message = '%s ran %d queries, budget is %d' % (view_name, counter.count, budget)
+            if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+    def process_template_response(self, request, response):
+        # Runs right before the handler renders; the callback runs right after
+        started = time.perf_counter()
+
+        def finished(rendered):
+            request.template_ms = (time.perf_counter() - started) * 1000
+
+        response.add_post_render_callback(finished)
+        return response
+
+    @staticmethod
+    def view_name(request):
+        if request.resolver_match is not None:
+            return request.resolver_match.view_name
+        try:
+            return resolve(request.path_info).view_name
+        except Resolver404:
+            return request.path_info
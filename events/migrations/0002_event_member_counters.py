@@ -0,0 +1,40 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:14
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    EventMember = apps.get_model('events', 'EventMember')
+
+    def member_count(**filters):
+        counts = EventMember.objects.filter(event=OuterRef('pk'), **filters).order_by().values('event')
+        return Coalesce(Subquery(counts.annotate(c=Count('id')).values('c')), 0)
+
+    Event.objects.update(
+        registered_count=member_count(attend_status__in=['waiting', 'attending']),
+        waiting_count=member_count(attend_status='waiting'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='registered_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='waiting_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_event_member_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='waitlist_sequence',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='eventmember',
+            name='waitlist_position',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='eventmember',
+            name='attend_status',
+            field=models.CharField(choices=[('waiting', 'Waiting'), ('attending', 'Attending'), ('completed', 'Completed'), ('absent', 'Absent'), ('cancelled', 'Cancelled'), ('waitlisted', 'Waitlisted')], max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='eventmember',
+            index=models.Index(fields=['event', 'attend_status', 'waitlist_position'], name='eventmember_waitlist_idx'),
+        ),
+    ]
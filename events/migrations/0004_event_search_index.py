@@ -0,0 +1,31 @@
+from django.db import OperationalError, migrations
+
+from events import search
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    try:
+        search.create_index(using=connection)
+    except OperationalError:
+        # SQLite built without FTS5: search falls back to icontains
+        return
+    search.rebuild_index(using=connection)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        search.drop_index(using=schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_eventmember_waitlist'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
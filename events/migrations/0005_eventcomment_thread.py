@@ -0,0 +1,42 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_threads(apps, schema_editor):
+    EventComment = apps.get_model('events', 'EventComment')
+    # Parents always have lower ids than their replies
+    threads = {}
+    changed = []
+    for comment in EventComment.objects.order_by('id').only('id', 'parent_id').iterator():
+        if comment.parent_id is None:
+            threads[comment.id] = (None, 0)
+            continue
+        parent_root, parent_depth = threads.get(comment.parent_id, (None, 0))
+        comment.root_id = parent_root or comment.parent_id
+        comment.depth = parent_depth + 1
+        threads[comment.id] = (comment.root_id, comment.depth)
+        changed.append(comment)
+    EventComment.objects.bulk_update(changed, ['root', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_event_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventcomment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='eventcomment',
+            name='root',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread_replies', to='events.eventcomment'),
+        ),
+        migrations.RunPython(backfill_threads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:25
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_count(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    EventComment = apps.get_model('events', 'EventComment')
+    counts = EventComment.objects.filter(event=OuterRef('pk'), status='active').order_by().values('event')
+    Event.objects.update(
+        comment_count=Coalesce(Subquery(counts.annotate(c=Count('id')).values('c')), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_eventcomment_thread'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_comment_count, migrations.RunPython.noop),
+    ]
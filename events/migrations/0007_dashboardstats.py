@@ -0,0 +1,43 @@
+# Generated by Django 4.2.16 on 2026-10-18 06:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_snapshot(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    EventCategory = apps.get_model('events', 'EventCategory')
+    Event = apps.get_model('events', 'Event')
+    DashboardStats = apps.get_model('events', 'DashboardStats')
+    DashboardStats.objects.create(
+        pk=1,
+        user_count=User.objects.count(),
+        category_count=EventCategory.objects.count(),
+        event_count=Event.objects.count(),
+        completed_event_count=Event.objects.filter(status='completed').count(),
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('events', '0006_event_comment_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_count', models.PositiveIntegerField(default=0)),
+                ('category_count', models.PositiveIntegerField(default=0)),
+                ('event_count', models.PositiveIntegerField(default=0)),
+                ('completed_event_count', models.PositiveIntegerField(default=0)),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'dashboard stats',
+            },
+        ),
+        migrations.RunPython(build_snapshot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.16 on 2026-10-18 09:10
+
+from django.db import migrations, models
+
+
+def mark_completed_awarded(apps, schema_editor):
+    # Points for members completed before close-out existed were awarded by
+    # hand, so a later close-out must not credit them again
+    EventMember = apps.get_model('events', 'EventMember')
+    EventMember.objects.filter(attend_status='completed').update(points_awarded=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_dashboardstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eventmember',
+            name='points_awarded',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_completed_awarded, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 4.2.16 on 2026-10-18 09:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def backfill_ledger(apps, schema_editor):
+    # Each existing balance becomes the user's opening ledger row, and the
+    # leaderboard buckets are counted from the same rows
+    UserCoin = apps.get_model('events', 'UserCoin')
+    CoinTransaction = apps.get_model('events', 'CoinTransaction')
+    LeaderboardBucket = apps.get_model('events', 'LeaderboardBucket')
+    CoinTransaction.objects.bulk_create(
+        (
+            CoinTransaction(
+                user_id=coin.user_id,
+                delta=coin.gain_coin,
+                balance=coin.gain_coin,
+                gain_type=coin.gain_type,
+                note='Opening balance',
+                created_user_id=coin.created_user_id,
+            )
+            for coin in UserCoin.objects.order_by('pk').iterator(chunk_size=2000)
+        ),
+        batch_size=500,
+    )
+    LeaderboardBucket.objects.bulk_create(
+        [
+            LeaderboardBucket(balance=balance, user_count=users)
+            for balance, users in UserCoin.objects.values('gain_coin').annotate(
+                users=Count('id')
+            ).order_by().values_list('gain_coin', 'users')
+        ],
+        batch_size=500,
+    )
+
+
+def clear_ledger(apps, schema_editor):
+    apps.get_model('events', 'CoinTransaction').objects.all().delete()
+    apps.get_model('events', 'LeaderboardBucket').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('events', '0008_eventmember_points_awarded'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoinTransaction',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField()),
+                ('balance', models.PositiveIntegerField()),
+                ('gain_type', models.CharField(choices=[('event', 'Event'), ('others', 'Others')], max_length=6)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LeaderboardBucket',
+            fields=[
+                ('balance', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('user_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='usercoin',
+            index=models.Index(fields=['-gain_coin', 'user'], name='usercoin_leaderboard_idx'),
+        ),
+        migrations.AddField(
+            model_name='cointransaction',
+            name='created_user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cointransaction_created_user', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='cointransaction',
+            name='event',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='events.event'),
+        ),
+        migrations.AddField(
+            model_name='cointransaction',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='coin_transactions', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='cointransaction',
+            index=models.Index(fields=['user', 'created_at'], name='cointransaction_user_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='cointransaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('gain_type', 'event')), fields=('user', 'event'), name='cointransaction_event_once'),
+        ),
+        migrations.RunPython(backfill_ledger, clear_ledger),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0011_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventLifecycleRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField()),
+                ('timed_out', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('waitlist_cancelled', models.PositiveIntegerField(default=0)),
+                ('marked_absent', models.PositiveIntegerField(default=0)),
+                ('members_closed', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['end_date'], name='event_active_end_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.16 on 2026-10-18 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0012_event_lifecycle'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='event',
+            name='event_active_end_idx',
+        ),
+        migrations.AddIndex(
+            model_name='adminmessage',
+            index=models.Index(fields=['sender', '-created_date'], name='adminmessage_sender_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['status', 'end_date', 'id'], name='event_status_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['status', '-start_date', '-id'], name='event_status_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventcomment',
+            index=models.Index(condition=models.Q(('parent__isnull', True), ('status', 'active')), fields=['event', '-id'], name='eventcomment_top_level_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventmember',
+            index=models.Index(fields=['user', 'status'], name='eventmember_user_status_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-18 12:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+import events.search
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0013_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSearchEntry',
+            fields=[
+                ('event', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='events.event')),
+                ('document', events.search.FTSDocumentField(db_column='events_event_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'events_event_fts',
+                'managed': False,
+            },
+        ),
+    ]
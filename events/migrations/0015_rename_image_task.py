@@ -0,0 +1,21 @@
+# Generated by Django 4.2.16 on 2026-10-18 12:30
+
+from django.db import migrations
+
+
+def rename_image_tasks(apps, schema_editor):
+    # normalize_event_image became process_event_image, with the same
+    # image_id argument; rows queued under the old name have no handler
+    Task = apps.get_model('events', 'Task')
+    Task.objects.filter(name='events.images.normalize_event_image').update(name='events.images.process_event_image')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0014_event_search_entry'),
+    ]
+
+    operations = [
+        migrations.RunPython(rename_image_tasks, migrations.RunPython.noop),
+    ]
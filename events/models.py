@@ -1,12 +1,43 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import BooleanField, Case, Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Greatest
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth.models import User
 
+from .search import FTS_TABLE, FTSDocumentField, search_queryset
+
+
+# Attend statuses that hold a seat and count towards maximum_attende
+REGISTERED_ATTEND_STATUSES = ('waiting', 'attending')
+# Moving a registration to one of these gives its seat back to the waitlist;
+# marking attendance (completed, absent) does not, as the event has happened
+SEAT_RELEASING_STATUSES = ('cancelled', 'waitlisted')
+
+# Outcomes of Event.register_member()
+JOIN_REGISTERED = 'registered'
+JOIN_WAITLISTED = 'waitlisted'
+# The event is no longer open for registration (cancelled, completed, ...)
+JOIN_CLOSED = 'closed'
+JOIN_ALREADY_REGISTERED = 'already registered'
+
+
+def member_counter_updates(attend_status, delta):
+    """Return the Event.update() kwargs that move the counters attend_status contributes to"""
+    updates = {}
+    if attend_status in REGISTERED_ATTEND_STATUSES:
+        updates['registered_count'] = Greatest(F('registered_count') + delta, 0)
+    if attend_status == 'waiting':
+        updates['waiting_count'] = Greatest(F('waiting_count') + delta, 0)
+    return updates
+
 
 class EventCategory(models.Model):
     name = models.CharField(max_length=255, unique=True)
     code = models.CharField(max_length=6, unique=True)
     image = models.ImageField(upload_to='event_category/', blank=True, null=True)
+    # Resized copies of image, written by images.process_category_image
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     priority = models.IntegerField(unique=True)
     created_user = models.ForeignKey('auth.User', on_delete=models.CASCADE, related_name='created_user', blank=True, null=True)
     updated_user = models.ForeignKey('auth.User', on_delete=models.CASCADE, related_name='updated_user', blank=True, null=True)
@@ -33,6 +64,39 @@ class JobCategory(models.Model):
     def __str__(self):
         return self.name
 
+class EventQuerySet(models.QuerySet):
+    def search(self, query):
+        """Full-text search over name, description, venue and location, best match first"""
+        return search_queryset(self, query)
+
+    def with_capacity(self, live=False):
+        """Annotate registrations, available slots and a full flag in the same query.
+
+        By default the stored registered_count is used; live=True recounts the
+        waiting/attending EventMember rows with a conditional Count instead.
+        """
+        if live:
+            registered = Count(
+                'eventmember',
+                filter=Q(eventmember__attend_status__in=REGISTERED_ATTEND_STATUSES),
+            )
+        else:
+            registered = F('registered_count')
+        return self.annotate(capacity_registered=registered).annotate(
+            capacity_available=Case(
+                When(maximum_attende=0, then=Value(None)),
+                default=F('maximum_attende') - F('capacity_registered'),
+                output_field=IntegerField(),
+            ),
+            capacity_full=Case(
+                When(maximum_attende=0, then=Value(False)),
+                When(capacity_registered__gte=F('maximum_attende'), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            ),
+        )
+
+
 class Event(models.Model):
     category = models.ForeignKey(EventCategory, on_delete=models.CASCADE)
     name = models.CharField(max_length=255, unique=True)
@@ -63,24 +127,138 @@ class Event(models.Model):
         ('cancel', 'Cancel'),
     )
     status = models.CharField(choices=status_choice, max_length=10, default='active')
+    # Denormalized EventMember counters, kept in sync by EventMember.save() and
+    # the post_delete signal. Rebuild with `manage.py rebuild_event_counters`.
+    registered_count = models.PositiveIntegerField(default=0, editable=False)
+    waiting_count = models.PositiveIntegerField(default=0, editable=False)
+    # Last waitlist position handed out; only ever increases
+    waitlist_sequence = models.PositiveIntegerField(default=0, editable=False)
+    # Active EventComment rows, kept in sync by EventComment.save() and post_delete
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = EventQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # advance_event_lifecycle looks for active events past their end date
+            models.Index(fields=['status', 'end_date', 'id'], name='event_status_end_idx'),
+            # Public list and search: active events newest first, read in index order
+            models.Index(fields=['status', '-start_date', '-id'], name='event_status_start_idx'),
+        ]
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        """Save the event and keep the dashboard totals in step in the same transaction"""
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic():
+            previous = None
+            if self.pk and (update_fields is None or 'status' in update_fields):
+                previous = Event.objects.filter(pk=self.pk).values_list('status', flat=True).first()
+            adding = self._state.adding
+            super().save(*args, **kwargs)
+            if adding:
+                DashboardStats.adjust(event_count=1, completed_event_count=int(self.status == 'completed'))
+            elif previous and previous != self.status and 'completed' in (previous, self.status):
+                DashboardStats.adjust(completed_event_count=1 if self.status == 'completed' else -1)
     
     def get_registration_count(self):
         """Return the count of users who are registered (waiting or attending) for this event"""
-        return self.eventmember_set.filter(
-            attend_status__in=['waiting', 'attending']
-        ).count()
+        if hasattr(self, 'capacity_registered'):
+            return self.capacity_registered
+        return self.registered_count
+
+    @staticmethod
+    def adjust_member_counters(event_id, attend_status, delta):
+        """Atomically add delta to the counters that attend_status contributes to"""
+        updates = member_counter_updates(attend_status, delta)
+        if updates:
+            Event.objects.filter(pk=event_id).update(**updates)
+
+    @staticmethod
+    def claim_seat(event_id, attend_status, **filters):
+        """Take a seat for a registration in attend_status if one is free; returns True if taken.
+
+        One conditional UPDATE on registered_count re-checks capacity under the
+        row (on SQLite, database) write lock, so concurrent claims cannot both
+        get the last seat. filters further restrict the event, e.g. status='active'.
+        """
+        return bool(Event.objects.filter(pk=event_id, **filters).filter(
+            Q(maximum_attende=0) | Q(registered_count__lt=F('maximum_attende'))
+        ).update(**member_counter_updates(attend_status, 1)))
+
+    @staticmethod
+    def next_waitlist_position(event_id):
+        """Hand out the next waitlist position for the event; call inside a transaction"""
+        Event.objects.filter(pk=event_id).update(waitlist_sequence=F('waitlist_sequence') + 1)
+        return Event.objects.values_list('waitlist_sequence', flat=True).get(pk=event_id)
+
+    @staticmethod
+    def promote_waitlist(event_id):
+        """Move the head of the waitlist into a free seat; call inside a transaction.
+
+        The head is found through the (event, attend_status, waitlist_position)
+        index, so each freed seat costs one indexed lookup and two updates.
+        Returns the promoted member, or None if nobody was waiting or no seat
+        is free.
+        """
+        head = EventMember.objects.select_for_update().filter(
+            event_id=event_id, attend_status='waitlisted'
+        ).order_by('waitlist_position').first()
+        if head is None or not Event.claim_seat(event_id, 'waiting'):
+            return None
+        EventMember.objects.filter(pk=head.pk).update(attend_status='waiting', waitlist_position=None)
+        head.attend_status = 'waiting'
+        head.waitlist_position = None
+        return head
+
+    def register_member(self, user, attend_status='waiting'):
+        """Register user without overbooking and return one of the JOIN_* outcomes.
+
+        The seat is claimed with Event.claim_seat(), so concurrent joins cannot
+        both see a free seat. If the event is full the user is appended to the
+        waitlist instead, unless the event is no longer active (JOIN_CLOSED).
+        The member row is inserted in the same transaction; a unique_together
+        clash rolls the claim back.
+        """
+        if EventMember.objects.filter(event=self, user=user).exists():
+            return JOIN_ALREADY_REGISTERED
+        member = EventMember(
+            event=self,
+            user=user,
+            attend_status=attend_status,
+            status='active',
+            created_user=user,
+            updated_user=user,
+        )
+        try:
+            with transaction.atomic():
+                if Event.claim_seat(self.pk, attend_status, status='active'):
+                    outcome = JOIN_REGISTERED
+                elif Event.objects.filter(pk=self.pk, status='active').exists():
+                    member.attend_status = 'waitlisted'
+                    member.waitlist_position = Event.next_waitlist_position(self.pk)
+                    outcome = JOIN_WAITLISTED
+                else:
+                    return JOIN_CLOSED
+                member.save(adjust_counters=False)
+        except IntegrityError:
+            return JOIN_ALREADY_REGISTERED
+        return outcome
 
     def get_available_slots(self):
         """Return the number of available slots remaining for this event"""
+        if hasattr(self, 'capacity_available'):
+            return self.capacity_available
         if self.maximum_attende:
             return self.maximum_attende - self.get_registration_count()
         return None
 
     def is_full(self):
         """Check if the event has reached maximum capacity"""
+        if hasattr(self, 'capacity_full'):
+            return self.capacity_full
         if self.maximum_attende:
             return self.get_registration_count() >= self.maximum_attende
         return False
@@ -98,6 +276,8 @@ class Event(models.Model):
 class EventImage(models.Model):
     event = models.OneToOneField(Event, on_delete=models.CASCADE)
     image = models.ImageField(upload_to='event_image/')
+    # Resized copies of image, written by images.process_event_image
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
 
 
 class EventAgenda(models.Model):
@@ -109,6 +289,20 @@ class EventAgenda(models.Model):
     venue_name = models.CharField(max_length=255)
 
 
+class EventSearchEntry(models.Model):
+    """Read-only mapping of the FTS5 search table, joined to Event by search.search_queryset()"""
+    event = models.OneToOneField(
+        Event, primary_key=True, db_column='rowid', on_delete=models.DO_NOTHING, related_name='search_entry',
+    )
+    document = FTSDocumentField(db_column=FTS_TABLE)
+    # bm25 with the weights set in search.create_index(); lower is better
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = FTS_TABLE
+
+
 class EventJobCategoryLinking(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE)
     job_category = models.ForeignKey(JobCategory, on_delete=models.CASCADE)
@@ -125,6 +319,17 @@ class EventJobCategoryLinking(models.Model):
         return str(self.event)
 
 
+class EventMemberQuerySet(models.QuerySet):
+    def with_waitlist_rank(self):
+        """Annotate waitlisted members with their current 1-based place in the queue"""
+        ahead = EventMember.objects.filter(
+            event=OuterRef('event'),
+            attend_status='waitlisted',
+            waitlist_position__lte=OuterRef('waitlist_position'),
+        ).order_by().values('event').annotate(rank=Count('id')).values('rank')
+        return self.annotate(waitlist_rank=Subquery(ahead, output_field=IntegerField()))
+
+
 class EventMember(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE)
     user = models.ForeignKey('auth.User', on_delete=models.CASCADE)
@@ -134,8 +339,13 @@ class EventMember(models.Model):
         ('completed', 'Completed'),
         ('absent', 'Absent'),
         ('cancelled', 'Cancelled'),
+        ('waitlisted', 'Waitlisted'),
     )
     attend_status = models.CharField(choices=attend_status_choice, max_length=10)
+    # Queue order while attend_status is 'waitlisted', cleared on promotion
+    waitlist_position = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    # Set once Event.points have been credited to the user for completing the event
+    points_awarded = models.BooleanField(default=False, editable=False)
     created_user = models.ForeignKey('auth.User', on_delete=models.CASCADE, related_name='eventmember_created_user')
     updated_user = models.ForeignKey('auth.User', on_delete=models.CASCADE, related_name='eventmember_updated_user')
     created_date = models.DateField(auto_now_add=True)
@@ -149,12 +359,59 @@ class EventMember(models.Model):
     )
     status = models.CharField(choices=status_choice, max_length=10)
 
+    objects = EventMemberQuerySet.as_manager()
 
     class Meta:
         unique_together = ['event', 'user']
+        indexes = [
+            # Also serves (event, attend_status) lookups such as the registration counts
+            models.Index(fields=['event', 'attend_status', 'waitlist_position'], name='eventmember_waitlist_idx'),
+            # A user's active registrations on the user dashboard
+            models.Index(fields=['user', 'status'], name='eventmember_user_status_idx'),
+        ]
 
     def __str__(self):
         return str(self.user)
+
+    def save(self, *args, adjust_counters=True, **kwargs):
+        """Save the member and move the event counters in the same transaction.
+
+        Taking a seat (a new registration, or a move into a registered status or
+        to another event) goes through Event.claim_seat() like a join does; if
+        the event is full the member is waitlisted instead. Freeing a seat
+        (cancelling, or moving the registration to another event) promotes the
+        head of that event's waitlist; marking attendance does not. Pass
+        adjust_counters=False when the caller has already moved the counters.
+        """
+        if self.attend_status != 'waitlisted':
+            self.waitlist_position = None
+        if not adjust_counters:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = EventMember.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('event_id', 'attend_status').first()
+            takes_seat = self.attend_status in REGISTERED_ATTEND_STATUSES and (
+                previous is None or previous[0] != self.event_id or previous[1] not in REGISTERED_ATTEND_STATUSES
+            )
+            claimed = takes_seat and Event.claim_seat(self.event_id, self.attend_status)
+            if takes_seat and not claimed:
+                self.attend_status = 'waitlisted'
+                self.waitlist_position = None
+            if self.attend_status == 'waitlisted' and self.waitlist_position is None:
+                self.waitlist_position = Event.next_waitlist_position(self.event_id)
+            super().save(*args, **kwargs)
+            if previous != (self.event_id, self.attend_status):
+                if previous:
+                    Event.adjust_member_counters(previous[0], previous[1], -1)
+                if not claimed:
+                    Event.adjust_member_counters(self.event_id, self.attend_status, 1)
+                if previous and previous[1] in REGISTERED_ATTEND_STATUSES and (
+                    previous[0] != self.event_id or self.attend_status in SEAT_RELEASING_STATUSES
+                ):
+                    Event.promote_waitlist(previous[0])
     
     def get_absolute_url(self):
         return reverse('join-event-list')
@@ -208,13 +465,221 @@ class UserCoin(models.Model):
     )
     status = models.CharField(choices=status_choice, max_length=10)
 
+    class Meta:
+        indexes = [
+            # Walked in order for the leaderboard's top N, so it never sorts the table
+            models.Index(fields=['-gain_coin', 'user'], name='usercoin_leaderboard_idx'),
+        ]
+
     def __str__(self):
         return str(self.user)
-    
+
+    def save(self, *args, **kwargs):
+        """Save the row; a balance changed by hand is booked in the ledger and the leaderboard"""
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = UserCoin.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('gain_coin', flat=True).first()
+            super().save(*args, **kwargs)
+            if previous != self.gain_coin:
+                CoinTransaction.objects.create(
+                    user_id=self.user_id,
+                    delta=self.gain_coin - (previous or 0),
+                    balance=self.gain_coin,
+                    gain_type=self.gain_type,
+                    note='Balance set by hand',
+                    created_user=self.updated_user,
+                )
+                changes = {self.gain_coin: 1}
+                if previous is not None:
+                    changes[previous] = -1
+                LeaderboardBucket.shift(changes)
+
     def get_absolute_url(self):
         return reverse('dashboard')
 
 
+class CoinTransaction(models.Model):
+    """Append-only coin ledger: one row per award or correction, never changed.
+
+    balance is the user's balance after the row, so history and balance over
+    time are plain reads. The current balance is denormalized onto
+    UserCoin.gain_coin, and both move together in CoinTransaction.award().
+    """
+    user = models.ForeignKey('auth.User', on_delete=models.CASCADE, related_name='coin_transactions')
+    delta = models.IntegerField()
+    balance = models.PositiveIntegerField()
+    event = models.ForeignKey(Event, on_delete=models.SET_NULL, blank=True, null=True)
+    gain_type = models.CharField(max_length=6, choices=UserCoin.CHOICE_GAIN_TYPE)
+    note = models.CharField(max_length=255, blank=True)
+    created_user = models.ForeignKey('auth.User', on_delete=models.SET_NULL, blank=True, null=True, related_name='cointransaction_created_user')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='cointransaction_user_idx'),
+        ]
+        constraints = [
+            # An event's points are credited to a user at most once
+            models.UniqueConstraint(
+                fields=['user', 'event'], condition=Q(gain_type='event'), name='cointransaction_event_once',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.delta:+d}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Coin transactions are append-only; record a correcting transaction instead.')
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def award(user_ids, delta, created_by, gain_type='event', event=None, note=''):
+        """Add delta coins to every user in user_ids and return the new ledger rows.
+
+        The balances move with one UPDATE, users without a UserCoin row get one
+        through bulk_create, the ledger rows go in with bulk_create and the
+        leaderboard buckets shift to match, all in one transaction. A negative
+        delta that would take any balance below zero raises ValueError.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids or not delta:
+            return []
+        with transaction.atomic():
+            previous = dict(UserCoin.objects.select_for_update().filter(
+                user_id__in=user_ids
+            ).values_list('user_id', 'gain_coin'))
+            if delta < 0 and (len(previous) < len(user_ids) or min(previous.values()) < -delta):
+                raise ValueError('A correction cannot take a balance below zero.')
+
+            UserCoin.objects.filter(user_id__in=list(previous)).update(
+                gain_coin=F('gain_coin') + delta,
+                updated_user=created_by,
+                updated_date=timezone.localdate(),
+            )
+            UserCoin.objects.bulk_create(
+                [
+                    UserCoin(
+                        user_id=user_id,
+                        gain_type=gain_type,
+                        gain_coin=delta,
+                        status='active',
+                        created_user=created_by,
+                        updated_user=created_by,
+                    )
+                    for user_id in user_ids if user_id not in previous
+                ],
+                batch_size=500,
+            )
+            entries = CoinTransaction.objects.bulk_create(
+                [
+                    CoinTransaction(
+                        user_id=user_id,
+                        delta=delta,
+                        balance=previous.get(user_id, 0) + delta,
+                        event=event,
+                        gain_type=gain_type,
+                        note=note,
+                        created_user=created_by,
+                    )
+                    for user_id in user_ids
+                ],
+                batch_size=500,
+            )
+
+            changes = {}
+            for user_id in user_ids:
+                if user_id in previous:
+                    changes[previous[user_id]] = changes.get(previous[user_id], 0) - 1
+                balance = previous.get(user_id, 0) + delta
+                changes[balance] = changes.get(balance, 0) + 1
+            LeaderboardBucket.shift(changes)
+        return entries
+
+
+class LeaderboardBucket(models.Model):
+    """How many users hold each coin balance.
+
+    A user's rank is one plus the users in higher buckets, a sum over the
+    distinct balances instead of a sort over every user. The buckets are
+    shifted in the same transaction as the balances they count, and
+    rebuilt from UserCoin by the rebuild_leaderboard command.
+    """
+    balance = models.PositiveIntegerField(primary_key=True)
+    user_count = models.PositiveIntegerField(default=0)
+
+    # Balances updated per statement, well under SQLite's parameter limit
+    SHIFT_BATCH = 200
+
+    def __str__(self):
+        return f"{self.user_count} user(s) with {self.balance} coins"
+
+    @staticmethod
+    def shift(changes):
+        """Apply {balance: change in user count}; call inside the transaction that moved the balances"""
+        changes = {balance: count for balance, count in changes.items() if count}
+        if not changes:
+            return
+        existing = set(LeaderboardBucket.objects.filter(balance__in=list(changes)).values_list('balance', flat=True))
+        balances = sorted(existing)
+        for start in range(0, len(balances), LeaderboardBucket.SHIFT_BATCH):
+            batch = balances[start:start + LeaderboardBucket.SHIFT_BATCH]
+            LeaderboardBucket.objects.filter(balance__in=batch).update(user_count=Greatest(
+                F('user_count') + Case(
+                    *[When(balance=balance, then=Value(changes[balance])) for balance in batch],
+                    default=Value(0),
+                ),
+                0,
+            ))
+        LeaderboardBucket.objects.bulk_create([
+            LeaderboardBucket(balance=balance, user_count=count)
+            for balance, count in changes.items() if balance not in existing and count > 0
+        ])
+        LeaderboardBucket.objects.filter(balance__in=balances, user_count=0).delete()
+
+    @staticmethod
+    def rank(balance):
+        """1-based rank of a balance, ties sharing a rank"""
+        above = LeaderboardBucket.objects.filter(balance__gt=balance).aggregate(users=Sum('user_count'))['users']
+        return (above or 0) + 1
+
+    @staticmethod
+    def top(limit):
+        """The limit highest UserCoin rows, each with its rank set as .rank"""
+        rows = list(UserCoin.objects.select_related('user').order_by('-gain_coin', 'user_id')[:limit])
+        if rows:
+            counts = dict(LeaderboardBucket.objects.filter(
+                balance__gte=rows[-1].gain_coin, balance__lte=rows[0].gain_coin,
+            ).values_list('balance', 'user_count'))
+            rank = 1
+            for previous, row in zip([None] + rows, rows):
+                if previous is not None and row.gain_coin != previous.gain_coin:
+                    # Everyone tied on the previous balance ranks above this row
+                    rank += counts.get(previous.gain_coin, 0)
+                row.rank = rank
+        return rows
+
+    @staticmethod
+    def compute():
+        """Count the users per balance from UserCoin"""
+        return dict(
+            UserCoin.objects.values('gain_coin').annotate(users=Count('id')).order_by().values_list('gain_coin', 'users')
+        )
+
+    @staticmethod
+    def rebuild():
+        """Replace every bucket with the counts from UserCoin"""
+        with transaction.atomic():
+            LeaderboardBucket.objects.all().delete()
+            LeaderboardBucket.objects.bulk_create(
+                [LeaderboardBucket(balance=balance, user_count=count) for balance, count in LeaderboardBucket.compute().items()],
+                batch_size=500,
+            )
+
+
 class AdminMessage(models.Model):
     """Model for users to send messages to administrators"""
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_admin_messages')
@@ -239,6 +704,10 @@ class AdminMessage(models.Model):
 
     class Meta:
         ordering = ['-created_date']
+        indexes = [
+            # A user's sent messages, newest first
+            models.Index(fields=['sender', '-created_date'], name='adminmessage_sender_idx'),
+        ]
 
     def __str__(self):
         return f"Message from {self.sender.username if self.sender else self.sender_email} - {self.subject}"
@@ -247,6 +716,48 @@ class AdminMessage(models.Model):
         return reverse('admin-message-detail', kwargs={'pk': self.pk})
 
 
+class EventCommentQuerySet(models.QuerySet):
+    def tree(self):
+        """Return the thread as a list of root comments, newest first, from one query.
+
+        Every comment gets .children (oldest first) and .reply_count (all
+        descendants). Replies whose parent is not in the queryset, e.g. because
+        it was hidden, are left out along with their subtree.
+        """
+        nodes = {}
+        roots = []
+        for comment in self.select_related('user').order_by('created_date', 'id'):
+            comment.children = []
+            if comment.parent_id is None:
+                roots.append(comment)
+            elif comment.parent_id in nodes:
+                nodes[comment.parent_id].children.append(comment)
+            else:
+                continue
+            nodes[comment.pk] = comment
+        # Parents are always inserted before their replies, so walking the
+        # nodes backwards sees every child before its parent.
+        for comment in reversed(list(nodes.values())):
+            comment.reply_count = sum(1 + child.reply_count for child in comment.children)
+        roots.reverse()
+        return roots
+
+    def reply_counts(self):
+        """Return {root_id: replies} for the replies in this queryset that tree() would show.
+
+        A reply counts only if its parent counts too, or is the root itself, so
+        a hidden comment takes its subtree out of the total as it does out of
+        the thread. Reads three integers per reply, parents before children.
+        """
+        shown = set()
+        counts = {}
+        for pk, parent_id, root_id in self.order_by('depth', 'id').values_list('id', 'parent', 'root'):
+            if parent_id == root_id or parent_id in shown:
+                shown.add(pk)
+                counts[root_id] = counts.get(root_id, 0) + 1
+        return counts
+
+
 class EventComment(models.Model):
     """Model for users to comment on events"""
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='comments')
@@ -258,6 +769,9 @@ class EventComment(models.Model):
     
     # Optional: Parent comment for replies
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    # Top-level comment of the thread (null for top-level comments) and nesting level
+    root = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='thread_replies', editable=False)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
     
     STATUS_CHOICES = (
         ('active', 'Active'),
@@ -266,12 +780,43 @@ class EventComment(models.Model):
     )
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active')
 
+    objects = EventCommentQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_date']
+        indexes = [
+            # Cursor pages of an event's active top-level comments, newest first
+            models.Index(
+                fields=['event', '-id'], condition=Q(status='active', parent__isnull=True),
+                name='eventcomment_top_level_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Comment by {self.user.username} on {self.event.name}"
 
+    def save(self, *args, **kwargs):
+        """Save the comment and keep Event.comment_count in step in the same transaction"""
+        if self.parent_id and self._state.adding:
+            self.root_id = self.parent.root_id or self.parent_id
+            self.depth = self.parent.depth + 1
+        with transaction.atomic():
+            previous = None
+            if self.pk:
+                previous = EventComment.objects.select_for_update().filter(
+                    pk=self.pk
+                ).values_list('event_id', 'status').first()
+            super().save(*args, **kwargs)
+            if previous != (self.event_id, self.status):
+                if previous:
+                    EventComment.adjust_comment_count(previous[0], previous[1], -1)
+                EventComment.adjust_comment_count(self.event_id, self.status, 1)
+
+    @staticmethod
+    def adjust_comment_count(event_id, status, delta):
+        if status == 'active':
+            Event.objects.filter(pk=event_id).update(comment_count=Greatest(F('comment_count') + delta, 0))
+
     def get_replies(self):
         """Get all replies to this comment"""
         return self.replies.filter(status='active').order_by('created_date')
@@ -288,3 +833,103 @@ class EventComment(models.Model):
 
 
 
+
+
+class DashboardStats(models.Model):
+    """Single-row snapshot of the admin dashboard totals.
+
+    Kept current by Event.save() and the signals in signals.py, and
+    reconciled by the rebuild_dashboard_stats command, so the dashboard
+    reads one row instead of counting four tables on every load.
+    """
+    user_count = models.PositiveIntegerField(default=0)
+    category_count = models.PositiveIntegerField(default=0)
+    event_count = models.PositiveIntegerField(default=0)
+    completed_event_count = models.PositiveIntegerField(default=0)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    SNAPSHOT_ID = 1
+
+    class Meta:
+        verbose_name_plural = 'dashboard stats'
+
+    def __str__(self):
+        return f"Dashboard stats at {self.updated_date}"
+
+    @staticmethod
+    def compute():
+        """Count the totals from the source tables"""
+        return {
+            'user_count': User.objects.count(),
+            'category_count': EventCategory.objects.count(),
+            'event_count': Event.objects.count(),
+            'completed_event_count': Event.objects.filter(status='completed').count(),
+        }
+
+    @classmethod
+    def rebuild(cls):
+        stats, _ = cls.objects.update_or_create(pk=cls.SNAPSHOT_ID, defaults=cls.compute())
+        return stats
+
+    @classmethod
+    def current(cls):
+        """Return the snapshot, building it on first use"""
+        return cls.objects.filter(pk=cls.SNAPSHOT_ID).first() or cls.rebuild()
+
+    @classmethod
+    def adjust(cls, **deltas):
+        """Atomically add deltas to the snapshot; a missing snapshot is built later by current()"""
+        updates = {field: Greatest(F(field) + delta, 0) for field, delta in deltas.items() if delta}
+        if updates:
+            cls.objects.filter(pk=cls.SNAPSHOT_ID).update(updated_date=timezone.now(), **updates)
+
+
+class Task(models.Model):
+    """A unit of background work in the database task queue; see tasks.py.
+
+    Tasks are claimed by run_worker processes, retried with backoff when
+    they raise, and left as 'dead' once max_attempts is used up.
+    """
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('dead', 'Dead'),
+    )
+    name = models.CharField(max_length=255)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Workers look for due tasks in run_at order
+            models.Index(fields=['status', 'run_at'], name='task_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class EventLifecycleRun(models.Model):
+    """What one advance_event_lifecycle run changed; runs that changed nothing are not kept"""
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+    timed_out = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    waitlist_cancelled = models.PositiveIntegerField(default=0)
+    marked_absent = models.PositiveIntegerField(default=0)
+    members_closed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f'Lifecycle run at {self.started_at}: {self.timed_out} timed out, {self.completed} completed'
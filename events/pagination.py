@@ -0,0 +1,109 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+class CursorPage:
+    """One page of keyset-paginated results.
+
+    Exposes has_next/has_previous like a Paginator page, plus query strings
+    that carry the opaque cursor for the neighbouring pages.
+    """
+    def __init__(self, object_list, has_next, has_previous, next_querystring, previous_querystring):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_querystring = next_querystring
+        self.previous_querystring = previous_querystring
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class CursorPaginationMixin:
+    """Keyset pagination for ListView.
+
+    Pages are selected with a WHERE on the cursor_ordering columns instead of
+    OFFSET, and no COUNT(*) is issued, so every page costs the same as the
+    first. cursor_ordering must end in a unique column (normally id) and its
+    columns must be non-null. Templates get page_obj and is_paginated as with
+    the stock paginator; render links with base/cursor_pagination.html.
+    """
+    cursor_ordering = ('-id',)
+    cursor_page_size = 20
+    cursor_query_param = 'cursor'
+
+    def get_paginate_by(self, queryset):
+        return self.cursor_page_size
+
+    def paginate_queryset(self, queryset, page_size):
+        direction, values = self._decode_cursor(self.request.GET.get(self.cursor_query_param))
+        ordering = list(self.cursor_ordering)
+        if direction == 'prev':
+            ordering = [self._flip(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._after(ordering, values))
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if direction == 'prev':
+            rows.reverse()
+            has_next, has_previous = values is not None, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+
+        page = CursorPage(
+            rows,
+            has_next,
+            has_previous,
+            self._querystring('next', rows[-1]) if has_next else '',
+            self._querystring('prev', rows[0]) if has_previous else '',
+        )
+        return None, page, rows, has_next or has_previous
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    def _key_fields(self):
+        return [field.lstrip('-') for field in self.cursor_ordering]
+
+    def _after(self, ordering, values):
+        """Build the lexicographic "comes after values" filter for ordering"""
+        condition = Q()
+        for i, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**{'%s__%s' % (name, lookup): values[i]})
+            for prior, value in zip(ordering[:i], values):
+                step &= Q(**{prior.lstrip('-'): value})
+            condition |= step
+        return condition
+
+    def _querystring(self, direction, obj):
+        values = [getattr(obj, name) for name in self._key_fields()]
+        token = json.dumps([direction, [v.isoformat() if hasattr(v, 'isoformat') else v for v in values]])
+        params = self.request.GET.copy()
+        params[self.cursor_query_param] = base64.urlsafe_b64encode(token.encode()).decode().rstrip('=')
+        return params.urlencode()
+
+    def _decode_cursor(self, token):
+        if not token:
+            return 'next', None
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            direction, values = json.loads(raw)
+            fields = [self.model._meta.get_field(name) for name in self._key_fields()]
+            if direction not in ('next', 'prev') or len(values) != len(fields):
+                raise ValueError
+            return direction, [field.to_python(value) for field, value in zip(fields, values)]
+        except (ValueError, TypeError, ValidationError):
+            raise Http404('Invalid page cursor.')
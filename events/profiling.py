@@ -0,0 +1,174 @@
+"""Query counting and timing for requests, tests and benchmarks.
+
+QueryCounter hooks every database connection with execute_wrapper, so it
+counts queries without DEBUG. QueryBudgetMiddleware uses it to record each
+view's query count, SQL time, template time and wall time and to enforce
+QUERY_BUDGETS. KEY_VIEWS lists the pages whose budgets check_query_budgets
+verifies in CI, and QueryBudgetTestMixin offers the same check to TestCase
+classes.
+
+plan_problems() reads a queryset's EXPLAIN and reports full table scans and
+sorts the indexes should have made unnecessary; key_querysets() lists the
+hot filters that check_query_plans holds to that.
+"""
+import re
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryPlanRegression(AssertionError):
+    pass
+
+
+class QueryCounter:
+    """Count queries and their total time on all connections while active"""
+    def __init__(self):
+        self.count = 0
+        self.sql_time = 0.0
+        self.queries = []
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.sql_time += time.perf_counter() - start
+            self.queries.append(sql)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+
+def query_budget(view_name):
+    """Return the configured query budget for view_name, or None for no limit"""
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(view_name, budgets.get('default'))
+
+
+# Totals per view name for this process; read by run_benchmarks and the shell
+view_stats = defaultdict(lambda: {
+    'requests': 0, 'queries': 0, 'max_queries': 0, 'sql_ms': 0.0, 'template_ms': 0.0, 'wall_ms': 0.0,
+})
+
+
+def record_view(view_name, queries, sql_ms, template_ms, wall_ms):
+    stats = view_stats[view_name]
+    stats['requests'] += 1
+    stats['queries'] += queries
+    stats['max_queries'] = max(stats['max_queries'], queries)
+    stats['sql_ms'] += sql_ms
+    stats['template_ms'] += template_ms or 0.0
+    stats['wall_ms'] += wall_ms
+
+
+@contextmanager
+def assert_max_queries(budget, label='block'):
+    """Fail with QueryBudgetExceeded if the block runs more than budget queries"""
+    with QueryCounter() as counter:
+        yield counter
+    if counter.count > budget:
+        raise QueryBudgetExceeded(
+            '%s ran %d queries, budget is %d:\n%s' % (label, counter.count, budget, '\n'.join(counter.queries))
+        )
+
+
+# SQLite: "SCAN events_event" reads the whole table, "SCAN ... USING INDEX"
+# walks an index instead. PostgreSQL: "Seq Scan on events_event".
+TABLE_SCAN_RE = re.compile(r'\bSCAN \w+|Seq Scan on \w+')
+SORT_RE = re.compile(r'USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY')
+
+
+def plan_problems(queryset, allow_sort=False):
+    """Lines of queryset's query plan that scan a whole table or sort the result in a temp b-tree"""
+    problems = []
+    for line in queryset.explain().splitlines():
+        full_scan = TABLE_SCAN_RE.search(line) and 'USING' not in line
+        if full_scan or (not allow_sort and SORT_RE.search(line)):
+            problems.append(line.strip())
+    return problems
+
+
+def assert_uses_indexes(queryset, label='queryset', allow_sort=False):
+    """Fail with QueryPlanRegression if queryset's plan has a full table scan or an unindexed sort"""
+    problems = plan_problems(queryset, allow_sort)
+    if problems:
+        raise QueryPlanRegression('%s:\n%s\n\nFull plan:\n%s' % (label, '\n'.join(problems), queryset.explain()))
+
+
+def key_querysets(event_id, user_id):
+    """(label, queryset, sort allowed) for the hot filters, built the way their views build them"""
+    from .models import AdminMessage, Event, EventComment, EventMember, REGISTERED_ATTEND_STATUSES
+
+    return [
+        # PublicEventListView: the first cursor page
+        ('public event list', Event.objects.filter(status='active').with_capacity().select_related(
+            'category', 'eventimage').order_by('-start_date', '-id')[:11], False),
+        # EventApiListView with ?start_from=
+        ('event API list by date', Event.objects.filter(status='active', start_date__gte='2000-01-01')
+            .order_by('-start_date', '-id').only('id', 'start_date')[:21], False),
+        # advance_event_lifecycle
+        ('events past their end date', Event.objects.filter(status='active', end_date__lt='2000-01-01')
+            .order_by('end_date', 'id').values('id')[:500], False),
+        # Event.get_registration_count() and with_capacity(live=True)
+        ('registrations of an event', EventMember.objects.filter(
+            event_id=event_id, attend_status__in=REGISTERED_ATTEND_STATUSES).values('id'), False),
+        # user_dashboard
+        ("a user's active registrations", EventMember.objects.filter(
+            user_id=user_id, status='active').select_related('event__category'), False),
+        # EventCommentPageView: the first cursor page
+        ('top-level comments of an event', EventComment.objects.filter(
+            event_id=event_id, status='active', parent=None).select_related('user').order_by('-id')[:21], False),
+        # UserMessagesView
+        ("a user's sent messages", AdminMessage.objects.filter(sender_id=user_id)[:10], False),
+    ]
+
+
+class QueryBudgetTestMixin:
+    """TestCase helpers: self.assertMaxQueries(n), self.assertViewWithinBudget(url_name, ...)
+    and self.assertUsesIndexes(queryset)"""
+    def assertMaxQueries(self, budget, label='block'):
+        return assert_max_queries(budget, label)
+
+    def assertUsesIndexes(self, queryset, label='queryset', allow_sort=False):
+        assert_uses_indexes(queryset, label, allow_sort)
+
+    def assertViewWithinBudget(self, url_name, args=(), budget=None):
+        from django.urls import reverse
+        budget = query_budget(url_name) if budget is None else budget
+        with self.assertMaxQueries(budget, url_name):
+            response = self.client.get(reverse(url_name, args=args))
+        self.assertLess(response.status_code, 400)
+        return response
+
+
+# (url name, role, needs an event id) for the pages that must stay within
+# budget; role is 'anonymous', 'user' or 'staff'
+KEY_VIEWS = (
+    ('dashboard', 'staff', False),
+    ('user-dashboard', 'user', False),
+    ('public-events', 'anonymous', False),
+    ('public-event-detail', 'anonymous', True),
+    ('event-list', 'staff', False),
+    ('join-event-list', 'staff', False),
+    ('user-events', 'user', False),
+    ('event-detail-with-comments', 'user', True),
+    ('event-comment-page', 'user', True),
+    ('admin-message-list', 'staff', False),
+    ('user-messages', 'user', False),
+)
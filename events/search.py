@@ -0,0 +1,145 @@
+"""Full-text search over Event name, description, venue and location.
+
+On SQLite the text lives in an FTS5 virtual table (created by migration
+0004) whose rowid is the event id, kept in sync by the Event signals in
+signals.py. Other backends, or SQLite builds without FTS5, fall back to
+icontains matching on the same columns. Every helper takes the connection to
+work on; search_queryset() uses the queryset's own database.
+
+The FTS table is mapped read-only as models.EventSearchEntry, so a search is
+an ordinary join from Event on rowid with a MATCH lookup on the table's
+hidden column, and bm25 rank comes along as a column of the join.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Case, F, IntegerField, Lookup, Q, TextField, Value, When
+
+FTS_TABLE = 'events_event_fts'
+SEARCH_FIELDS = ('name', 'description', 'venue', 'location')
+# bm25 weights, in SEARCH_FIELDS order: a hit in the name outranks the rest
+RANK_WEIGHTS = (10.0, 1.0, 2.0, 2.0)
+
+_fts_available = {}
+
+
+class Match(Lookup):
+    """column__match=expression: an FTS5 MATCH"""
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return '%s MATCH %s' % (lhs, rhs), lhs_params + rhs_params
+
+
+class FTSDocumentField(TextField):
+    """The hidden column an FTS5 table has under its own name; filter it with __match"""
+
+
+FTSDocumentField.register_lookup(Match)
+
+
+def fts_available(using):
+    """Return True if the FTS5 table exists on this connection (checked once)"""
+    if using.alias not in _fts_available:
+        available = False
+        if using.vendor == 'sqlite':
+            with using.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE]
+                )
+                available = cursor.fetchone() is not None
+        _fts_available[using.alias] = available
+    return _fts_available[using.alias]
+
+
+def search_terms(query):
+    """Split a user query into plain word terms"""
+    return re.findall(r'\w+', query or '')
+
+
+def fts_query(terms):
+    """Build an FTS5 MATCH expression: every term must match, each as a prefix"""
+    return ' '.join('"%s"*' % term for term in terms)
+
+
+def create_index(using):
+    """Create the FTS5 table and its bm25 ranking; raises if FTS5 is missing"""
+    with using.cursor() as cursor:
+        cursor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS %s USING fts5(%s, tokenize='unicode61 remove_diacritics 2')"
+            % (FTS_TABLE, ', '.join(SEARCH_FIELDS))
+        )
+        cursor.execute(
+            "INSERT INTO %s(%s, rank) VALUES ('rank', 'bm25(%s)')"
+            % (FTS_TABLE, FTS_TABLE, ', '.join(str(w) for w in RANK_WEIGHTS))
+        )
+    _fts_available.pop(using.alias, None)
+
+
+def drop_index(using):
+    with using.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS %s' % FTS_TABLE)
+    _fts_available.pop(using.alias, None)
+
+
+def rebuild_index(using):
+    """Repopulate the FTS table from events_event in one INSERT ... SELECT; returns the row count"""
+    with using.cursor() as cursor:
+        cursor.execute('DELETE FROM %s' % FTS_TABLE)
+        cursor.execute(
+            'INSERT INTO %s(rowid, name, description, venue, location) '
+            "SELECT id, name, description, venue, COALESCE(location, '') FROM events_event" % FTS_TABLE
+        )
+        count = cursor.rowcount
+        cursor.execute("INSERT INTO %s(%s) VALUES ('optimize')" % (FTS_TABLE, FTS_TABLE))
+    return count
+
+
+def index_event(event, using):
+    if not fts_available(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute('DELETE FROM %s WHERE rowid = %%s' % FTS_TABLE, [event.pk])
+        cursor.execute(
+            'INSERT INTO %s(rowid, name, description, venue, location) VALUES (%%s, %%s, %%s, %%s, %%s)' % FTS_TABLE,
+            [event.pk, event.name, event.description, event.venue, event.location or ''],
+        )
+
+
+def unindex_event(event_id, using):
+    if not fts_available(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute('DELETE FROM %s WHERE rowid = %%s' % FTS_TABLE, [event_id])
+
+
+def search_queryset(queryset, query):
+    """Filter an Event queryset to matches for query, best match first.
+
+    The result carries a search_rank annotation; lower is better.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none()
+
+    using = connections[queryset.db]
+    if fts_available(using):
+        # Join the FTS table so MATCH drives the lookup and any filters already
+        # on the queryset still apply in the same statement.
+        return queryset.filter(search_entry__document__match=fts_query(terms)).annotate(
+            search_rank=F('search_entry__rank'),
+        ).order_by('search_rank', '-start_date')
+
+    for term in terms:
+        term_filter = Q()
+        for field in SEARCH_FIELDS:
+            term_filter |= Q(**{'%s__icontains' % field: term})
+        queryset = queryset.filter(term_filter)
+    name_hit = Q()
+    for term in terms:
+        name_hit &= Q(name__icontains=term)
+    return queryset.annotate(
+        search_rank=Case(When(name_hit, then=Value(0)), default=Value(1), output_field=IntegerField())
+    ).order_by('search_rank', '-start_date')
@@ -0,0 +1,115 @@
+from django.contrib.auth.models import User
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache, images, search, tasks
+from .models import (
+    DashboardStats, Event, EventAgenda, EventCategory, EventComment, EventImage, EventMember, LeaderboardBucket,
+    REGISTERED_ATTEND_STATUSES, UserCoin,
+)
+
+
+@receiver(post_delete, sender=EventMember)
+def release_member_counters(sender, instance, **kwargs):
+    """Decrement the event counters when a registration is deleted.
+
+    post_delete runs inside the deletion transaction, so this covers single
+    deletes, queryset deletes and cascades from User alike. A freed seat goes
+    to the head of the waitlist in the same transaction.
+    """
+    Event.adjust_member_counters(instance.event_id, instance.attend_status, -1)
+    if instance.attend_status in REGISTERED_ATTEND_STATUSES:
+        Event.promote_waitlist(instance.event_id)
+
+
+@receiver(post_save, sender=Event)
+def index_event_for_search(sender, instance, raw=False, using='default', update_fields=None, **kwargs):
+    if raw or (update_fields and not set(update_fields) & set(search.SEARCH_FIELDS)):
+        return
+    search.index_event(instance, using=connections[using])
+
+
+@receiver(post_delete, sender=Event)
+def unindex_event_for_search(sender, instance, using='default', **kwargs):
+    search.unindex_event(instance.pk, using=connections[using])
+
+
+@receiver(post_delete, sender=EventComment)
+def release_comment_count(sender, instance, **kwargs):
+    EventComment.adjust_comment_count(instance.event_id, instance.status, -1)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def expire_event_fragments(sender, instance, using='default', **kwargs):
+    """Move the event to a new fragment cache version once the change commits.
+
+    Bumping on commit rather than immediately stops a concurrent request from
+    re-caching the old rows under the new version.
+    """
+    transaction.on_commit(lambda: cache.expire_events([instance.pk]), using=using)
+
+
+@receiver(post_save, sender=EventImage)
+@receiver(post_delete, sender=EventImage)
+@receiver(post_save, sender=EventAgenda)
+@receiver(post_delete, sender=EventAgenda)
+@receiver(post_save, sender=EventMember)
+@receiver(post_delete, sender=EventMember)
+def expire_related_event_fragments(sender, instance, using='default', **kwargs):
+    transaction.on_commit(lambda: cache.expire_events([instance.event_id]), using=using)
+
+
+@receiver(post_save, sender=EventCategory)
+@receiver(post_delete, sender=EventCategory)
+def expire_category_event_fragments(sender, instance, raw=False, using='default', **kwargs):
+    if raw:
+        return
+    event_ids = list(Event.objects.using(using).filter(category=instance).values_list('id', flat=True))
+    transaction.on_commit(lambda: cache.expire_events(event_ids), using=using)
+
+
+@receiver(post_delete, sender=Event)
+def release_event_stats(sender, instance, **kwargs):
+    DashboardStats.adjust(event_count=-1, completed_event_count=-int(instance.status == 'completed'))
+
+
+@receiver(post_save, sender=User)
+def count_new_user(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        DashboardStats.adjust(user_count=1)
+
+
+@receiver(post_delete, sender=User)
+def release_user_stats(sender, instance, **kwargs):
+    DashboardStats.adjust(user_count=-1)
+
+
+@receiver(post_save, sender=EventCategory)
+def count_new_category(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        DashboardStats.adjust(category_count=1)
+
+
+@receiver(post_delete, sender=EventCategory)
+def release_category_stats(sender, instance, **kwargs):
+    DashboardStats.adjust(category_count=-1)
+
+
+@receiver(post_delete, sender=UserCoin)
+def release_leaderboard_bucket(sender, instance, **kwargs):
+    LeaderboardBucket.shift({instance.gain_coin: -1})
+
+
+@receiver(post_save, sender=EventImage)
+def queue_event_image_variants(sender, instance, raw=False, **kwargs):
+    """Resize a new upload in a worker; the request stores it as sent"""
+    if not raw and images.needs_processing(instance):
+        tasks.enqueue(images.process_event_image, image_id=instance.pk)
+
+
+@receiver(post_save, sender=EventCategory)
+def queue_category_image_variants(sender, instance, raw=False, **kwargs):
+    if not raw and images.needs_processing(instance):
+        tasks.enqueue(images.process_category_image, category_id=instance.pk)
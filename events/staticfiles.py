@@ -0,0 +1,280 @@
+"""collectstatic pipeline and a WSGI handler for the collected files.
+
+CompressedManifestStaticFilesStorage extends the manifest storage, which
+copies every file under a content-hashed name, with three steps:
+
+* files under STATIC_PRUNE_DIRS that no template references, directly or
+  through a referenced stylesheet or source map, are left out;
+* TrueType fonts get a Latin-subset WOFF2 sibling (needs fontTools and
+  brotli; skipped with a warning without them);
+* text assets get .gz and, with brotli installed, .br siblings.
+
+PrecompressedStaticFiles wraps the WSGI application and serves
+STATIC_ROOT itself: the .br or .gz sibling the client accepts, and
+hashed names with a one-year immutable Cache-Control.
+"""
+import gzip
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import warnings
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from fontTools import subset as font_subset
+except ImportError:
+    font_subset = None
+
+TEMPLATE_STATIC_RE = re.compile(r"""{%\s*static\s+['"]([^'"]+)['"]""")
+CSS_URL_RE = re.compile(r"""url\(\s*['"]?([^'")]+)['"]?\s*\)""")
+SOURCE_MAP_RE = re.compile(r'sourceMappingURL=(\S+?)(?:\s|\*/|$)')
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.map', '.svg', '.json', '.txt', '.xml', '.ttf', '.otf', '.eot', '.ico')
+# A compressed copy is only kept when it saves at least this much
+MIN_COMPRESSION_RATIO = 0.95
+# Google Fonts' "latin" subset
+LATIN_UNICODES = (
+    'U+0000-00FF,U+0131,U+0152-0153,U+02BB-02BC,U+02C6,U+02DA,U+02DC,U+2000-206F,'
+    'U+2074,U+20AC,U+2122,U+2191,U+2193,U+2212,U+2215,U+FEFF,U+FFFD'
+)
+
+
+def template_references(template_dirs):
+    """Static paths named by {% static '...' %} in any template under template_dirs"""
+    found = set()
+    for directory in template_dirs:
+        for path in Path(directory).rglob('*.html'):
+            found.update(TEMPLATE_STATIC_RE.findall(path.read_text(encoding='utf-8', errors='ignore')))
+    return found
+
+
+def asset_references(name, content):
+    """Paths a stylesheet or script points at with url() or a source map comment"""
+    targets = SOURCE_MAP_RE.findall(content)
+    if name.endswith('.css'):
+        targets += CSS_URL_RE.findall(content)
+    found = set()
+    for target in targets:
+        target = target.split('#')[0].split('?')[0]
+        if not target or target.startswith(('data:', 'http:', 'https:', '//', '/')):
+            continue
+        found.add(posixpath.normpath(posixpath.join(posixpath.dirname(name), target)))
+    return found
+
+
+def referenced_files(paths, template_dirs):
+    """The subset of the collected paths that a page can end up requesting"""
+    pending = [name for name in template_references(template_dirs) if name in paths]
+    seen = set(pending)
+    while pending:
+        name = pending.pop()
+        if not name.endswith(('.css', '.js')):
+            continue
+        storage, path = paths[name]
+        with storage.open(path) as source:
+            content = source.read().decode('utf-8', errors='ignore')
+        for target in asset_references(name, content) - seen:
+            if target in paths:
+                seen.add(target)
+                pending.append(target)
+    return seen
+
+
+def to_woff2(data):
+    """Subset a TrueType font to Latin and return it as WOFF2 bytes"""
+    from io import BytesIO
+
+    options = font_subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*']
+    font = font_subset.load_font(BytesIO(data), options)
+    subsetter = font_subset.Subsetter(options)
+    subsetter.populate(unicodes=font_subset.parse_unicodes(LATIN_UNICODES))
+    subsetter.subset(font)
+    output = BytesIO()
+    font_subset.save_font(font, output, options)
+    return output.getvalue()
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    # Templates and vendored plugins link a few files the project doesn't
+    # ship (adminlte.min.css, some source maps); keep the plain name for
+    # those instead of failing collectstatic or the page
+    manifest_strict = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            if content is not None:
+                raise
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+
+        self.prune(paths)
+        self.add_woff2(paths)
+        yield from super().post_process(paths, dry_run, **options)
+
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                self.compress(name)
+
+    def prune(self, paths):
+        """Leave unreferenced files under STATIC_PRUNE_DIRS out of the collection"""
+        prune_dirs = tuple(directory.rstrip('/') + '/' for directory in getattr(settings, 'STATIC_PRUNE_DIRS', ()))
+        if not prune_dirs:
+            return
+        template_dirs = [directory for engine in settings.TEMPLATES for directory in engine.get('DIRS', [])]
+        keep = referenced_files(paths, template_dirs)
+        for name in [name for name in paths if name.startswith(prune_dirs) and name not in keep]:
+            del paths[name]
+            self.delete(name)
+
+    def add_woff2(self, paths):
+        """Write a WOFF2 copy of every collected .ttf and hash it with the rest"""
+        fonts = [name for name in paths if name.endswith('.ttf') and not name.startswith('admin/')]
+        if not fonts:
+            return
+        if font_subset is None or brotli is None:
+            warnings.warn('fontTools and brotli are needed to convert fonts to WOFF2; skipping.')
+            return
+        for name in fonts:
+            storage, path = paths[name]
+            with storage.open(path) as source:
+                woff2 = to_woff2(source.read())
+            target = name[:-len('.ttf')] + '.woff2'
+            self.delete(target)
+            self.save(target, ContentFile(woff2))
+            paths[target] = (self, target)
+
+    def compress(self, name):
+        with self.open(name) as source:
+            data = source.read()
+        encoded = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            encoded.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, compressed in encoded:
+            if len(compressed) < len(data) * MIN_COMPRESSION_RATIO:
+                self.delete(name + suffix)
+                self.save(name + suffix, ContentFile(compressed))
+
+
+def accepted_encodings(header):
+    """Content codings the Accept-Encoding header allows, by name"""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticFiles:
+    """WSGI middleware serving collected static files, precompressed where possible.
+
+    A GET or HEAD under STATIC_URL for a file in STATIC_ROOT is answered
+    here, with the .br or .gz sibling when the client accepts it. Names
+    listed in the manifest as hashed are cached for a year as immutable;
+    anything else must be revalidated. Other requests, and missing files,
+    go to the wrapped application.
+    """
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+    IMMUTABLE = 'public, max-age=31536000, immutable'
+    REVALIDATE = 'public, max-age=0, must-revalidate'
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        root = root or settings.STATIC_ROOT
+        # Without a STATIC_ROOT there is nothing to serve; realpath('') would be the cwd
+        self.root = os.path.realpath(root) if root else None
+        self.prefix = prefix or settings.STATIC_URL
+        self.hashed = self.load_hashed_names()
+
+    def load_hashed_names(self):
+        if not self.root:
+            return set()
+        try:
+            with open(os.path.join(self.root, ManifestStaticFilesStorage.manifest_name)) as manifest:
+                return set(json.load(manifest).get('paths', {}).values())
+        except (OSError, ValueError):
+            return set()
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if environ['REQUEST_METHOD'] not in ('GET', 'HEAD') or not path.startswith(self.prefix) or not self.root:
+            return self.application(environ, start_response)
+        name = path[len(self.prefix):]
+        filename = os.path.realpath(os.path.join(self.root, name))
+        if not filename.startswith(self.root + os.sep) or not os.path.isfile(filename):
+            return self.application(environ, start_response)
+
+        accepted = accepted_encodings(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        encoding = None
+        served = filename
+        for coding, suffix in self.ENCODINGS:
+            if coding in accepted and os.path.isfile(filename + suffix):
+                encoding, served = coding, filename + suffix
+                break
+
+        stat = os.stat(served)
+        etag = '"%x-%x%s"' % (int(stat.st_mtime), stat.st_size, '-' + encoding if encoding else '')
+        content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'image/svg+xml'):
+            content_type += '; charset=utf-8'
+        headers = [
+            ('Content-Type', content_type),
+            ('Cache-Control', self.IMMUTABLE if name in self.hashed else self.REVALIDATE),
+            ('ETag', etag),
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+
+        if self.not_modified(environ, etag, stat.st_mtime):
+            start_response('304 Not Modified', headers)
+            return []
+        headers.append(('Content-Length', str(stat.st_size)))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        # Both wrappers close the file when the server closes the response
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(open(served, 'rb'), 65536)
+
+    @staticmethod
+    def not_modified(environ, etag, mtime):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+        if_modified_since = environ.get('HTTP_IF_MODIFIED_SINCE')
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
@@ -0,0 +1,129 @@
+"""Durable background tasks stored in the project database.
+
+Mark a function with @task and queue it from a view with one call:
+
+    tasks.enqueue(process_event_image, image_id=image.pk)
+
+The Task row is written in the view's transaction, so a worker sees it
+only once the request's changes have committed. Keyword arguments must be
+JSON serializable; pass ids rather than model instances.
+
+`manage.py run_worker` claims due tasks, with SELECT ... FOR UPDATE SKIP
+LOCKED where the database supports it and a conditional UPDATE per task
+on SQLite, runs each in its own transaction, retries failures with
+exponential backoff and marks a task 'dead' once its attempts are used
+up. No broker is involved.
+"""
+import logging
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger('events.tasks')
+
+
+def task(func):
+    """Register func as a task, runnable by name from a worker"""
+    func.task_name = f'{func.__module__}.{func.__name__}'
+    return func
+
+
+def enqueue(func, delay=0, max_attempts=None, **kwargs):
+    """Queue func(**kwargs) to run in a worker, delay seconds from now, and return the Task"""
+    return Task.objects.create(
+        name=func.task_name,
+        kwargs=kwargs,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or getattr(settings, 'TASK_MAX_ATTEMPTS', 5),
+    )
+
+
+def resolve(name):
+    """Import the task function for name; only functions marked with @task run"""
+    func = import_string(name)
+    if getattr(func, 'task_name', None) != name:
+        raise ValueError(f'{name} is not a registered task.')
+    return func
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker, limit=1):
+    """Mark up to limit due tasks as running for worker and return them"""
+    now = timezone.now()
+    due = Task.objects.filter(status='queued', run_at__lte=now).order_by('run_at', 'id')
+    claimed = {'status': 'running', 'locked_by': worker, 'locked_at': now, 'attempts': F('attempts') + 1}
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            Task.objects.filter(pk__in=ids).update(**claimed)
+    else:
+        # No row locks: each worker tries the same candidates, and a task
+        # somebody else claimed first updates no rows
+        ids = [
+            pk for pk in due.values_list('id', flat=True)[:limit]
+            if Task.objects.filter(pk=pk, status='queued').update(**claimed)
+        ]
+    return list(Task.objects.filter(pk__in=ids).order_by('run_at', 'id'))
+
+
+def retry_delay(attempts):
+    """Seconds before attempt number attempts + 1, doubling each time with some jitter"""
+    base = getattr(settings, 'TASK_RETRY_DELAY', 10)
+    delay = min(base * 2 ** max(attempts - 1, 0), getattr(settings, 'TASK_RETRY_MAX_DELAY', 3600))
+    return delay * random.uniform(1, 1.25)
+
+
+def run(task):
+    """Run a claimed task in its own transaction and record the outcome"""
+    try:
+        with transaction.atomic():
+            resolve(task.name)(**task.kwargs)
+    except Exception:
+        fail(task, traceback.format_exc())
+        return False
+    Task.objects.filter(pk=task.pk).update(
+        status='done', finished_at=timezone.now(), last_error='', locked_by='', locked_at=None,
+    )
+    return True
+
+
+def fail(task, error):
+    """Queue the task again after a backoff, or mark it dead once its attempts are used up"""
+    now = timezone.now()
+    released = {'last_error': error, 'locked_by': '', 'locked_at': None}
+    if task.attempts >= task.max_attempts:
+        logger.error('Task %s (#%d) is dead after %d attempts:\n%s', task.name, task.pk, task.attempts, error)
+        Task.objects.filter(pk=task.pk).update(status='dead', finished_at=now, **released)
+    else:
+        logger.warning('Task %s (#%d) failed, attempt %d of %d', task.name, task.pk, task.attempts, task.max_attempts)
+        Task.objects.filter(pk=task.pk).update(
+            status='queued', run_at=now + timedelta(seconds=retry_delay(task.attempts)), **released,
+        )
+
+
+def release_stale():
+    """Hand tasks whose worker stopped mid-run back to the queue; returns how many"""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'TASK_LOCK_TIMEOUT', 600))
+    stale = Task.objects.filter(status='running', locked_at__lt=cutoff)
+    for task in stale:
+        fail(task, f'Worker {task.locked_by} did not finish the task.')
+    return len(stale)
+
+
+def purge_finished():
+    """Delete done tasks older than TASK_KEEP_DONE_DAYS; dead ones stay for inspection"""
+    cutoff = timezone.now() - timedelta(days=getattr(settings, 'TASK_KEEP_DONE_DAYS', 7))
+    return Task.objects.filter(status='done', finished_at__lt=cutoff).delete()[0]
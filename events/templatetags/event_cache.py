@@ -0,0 +1,57 @@
+from django import template
+
+from .. import cache as event_cache
+
+register = template.Library()
+
+
+class EventFragmentNode(template.Node):
+    def __init__(self, nodelist, name, event, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.event = event
+        self.vary_on = vary_on
+
+    def render(self, context):
+        event = self.event.resolve(context)
+        version = getattr(event, 'cache_version', None)
+        if version is None:
+            version = event_cache.get_versions([event.pk])[event.pk]
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        key = event_cache.fragment_key(self.name, event.pk, version, vary_on)
+
+        cache = event_cache.fragment_cache()
+        value = cache.get(key)
+        event_cache.record(value is not None, context.get('request'))
+        if value is None:
+            value = self.nodelist.render(context)
+            cache.set(key, value, event_cache.FRAGMENT_TIMEOUT)
+        return value
+
+
+@register.tag('eventcache')
+def do_eventcache(parser, token):
+    """Cache a fragment for one event until that event changes.
+
+    Usage: {% eventcache "card" event [vary_on ...] %} ... {% endeventcache %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError("'%s' takes at least two arguments." % bits[0])
+    nodelist = parser.parse(('endeventcache',))
+    parser.delete_first_token()
+    return EventFragmentNode(
+        nodelist,
+        bits[1].strip('\'"'),
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
+
+
+@register.simple_tag(takes_context=True)
+def fragment_cache_stats(context):
+    request = context.get('request')
+    return {
+        'request': getattr(request, 'fragment_cache_stats', {}),
+        'process': event_cache.fragment_stats,
+    }
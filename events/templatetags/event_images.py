@@ -0,0 +1,37 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from .. import images
+
+register = template.Library()
+
+
+@register.filter
+def variant_url(instance, variant):
+    """URL of one image variant: {{ event.eventimage|variant_url:"card" }}"""
+    return images.variant_url(instance, variant)
+
+
+@register.filter
+def image_srcset(instance, key='jpeg'):
+    """srcset of every variant: {{ category|image_srcset }} or {{ category|image_srcset:"webp" }}"""
+    return images.srcset(instance, key)
+
+
+@register.simple_tag
+def responsive_image(instance, variant, sizes='100vw', **attrs):
+    """A <picture> offering the WebP variants, with a JPEG <img> fallback.
+
+    Usage: {% responsive_image event.eventimage "card" sizes="(min-width: 992px) 33vw, 100vw" alt=event.name class="card-img-top" %}
+    variant is the size used as the plain src; the browser picks from the
+    srcset using sizes. Before the variants exist the original upload is used.
+    """
+    attributes = format_html_join('', ' {}="{}"', sorted(attrs.items()))
+    webp = images.srcset(instance, 'webp')
+    if not webp:
+        return format_html('<img src="{}"{}>', images.variant_url(instance, variant), attributes)
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}"{}></picture>',
+        webp, sizes, images.variant_url(instance, variant), images.srcset(instance), sizes, attributes,
+    )
@@ -0,0 +1,21 @@
+from django import template
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+@register.simple_tag
+def font_src(ttf):
+    """@font-face src for a TrueType font, offering its WOFF2 copy first when it exists.
+
+    Usage: @font-face { font-family: JuneBug; src: {% font_src 'fonts/Minion-Regular.ttf' %}; }
+    collectstatic only writes the WOFF2 with fontTools and brotli installed,
+    and never under runserver, so without it the TrueType file is the only source.
+    """
+    truetype = format_html("url({}) format('truetype')", static(ttf))
+    woff2 = ttf[:-len('.ttf')] + '.woff2'
+    if not staticfiles_storage.exists(woff2):
+        return truetype
+    return format_html("url({}) format('woff2'), {}", static(woff2), truetype)
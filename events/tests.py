@@ -0,0 +1,670 @@
+import datetime
+import io
+import json
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import cache as event_cache, calendar, closeout, db, imports, lifecycle, tasks
+from .models import (
+    JOIN_CLOSED, JOIN_REGISTERED, JOIN_WAITLISTED, REGISTERED_ATTEND_STATUSES, AdminMessage, CoinTransaction, Event,
+    EventCategory, EventComment, EventMember, LeaderboardBucket, Task, UserCoin,
+)
+from .profiling import KEY_VIEWS, QueryBudgetTestMixin, assert_uses_indexes, key_querysets
+
+
+def make_event(maximum_attende, **kwargs):
+    category, _ = EventCategory.objects.get_or_create(name='Test', defaults={'code': 'T0001', 'priority': 1})
+    today = timezone.localdate()
+    return Event.objects.create(**{
+        'category': category,
+        'name': 'Test event',
+        'description': 'Test',
+        'scheduled_status': 'scheduled',
+        'venue': 'Main Hall',
+        'start_date': today + datetime.timedelta(days=7),
+        'end_date': today + datetime.timedelta(days=8),
+        'points': 10,
+        'maximum_attende': maximum_attende,
+        **kwargs,
+    })
+
+
+def make_users(count, prefix='user'):
+    User.objects.bulk_create(User(username=f'{prefix}{i}') for i in range(count))
+    return list(User.objects.filter(username__startswith=prefix).order_by('id'))
+
+
+class ConcurrentJoinTests(TransactionTestCase):
+    """register_member under real concurrency: every join runs on its own thread and connection"""
+    seats = 50
+    joins = 200
+
+    def test_concurrent_joins_never_overbook(self):
+        event = make_event(self.seats)
+        users = make_users(self.joins)
+        start = threading.Barrier(self.joins)
+        outcomes, errors = [], []
+
+        def join(user):
+            try:
+                start.wait()
+                outcomes.append(Event.objects.get(pk=event.pk).register_member(user))
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=join, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(outcomes.count(JOIN_REGISTERED), self.seats)
+        self.assertEqual(outcomes.count(JOIN_WAITLISTED), self.joins - self.seats)
+
+        event.refresh_from_db()
+        members = EventMember.objects.filter(event=event)
+        registered = members.filter(attend_status__in=REGISTERED_ATTEND_STATUSES).count()
+        self.assertEqual(registered, self.seats)
+        self.assertEqual(event.registered_count, registered)
+        self.assertEqual(event.waiting_count, members.filter(attend_status='waiting').count())
+        positions = sorted(members.filter(attend_status='waitlisted').values_list('waitlist_position', flat=True))
+        self.assertEqual(positions, list(range(1, self.joins - self.seats + 1)))
+
+
+class QueryPlanTests(TestCase):
+    """EXPLAIN every hot filter: a full table scan or an unindexed sort fails the build"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = make_event(10)
+        cls.user = make_users(1)[0]
+        cls.event.register_member(cls.user)
+
+    def test_hot_filters_use_indexes(self):
+        for label, queryset, allow_sort in key_querysets(self.event.pk, self.user.pk):
+            with self.subTest(label):
+                assert_uses_indexes(queryset, label, allow_sort)
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Every KEY_VIEWS page stays within its QUERY_BUDGETS entry"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(username='staff', is_staff=True, is_superuser=True)
+        cls.user = User.objects.create(username='member')
+        cls.event = make_event(20, created_user=cls.staff, updated_user=cls.staff)
+        for user in make_users(15, prefix='attendee') + [cls.user]:
+            cls.event.register_member(user)
+        for i in range(5):
+            comment = EventComment.objects.create(event=cls.event, user=cls.user, comment=f'Comment {i}')
+            EventComment.objects.create(event=cls.event, user=cls.staff, comment=f'Reply {i}', parent=comment)
+        AdminMessage.objects.create(
+            sender=cls.user, sender_email='member@example.com', subject='Hello', message='Hello',
+        )
+
+    def setUp(self):
+        # Pages cached by an earlier test would hide the queries
+        event_cache.clear()
+
+    def test_key_views_within_budget(self):
+        users = {'anonymous': None, 'user': self.user, 'staff': self.staff}
+        for url_name, role, needs_event in KEY_VIEWS:
+            with self.subTest(url_name):
+                self.client.logout()
+                if users[role]:
+                    self.client.force_login(users[role])
+                self.assertViewWithinBudget(url_name, args=[self.event.pk] if needs_event else [])
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = make_event(10)
+
+    def setUp(self):
+        event_cache.clear()
+
+    @override_settings(DEBUG=True, INTERNAL_IPS=['127.0.0.1'])
+    def test_debug_panel_never_reaches_the_shared_copy(self):
+        url = reverse('public-events')
+        internal = self.client.get(url, REMOTE_ADDR='127.0.0.1')
+        self.assertContains(internal, 'fragment-cache-debug')
+        self.assertNotIn('X-Page-Cache', internal)
+
+        for expected in ('miss', 'hit'):
+            external = self.client.get(url, REMOTE_ADDR='8.8.8.8')
+            self.assertEqual(external['X-Page-Cache'], expected)
+            self.assertNotContains(external, 'fragment-cache-debug')
+
+
+class WaitlistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = make_event(2)
+        cls.users = make_users(3)
+        for user in cls.users:
+            cls.event.register_member(user)
+
+    def member(self, user):
+        return EventMember.objects.get(event=self.event, user=user)
+
+    def test_cancelling_promotes_the_head_of_the_waitlist(self):
+        first = self.member(self.users[0])
+        first.attend_status = 'cancelled'
+        first.save()
+        self.assertEqual(self.member(self.users[2]).attend_status, 'waiting')
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_count, 2)
+
+    def test_closed_event_is_not_reported_full(self):
+        Event.objects.filter(pk=self.event.pk).update(status='cancel')
+        outcome = self.event.register_member(User.objects.create(username='late'))
+        self.assertEqual(outcome, JOIN_CLOSED)
+
+    def test_marking_attendance_promotes_nobody(self):
+        for user, status in zip(self.users, ('completed', 'absent')):
+            member = self.member(user)
+            member.attend_status = status
+            member.save()
+        self.assertEqual(self.member(self.users[2]).attend_status, 'waitlisted')
+
+
+class StaffRegistrationTests(TestCase):
+    """Registrations saved by staff go through the same seat claim as joins"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(username='staff', is_staff=True, is_superuser=True)
+        cls.event = make_event(1)
+        cls.users = make_users(2)
+        cls.event.register_member(cls.users[0])
+        cls.event.register_member(cls.users[1])
+
+    def test_new_registration_on_a_full_event_is_waitlisted(self):
+        member = EventMember(
+            event=self.event, user=self.staff, attend_status='attending', status='active',
+            created_user=self.staff, updated_user=self.staff,
+        )
+        member.save()
+        self.assertEqual(member.attend_status, 'waitlisted')
+        self.assertEqual(member.waitlist_position, 2)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_count, 1)
+
+    def test_admin_cannot_seat_a_waitlisted_member_on_a_full_event(self):
+        member = EventMember.objects.get(user=self.users[1])
+        self.client.force_login(self.staff)
+        response = self.client.post(reverse('admin:events_eventmember_change', args=[member.pk]), {
+            'event': self.event.pk, 'user': member.user_id, 'attend_status': 'waiting', 'status': 'active',
+            'created_user': member.user_id, 'updated_user': self.staff.pk,
+        }, follow=True)
+        self.assertContains(response, 'was waitlisted')
+        member.refresh_from_db()
+        self.assertEqual(member.attend_status, 'waitlisted')
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.registered_count, 1)
+
+    def test_waitlisted_member_is_seated_when_a_seat_is_free(self):
+        Event.objects.filter(pk=self.event.pk).update(maximum_attende=2)
+        member = EventMember.objects.get(user=self.users[1])
+        member.attend_status = 'waiting'
+        member.save()
+        self.assertEqual(member.attend_status, 'waiting')
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.registered_count, self.event.waiting_count), (2, 2))
+
+
+class CloseOutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+        cls.event = make_event(10, points=5)
+        cls.users = make_users(3)
+        for user in cls.users:
+            cls.event.register_member(user)
+
+    def members(self):
+        return {m.user_id: m for m in EventMember.objects.filter(event=self.event)}
+
+    def close_out(self, *users):
+        members = self.members()
+        return closeout.close_out_event(self.event, [members[user.pk].pk for user in users], self.staff)
+
+    def test_submitting_the_same_close_out_twice_credits_once(self):
+        first = self.close_out(*self.users[:2])
+        self.assertEqual((first.completed, first.absent, first.credited), (2, 1, 2))
+        self.assertTrue(first.newly_completed)
+
+        again = self.close_out(*self.users[:2])
+        self.assertEqual((again.completed, again.absent, again.credited), (2, 1, 0))
+        self.assertFalse(again.newly_completed)
+        self.assertEqual(CoinTransaction.objects.filter(event=self.event).count(), 2)
+        self.assertEqual(
+            {user_id: m.points_awarded for user_id, m in self.members().items()},
+            {self.users[0].pk: True, self.users[1].pk: True, self.users[2].pk: False},
+        )
+
+    def test_credited_member_stays_completed_when_unticked(self):
+        self.close_out(self.users[0])
+        result = self.close_out(self.users[1])
+        self.assertEqual(result.credited, 1)
+        members = self.members()
+        self.assertEqual(members[self.users[0].pk].attend_status, 'completed')
+        self.assertEqual(members[self.users[2].pk].attend_status, 'absent')
+        self.assertEqual(
+            UserCoin.objects.filter(user__in=self.users).values_list('gain_coin', flat=True).distinct().get(), 5,
+        )
+
+
+class CoinLedgerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+        cls.event = make_event(10, points=5)
+        cls.users = make_users(3)
+
+    def balance(self, user):
+        return UserCoin.objects.filter(user=user).values_list('gain_coin', flat=True).first()
+
+    def test_closing_out_again_after_rejoining_does_not_credit_twice(self):
+        user = self.users[0]
+        self.event.register_member(user)
+        member = EventMember.objects.get(event=self.event, user=user)
+        self.assertEqual(closeout.close_out_event(self.event, [member.pk], self.staff).credited, 1)
+
+        member.delete()
+        Event.objects.filter(pk=self.event.pk).update(status='active')
+        self.event.register_member(user)
+        member = EventMember.objects.get(event=self.event, user=user)
+        self.assertEqual(closeout.close_out_event(self.event, [member.pk], self.staff).credited, 0)
+
+        member.refresh_from_db()
+        self.assertTrue(member.points_awarded)
+        self.assertEqual(self.balance(user), 5)
+        self.assertEqual(CoinTransaction.objects.filter(user=user, event=self.event).count(), 1)
+
+    def assertLedgerConsistent(self):
+        buckets = dict(LeaderboardBucket.objects.values_list('balance', 'user_count'))
+        self.assertEqual(buckets, LeaderboardBucket.compute())
+        for coin in UserCoin.objects.all():
+            ledger = CoinTransaction.objects.filter(user_id=coin.user_id).order_by('id')
+            self.assertEqual(sum(ledger.values_list('delta', flat=True)), coin.gain_coin)
+            self.assertEqual(ledger.last().balance, coin.gain_coin)
+
+    def test_awards_and_corrections_keep_balances_ledger_and_buckets_together(self):
+        ids = [user.pk for user in self.users]
+        CoinTransaction.award(ids, 10, self.staff, gain_type='others')
+        CoinTransaction.award(ids[:2], 5, self.staff, event=self.event)
+        CoinTransaction.award(ids[:1], -3, self.staff, gain_type='others', note='Correction')
+        self.assertEqual([self.balance(user) for user in self.users], [12, 15, 10])
+        self.assertEqual([LeaderboardBucket.rank(balance) for balance in (15, 12, 10)], [1, 2, 3])
+        self.assertLedgerConsistent()
+
+        with self.assertRaises(ValueError):
+            CoinTransaction.award(ids, -11, self.staff, gain_type='others')
+        self.assertEqual([self.balance(user) for user in self.users], [12, 15, 10])
+        self.assertLedgerConsistent()
+
+    def test_deleting_a_balance_removes_it_from_the_leaderboard(self):
+        CoinTransaction.award([user.pk for user in self.users], 10, self.staff, gain_type='others')
+        UserCoin.objects.get(user=self.users[0]).delete()
+        self.assertEqual(dict(LeaderboardBucket.objects.values_list('balance', 'user_count')), {10: 2})
+        self.assertEqual(LeaderboardBucket.rank(5), 3)
+
+
+class CoinExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+        cls.event = make_event(10, points=5)
+        cls.other = make_event(10, name='Other event', points=3)
+        cls.user = make_users(1)[0]
+        CoinTransaction.award([cls.user.pk], 5, cls.staff, event=cls.event)
+        CoinTransaction.award([cls.user.pk], 3, cls.staff, event=cls.other)
+        CoinTransaction.award([cls.user.pk], -2, cls.staff, gain_type='others', note='Correction')
+
+    def export(self, **filters):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('export-dataset', args=['coins', 'jsonl']), filters)
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in response.streaming_content]
+
+    def test_exports_ledger_rows(self):
+        rows = self.export()
+        self.assertEqual([row['delta'] for row in rows], [5, 3, -2])
+        self.assertEqual([row['balance'] for row in rows], [5, 8, 6])
+        self.assertEqual(rows[0]['event'], 'Test event')
+        self.assertEqual(rows[0]['created_by'], 'staff')
+
+    def test_filters_apply_to_the_ledger(self):
+        self.assertEqual([row['delta'] for row in self.export(event=self.other.pk)], [3])
+        self.assertEqual([row['delta'] for row in self.export(status='others')], [-2])
+        tomorrow = timezone.localdate() + datetime.timedelta(days=1)
+        self.assertEqual(self.export(date_from=tomorrow.isoformat()), [])
+
+
+class SqliteProfileTests(TestCase):
+    def test_default_profile_keeps_sqlite_defaults(self):
+        self.assertEqual(db.pragmas(), {})
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            # 2 is FULL, SQLite's default; the production profile sets NORMAL
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    @override_settings(SQLITE_PROFILE='production', SQLITE_PRAGMAS={'synchronous': 'NORMAL'})
+    def test_production_profile_reads_the_settings(self):
+        self.assertEqual(db.pragmas(), {'synchronous': 'NORMAL'})
+
+
+class CalendarFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = make_event(10)
+
+    def setUp(self):
+        event_cache.clear()
+
+    def test_unknown_category_is_a_404_even_with_a_current_etag(self):
+        url = reverse('category-calendar-feed', args=[self.event.category_id])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        EventCategory.objects.filter(pk=self.event.category_id).update(status='disabled')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 404)
+
+    def feed(self, user):
+        return reverse('user-calendar-feed', args=[calendar.feed_token(user)])
+
+    def test_personal_feed_lists_the_token_owners_events(self):
+        owner, other = make_users(2)
+        self.event.register_member(owner)
+        response = self.client.get(self.feed(owner))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn(b'SUMMARY:Test event', b''.join(response.streaming_content))
+        self.assertNotIn(b'SUMMARY:', b''.join(self.client.get(self.feed(other)).streaming_content))
+
+    def test_tampered_or_foreign_tokens_are_a_404(self):
+        owner = make_users(1)[0]
+        token = calendar.feed_token(owner)
+        user_id, signature = token.split(':', 1)
+        for bad in (f'{owner.pk + 1}:{signature}', f'{user_id}:{signature[::-1]}', user_id, 'garbage'):
+            with self.subTest(bad):
+                self.assertEqual(self.client.get(reverse('user-calendar-feed', args=[bad])).status_code, 404)
+
+
+class EventListPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+        for i in range(25):
+            make_event(10, name=f'Event {i}')
+            AdminMessage.objects.create(sender=cls.staff, sender_email='staff@example.com', subject='Hi', message='Hi')
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def names(self, response):
+        return [event.name for event in response.context['events']]
+
+    def test_cursor_pages_walk_forward_and_back(self):
+        url = reverse('event-list')
+        first = self.client.get(url)
+        self.assertEqual(self.names(first), [f'Event {i}' for i in range(24, 4, -1)])
+        self.assertFalse(first.context['page_obj'].has_previous)
+
+        second = self.client.get(f"{url}?{first.context['page_obj'].next_querystring}")
+        self.assertEqual(self.names(second), [f'Event {i}' for i in range(4, -1, -1)])
+        self.assertFalse(second.context['page_obj'].has_next)
+
+        back = self.client.get(f"{url}?{second.context['page_obj'].previous_querystring}")
+        self.assertEqual(self.names(back), self.names(first))
+
+    def test_message_badge_counts_every_message(self):
+        response = self.client.get(reverse('admin-message-list'))
+        self.assertEqual(len(response.context['page_obj']), 20)
+        self.assertContains(response, '25 Total Messages')
+
+
+class RegistrationImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+        cls.users = make_users(4)
+        for user in cls.users:
+            user.email = f'{user.username}@example.com'
+            user.save()
+
+    def run_import(self, event, *rows):
+        upload = io.BytesIO('\n'.join(('username',) + rows).encode())
+        return imports.import_registrations(event, upload, self.staff)
+
+    def assertCountersMatch(self, event):
+        event.refresh_from_db()
+        members = EventMember.objects.filter(event=event)
+        self.assertEqual(event.registered_count, members.filter(attend_status__in=REGISTERED_ATTEND_STATUSES).count())
+        self.assertEqual(event.waiting_count, members.filter(attend_status='waiting').count())
+
+    def test_rejects_duplicates_unknown_users_and_registered_users(self):
+        event = make_event(10)
+        event.register_member(self.users[0])
+        result = self.run_import(event, 'user0', 'user1', 'user1@example.com', 'nobody')
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.rejected, [
+            (2, 'user0', 'already registered'),
+            (4, 'user1@example.com', 'duplicate in file'),
+            (5, 'nobody', 'no active user'),
+        ])
+        self.assertCountersMatch(event)
+
+    def test_rows_past_capacity_are_rejected_as_full(self):
+        event = make_event(2)
+        result = self.run_import(event, 'user0', 'user1', 'user2')
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.rejected, [(4, 'user2', 'event is full')])
+        self.assertCountersMatch(event)
+
+    def test_user_who_registers_during_the_import_keeps_one_seat(self):
+        event = make_event(10)
+        claim_seats = imports.claim_seats
+
+        def register_first(*args):
+            # user1 joins after the file was checked but before the rows go in
+            event.register_member(self.users[1])
+            return claim_seats(*args)
+
+        with mock.patch.object(imports, 'claim_seats', side_effect=register_first):
+            result = self.run_import(event, 'user0', 'user1')
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.rejected, [(3, 'user1', 'already registered')])
+        self.assertEqual(EventMember.objects.filter(event=event, user=self.users[1]).count(), 1)
+        self.assertCountersMatch(event)
+
+
+@tasks.task
+def record_task(value):
+    TaskQueueTests.calls.append(value)
+
+
+@tasks.task
+def failing_task():
+    raise RuntimeError('boom')
+
+
+class TaskQueueTests(TestCase):
+    calls = []
+
+    def setUp(self):
+        TaskQueueTests.calls = []
+
+    def test_each_due_task_is_claimed_once(self):
+        first = tasks.enqueue(record_task, value=1)
+        second = tasks.enqueue(record_task, value=2)
+        tasks.enqueue(record_task, delay=60, value=3)
+        self.assertEqual(tasks.claim('worker-1'), [first])
+        self.assertEqual(tasks.claim('worker-2', limit=5), [second])
+        self.assertEqual(tasks.claim('worker-3', limit=5), [])
+
+        for task in (first, second):
+            task.refresh_from_db()
+            self.assertTrue(tasks.run(task))
+        self.assertEqual(self.calls, [1, 2])
+        self.assertEqual(Task.objects.filter(status='done', attempts=1).count(), 2)
+
+    def test_failures_back_off_then_die(self):
+        task = tasks.enqueue(failing_task, max_attempts=2)
+        with self.assertLogs('events.tasks', 'WARNING'):
+            self.assertFalse(tasks.run(tasks.claim('worker')[0]))
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts, task.locked_by), ('queued', 1, ''))
+        self.assertIn('RuntimeError: boom', task.last_error)
+        self.assertGreater(task.run_at, timezone.now())
+        self.assertEqual(tasks.claim('worker'), [])
+
+        Task.objects.filter(pk=task.pk).update(run_at=timezone.now())
+        with self.assertLogs('events.tasks', 'ERROR'):
+            self.assertFalse(tasks.run(tasks.claim('worker')[0]))
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), ('dead', 2))
+
+    def test_unregistered_names_never_run(self):
+        Task.objects.create(name='events.tests.TaskQueueTests', max_attempts=1)
+        with self.assertLogs('events.tasks', 'ERROR'):
+            self.assertFalse(tasks.run(tasks.claim('worker')[0]))
+        self.assertEqual(Task.objects.get().status, 'dead')
+
+    def test_stale_tasks_are_released(self):
+        task = tasks.enqueue(record_task, value=1)
+        tasks.claim('gone')
+        Task.objects.filter(pk=task.pk).update(locked_at=timezone.now() - datetime.timedelta(hours=1))
+        with self.assertLogs('events.tasks', 'WARNING'):
+            self.assertEqual(tasks.release_stale(), 1)
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'queued')
+        self.assertIn('gone', task.last_error)
+
+
+class EventApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = make_event(10)
+        cls.event.register_member(make_users(1)[0])
+
+    def setUp(self):
+        event_cache.clear()
+
+    def test_fields_choose_the_keys(self):
+        response = self.client.get(reverse('api-event-detail', args=[self.event.pk]), {'fields': 'name,registered'})
+        self.assertEqual(response.json(), {'name': 'Test event', 'registered': 1})
+
+        response = self.client.get(reverse('api-events'), {'fields': 'id,category'})
+        self.assertEqual(response.json()['events'], [
+            {'id': self.event.pk, 'category': {'id': self.event.category_id, 'name': 'Test', 'code': 'T0001'}},
+        ])
+
+    def test_unknown_fields_are_a_400(self):
+        response = self.client.get(reverse('api-events'), {'fields': 'name,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertContains(response, 'password', status_code=400)
+
+    def test_etag_answers_304_until_the_event_changes(self):
+        url = reverse('api-event-detail', args=[self.event.pk])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.event.name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['name'], 'Renamed')
+
+
+class LifecycleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.localdate()
+        past = {'start_date': today - datetime.timedelta(days=3), 'end_date': today - datetime.timedelta(days=2)}
+        cls.attended = make_event(2, name='Attended', **past)
+        cls.untaken = make_event(2, name='Untaken', **past)
+        cls.upcoming = make_event(2, name='Upcoming')
+        users = make_users(3)
+        for event in (cls.attended, cls.untaken, cls.upcoming):
+            for user in users:
+                event.register_member(user)
+        first = EventMember.objects.get(event=cls.attended, user=users[0])
+        first.attend_status = 'completed'
+        first.save()
+
+    def statuses(self, event):
+        return sorted(EventMember.objects.filter(event=event).values_list('attend_status', 'status'))
+
+    def test_events_that_are_over_move_on_once(self):
+        with self.assertLogs('events.lifecycle', 'INFO'):
+            run = lifecycle.advance(batch_size=1)
+        self.assertEqual((run.completed, run.timed_out, run.waitlist_cancelled, run.marked_absent), (1, 1, 2, 1))
+        self.assertIsNotNone(run.pk)
+
+        self.attended.refresh_from_db()
+        self.assertEqual((self.attended.status, self.attended.registered_count), ('completed', 0))
+        self.assertEqual(self.statuses(self.attended), [
+            ('absent', 'completed'), ('cancelled', 'completed'), ('completed', 'completed'),
+        ])
+        self.assertEqual(Event.objects.get(pk=self.untaken.pk).status, 'time out')
+        self.assertEqual(self.statuses(self.untaken), [
+            ('cancelled', 'completed'), ('waiting', 'completed'), ('waiting', 'completed'),
+        ])
+        self.assertEqual(Event.objects.get(pk=self.upcoming.pk).status, 'active')
+        self.assertEqual(self.statuses(self.upcoming), [
+            ('waiting', 'active'), ('waiting', 'active'), ('waitlisted', 'active'),
+        ])
+
+        again = lifecycle.advance()
+        self.assertEqual((again.completed, again.timed_out, again.members_closed), (0, 0, 0))
+        self.assertIsNone(again.pk)
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_users(1)[0]
+        cls.event = make_event(10)
+
+        def comment(text, parent=None, status='active'):
+            return EventComment.objects.create(
+                event=cls.event, user=cls.user, comment=text, parent=parent, status=status,
+            )
+
+        cls.root = comment('Root')
+        shown = comment('Shown reply', cls.root)
+        comment('Reply to shown', shown)
+        hidden = comment('Hidden reply', cls.root, status='hidden')
+        comment('Reply to hidden', hidden)
+        cls.other = comment('Other root')
+
+    def test_hidden_comment_takes_its_subtree_out_of_the_thread(self):
+        roots = EventComment.objects.filter(event=self.event, status='active').tree()
+        self.assertEqual([root.comment for root in roots], ['Other root', 'Root'])
+        root = roots[1]
+        self.assertEqual(root.reply_count, 2)
+        self.assertEqual([child.comment for child in root.children], ['Shown reply'])
+        self.assertEqual([child.comment for child in root.children[0].children], ['Reply to shown'])
+
+    def test_page_reply_counts_match_the_thread(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('event-comment-page', args=[self.event.pk]), {'format': 'json'})
+        counts = {comment['id']: comment['reply_count'] for comment in response.json()['comments']}
+        self.assertEqual(counts, {self.root.pk: 2, self.other.pk: 0})
+
+        thread = self.client.get(reverse('comment-thread', args=[self.root.pk]))
+        self.assertContains(thread, 'Reply to shown')
+        self.assertNotContains(thread, 'Reply to hidden')
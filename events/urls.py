@@ -18,12 +18,29 @@ from .views import (
     RemoveEventMemberDeleteView,
     RemoveEventUserWishDeleteView,
     CreateUserMark,
+    UserMarkList,
+    leaderboard,
+    leaderboard_api,
+    export_dataset,
+    import_registrations,
+    close_out_event,
     
     # Public Views
     PublicEventListView,
     PublicEventDetailView,
     join_event,
     public_search_events,
+
+    # JSON API Views
+    EventApiListView,
+    event_api_detail,
+    event_api_batch,
+    category_api_list,
+
+    # Calendar Feed Views
+    calendar_feed,
+    category_calendar_feed,
+    user_calendar_feed,
     
     # Admin Message Views
     AdminMessageListView,
@@ -34,6 +51,8 @@ from .views import (
     
     # Event Comment Views
     EventDetailWithCommentsView,
+    EventCommentPageView,
+    comment_thread,
     add_event_comment,
     reply_to_comment,
 )
@@ -58,12 +77,29 @@ urlpatterns = [
     path('remove-member/<int:pk>/', RemoveEventMemberDeleteView.as_view(), name='remove-event-member'),
     path('remove-wish/<int:pk>/', RemoveEventUserWishDeleteView.as_view(), name='remove-event-user-wish'),
     path('create-user-mark/', CreateUserMark.as_view(), name='create-user-mark'),
+    path('user-mark/', UserMarkList.as_view(), name='user-mark'),  # Admin view - coin balances
+    path('leaderboard/', leaderboard, name='leaderboard'),
+    path('leaderboard/api/', leaderboard_api, name='leaderboard-api'),
+    path('export/<slug:dataset>.<slug:fmt>', export_dataset, name='export-dataset'),  # Admin view - streaming CSV/JSONL
+    path('event/<int:pk>/import/', import_registrations, name='import-registrations'),  # Admin view - bulk CSV registration
+    path('event/<int:pk>/close-out/', close_out_event, name='close-out-event'),  # Admin view - bulk attendance and points
     
     # PUBLIC URLS - No Authentication Required
     path('public/', PublicEventListView.as_view(), name='public-events'),
     path('public/<int:pk>/', PublicEventDetailView.as_view(), name='public-event-detail'),
     path('public/search/', public_search_events, name='public-search-events'),
     
+    # JSON API URLS - Read only, no authentication required
+    path('api/events/', EventApiListView.as_view(), name='api-events'),
+    path('api/events/batch/', event_api_batch, name='api-event-batch'),
+    path('api/events/<int:pk>/', event_api_detail, name='api-event-detail'),
+    path('api/categories/', category_api_list, name='api-categories'),
+    
+    # ICALENDAR FEED URLS - Polled by calendar clients, no session
+    path('calendar/events.ics', calendar_feed, name='calendar-feed'),
+    path('calendar/category/<int:pk>.ics', category_calendar_feed, name='category-calendar-feed'),
+    path('calendar/my/<str:token>.ics', user_calendar_feed, name='user-calendar-feed'),
+    
     # ADMIN MESSAGE URLS
     path('admin/messages/', AdminMessageListView.as_view(), name='admin-message-list'),
     path('admin/messages/<int:pk>/', AdminMessageDetailView.as_view(), name='admin-message-detail'),
@@ -73,6 +109,8 @@ urlpatterns = [
     
     # EVENT COMMENT URLS
     path('event/<int:pk>/comments/', EventDetailWithCommentsView.as_view(), name='event-detail-with-comments'),
+    path('event/<int:pk>/comments/page/', EventCommentPageView.as_view(), name='event-comment-page'),
+    path('comment/<int:comment_id>/thread/', comment_thread, name='comment-thread'),
     path('event/<int:event_id>/comment/', add_event_comment, name='add-event-comment'),
     path('comment/<int:comment_id>/reply/', reply_to_comment, name='reply-to-comment'),
 ]
\ No newline at end of file
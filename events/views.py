@@ -1,18 +1,25 @@
+import csv
+
 from django.views.generic import (
     ListView,
     CreateView,
     UpdateView,
     DetailView,
     DeleteView,
+    FormView,
     View,
 )
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
+from django.db.models import Q
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 
 
 class AdminRequiredMixin(UserPassesTestMixin):
@@ -34,13 +41,19 @@ from .models import (
     EventMember,
     EventUserWishList,
     UserCoin,
+    CoinTransaction,
+    LeaderboardBucket,
     EventImage,
     EventAgenda,
     AdminMessage,
-    EventComment
-
+    EventComment,
+    JOIN_ALREADY_REGISTERED,
+    JOIN_CLOSED,
+    JOIN_WAITLISTED,
 )
-from .forms import EventForm, EventImageForm, EventAgendaForm, EventCreateMultiForm, AdminMessageForm, AdminMessageResponseForm, EventCommentForm, ContactForm
+from . import api, cache as event_cache, calendar, closeout, exports, imports
+from .pagination import CursorPaginationMixin
+from .forms import EventForm, EventImageForm, EventAgendaForm, EventCreateMultiForm, AdminMessageForm, AdminMessageResponseForm, EventCommentForm, ContactForm, ExportFilterForm, RegistrationImportForm, EventCloseOutForm, CoinAwardForm, EventApiFilterForm
 
 
 # ADMIN-ONLY VIEWS - Event Category Management
@@ -161,10 +174,15 @@ class EventCreateView(AdminRequiredMixin, CreateView):
 
 
 # ADMIN-ONLY VIEWS - Event Management
-class EventListView(AdminRequiredMixin, ListView):
+class EventListView(AdminRequiredMixin, CursorPaginationMixin, ListView):
+    """Every event, newest first, for administrators"""
     model = Event
     template_name = 'events/event_list.html'
     context_object_name = 'events'
+    cursor_page_size = 20
+
+    def get_queryset(self):
+        return Event.objects.with_capacity().select_related('category', 'eventimage')
 
 
 class EventUpdateView(AdminRequiredMixin, UpdateView):
@@ -194,15 +212,20 @@ class AddEventMemberCreateView(LoginRequiredMixin, CreateView):
     def form_valid(self, form):
         form.instance.created_user = self.request.user
         form.instance.updated_user = self.request.user
-        return super().form_valid(form)
+        requested = form.instance.attend_status
+        response = super().form_valid(form)
+        if requested != self.object.attend_status:
+            messages.warning(self.request, f'{self.object.event} is full, so {self.object.user} was added to the waitlist.')
+        return response
 
 
-class JoinEventListView(LoginRequiredMixin, ListView):
+class JoinEventListView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """Admin view to see all event registrations - ADMIN ONLY"""
     login_url = 'login'
     model = EventMember
     template_name = 'events/joinevent_list.html'
     context_object_name = 'eventmember'
+    cursor_page_size = 50
     
     def dispatch(self, request, *args, **kwargs):
         """Only allow admin/staff users to access this view"""
@@ -213,7 +236,7 @@ class JoinEventListView(LoginRequiredMixin, ListView):
     
     def get_queryset(self):
         """Return all event members for admin view"""
-        return EventMember.objects.all().order_by('-id')
+        return EventMember.objects.select_related('event', 'user')
 
 
 class UserEventListView(LoginRequiredMixin, ListView):
@@ -225,7 +248,19 @@ class UserEventListView(LoginRequiredMixin, ListView):
     
     def get_queryset(self):
         """Return only events registered by the current user"""
-        return EventMember.objects.filter(user=self.request.user)
+        return EventMember.objects.filter(user=self.request.user).select_related(
+            'event__category'
+        ).with_waitlist_rank()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Every registration is listed, so the total is the length of the
+        # rows already fetched for the table rather than another COUNT
+        context['registration_total'] = len(context['user_events'])
+        context['calendar_url'] = self.request.build_absolute_uri(
+            reverse('user-calendar-feed', args=[calendar.feed_token(self.request.user)])
+        )
+        return context
 
 
 class RemoveEventMemberDeleteView(LoginRequiredMixin, DeleteView):
@@ -313,12 +348,13 @@ class UpdateEventStatusView(LoginRequiredMixin, UpdateView):
     template_name = 'events/update_event_status.html'
 
 
-class CompleteEventList(LoginRequiredMixin, ListView):
+class CompleteEventList(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """Admin view to see all completed events - ADMIN ONLY"""
     login_url = 'login'
     model = Event
     template_name = 'events/complete_event_list.html'
     context_object_name = 'events'
+    cursor_page_size = 50
     
     def dispatch(self, request, *args, **kwargs):
         """Only allow admin/staff users to access this view"""
@@ -328,15 +364,16 @@ class CompleteEventList(LoginRequiredMixin, ListView):
         return super().dispatch(request, *args, **kwargs)
 
     def get_queryset(self):
-        return Event.objects.filter(status='completed').order_by('-id')
+        return Event.objects.filter(status='completed').select_related('category')
 
 
-class AbsenseUserList(LoginRequiredMixin, ListView):
+class AbsenseUserList(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """Admin view to see absent users - ADMIN ONLY"""
     login_url = 'login'
     model = EventMember
     template_name = 'events/absense_user_list.html'
     context_object_name = 'absenseuser'
+    cursor_page_size = 50
     
     def dispatch(self, request, *args, **kwargs):
         """Only allow admin/staff users to access this view"""
@@ -346,15 +383,16 @@ class AbsenseUserList(LoginRequiredMixin, ListView):
         return super().dispatch(request, *args, **kwargs)
 
     def get_queryset(self):
-        return EventMember.objects.filter(attend_status='absent').order_by('-id')
+        return EventMember.objects.filter(attend_status='absent').select_related('event', 'user')
 
 
-class CompleteEventUserList(LoginRequiredMixin, ListView):
+class CompleteEventUserList(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """Admin view to see users who completed events - ADMIN ONLY"""
     login_url = 'login'
     model = EventMember
     template_name = 'events/complete_event_user_list.html'
     context_object_name = 'completeuser'
+    cursor_page_size = 50
     
     def dispatch(self, request, *args, **kwargs):
         """Only allow admin/staff users to access this view"""
@@ -364,15 +402,15 @@ class CompleteEventUserList(LoginRequiredMixin, ListView):
         return super().dispatch(request, *args, **kwargs)
 
     def get_queryset(self):
-        return EventMember.objects.filter(attend_status='completed').order_by('-id')
+        return EventMember.objects.filter(attend_status='completed').select_related('event', 'user')
 
 
-class CreateUserMark(LoginRequiredMixin, CreateView):
-    """Admin view to create user marks - ADMIN ONLY"""
+class CreateUserMark(LoginRequiredMixin, FormView):
+    """Admin view to award user marks through the coin ledger - ADMIN ONLY"""
     login_url = 'login'
-    model = UserCoin
-    fields = ['user', 'gain_type', 'gain_coin', 'status']
+    form_class = CoinAwardForm
     template_name = 'events/create_user_mark.html'
+    success_url = reverse_lazy('user-mark')
     
     def dispatch(self, request, *args, **kwargs):
         """Only allow admin/staff users to access this view"""
@@ -382,17 +420,26 @@ class CreateUserMark(LoginRequiredMixin, CreateView):
         return super().dispatch(request, *args, **kwargs)
 
     def form_valid(self, form):
-        form.instance.created_user = self.request.user
-        form.instance.updated_user = self.request.user
+        user = form.cleaned_data['user']
+        try:
+            CoinTransaction.award(
+                [user.pk], form.cleaned_data['gain_coin'], self.request.user,
+                gain_type=form.cleaned_data['gain_type'], note=form.cleaned_data['note'],
+            )
+        except ValueError as error:
+            form.add_error('gain_coin', str(error))
+            return self.form_invalid(form)
+        messages.success(self.request, f'Recorded {form.cleaned_data["gain_coin"]:+d} coins for {user}.')
         return super().form_valid(form)
 
 
-class UserMarkList(LoginRequiredMixin, ListView):
+class UserMarkList(LoginRequiredMixin, CursorPaginationMixin, ListView):
     """Admin view to see all user marks - ADMIN ONLY"""
     login_url = 'login'
     model = UserCoin
     template_name = 'events/user_mark_list.html'
     context_object_name = 'usermark'
+    cursor_page_size = 50
     
     def dispatch(self, request, *args, **kwargs):
         """Only allow admin/staff users to access this view"""
@@ -402,7 +449,144 @@ class UserMarkList(LoginRequiredMixin, ListView):
         return super().dispatch(request, *args, **kwargs)
     
     def get_queryset(self):
-        return UserCoin.objects.all().order_by('-id')
+        return UserCoin.objects.select_related('user')
+
+
+# Rows on the leaderboard page, and the most the API returns
+LEADERBOARD_SIZE = 20
+LEADERBOARD_MAX = 100
+
+
+def coin_standing(user):
+    """The user's balance and leaderboard rank"""
+    balance = UserCoin.objects.filter(user=user).values_list('gain_coin', flat=True).first() or 0
+    return {'my_balance': balance, 'my_rank': LeaderboardBucket.rank(balance)}
+
+
+@login_required(login_url='login')
+def leaderboard(request):
+    """Top coin holders, the user's own rank and recent coin history"""
+    context = {
+        'top': LeaderboardBucket.top(LEADERBOARD_SIZE),
+        'history': request.user.coin_transactions.select_related('event').order_by('-created_at')[:10],
+        **coin_standing(request.user),
+    }
+    return render(request, 'events/leaderboard.html', context)
+
+
+@login_required(login_url='login')
+def leaderboard_api(request):
+    """Leaderboard as JSON: the top ?limit= users and the requesting user's rank"""
+    try:
+        limit = min(max(int(request.GET.get('limit', LEADERBOARD_SIZE)), 1), LEADERBOARD_MAX)
+    except ValueError:
+        return HttpResponseBadRequest('limit must be a number.')
+    standing = coin_standing(request.user)
+    return JsonResponse({
+        'top': [
+            {'rank': row.rank, 'user': row.user.username, 'balance': row.gain_coin}
+            for row in LeaderboardBucket.top(limit)
+        ],
+        'me': {'user': request.user.username, 'rank': standing['my_rank'], 'balance': standing['my_balance']},
+    })
+
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', exports.stream_csv),
+    'jsonl': ('application/x-ndjson', exports.stream_jsonl),
+}
+
+
+@login_required(login_url='login')
+def export_dataset(request, dataset, fmt):
+    """Stream registrations, attendance or the coin ledger as CSV or JSON Lines - ADMIN ONLY"""
+    if not request.user.is_staff:
+        messages.error(request, 'Access denied. Admin privileges required.')
+        return redirect('user-dashboard')
+    if dataset not in exports.DATASETS or fmt not in EXPORT_FORMATS:
+        raise Http404('Unknown export.')
+
+    form = ExportFilterForm(request.GET)
+    if not form.is_valid():
+        return HttpResponseBadRequest(form.errors.as_text())
+
+    content_type, stream = EXPORT_FORMATS[fmt]
+    headers, rows = exports.export_rows(dataset, form.cleaned_data)
+    response = StreamingHttpResponse(stream(headers, rows), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{fmt}"'
+    return response
+
+
+# Rejected rows listed on the import report page; the rest are only counted
+IMPORT_REPORT_ROWS = 200
+
+
+@login_required(login_url='login')
+def import_registrations(request, pk):
+    """Register attendees in bulk from an uploaded CSV of usernames or emails - ADMIN ONLY"""
+    if not request.user.is_staff:
+        messages.error(request, 'Access denied. Admin privileges required.')
+        return redirect('user-dashboard')
+    event = get_object_or_404(Event, pk=pk)
+
+    result = None
+    form = RegistrationImportForm(request.POST or None, request.FILES or None)
+    if request.method == 'POST' and form.is_valid():
+        try:
+            result = imports.import_registrations(
+                event, form.cleaned_data['file'], request.user, form.cleaned_data['attend_status'],
+            )
+        except (UnicodeDecodeError, csv.Error) as error:
+            form.add_error('file', f'Could not read the CSV file: {error}')
+        else:
+            messages.success(
+                request, f'Registered {result.created} attendee(s) for {event.name}; {len(result.rejected)} row(s) rejected.'
+            )
+
+    context = {
+        'event': event,
+        'form': form,
+        'result': result,
+        'rejected': result.rejected[:IMPORT_REPORT_ROWS] if result else [],
+    }
+    return render(request, 'events/import_registrations.html', context)
+
+
+@login_required(login_url='login')
+def close_out_event(request, pk):
+    """Mark attendance for a finished event and credit its points in one step - ADMIN ONLY"""
+    if not request.user.is_staff:
+        messages.error(request, 'Access denied. Admin privileges required.')
+        return redirect('user-dashboard')
+    event = get_object_or_404(Event, pk=pk)
+    if event.status in closeout.NOT_CLOSABLE_STATUSES:
+        messages.error(request, 'Cancelled or deleted events cannot be closed out.')
+        return redirect('event-detail', pk=event.pk)
+
+    members = closeout.close_out_members(event).select_related('user').order_by('user__username')
+    form = EventCloseOutForm(members, request.POST if request.method == 'POST' else None)
+    if request.method == 'POST' and form.is_valid():
+        result = closeout.close_out_event(
+            event, [member.pk for member in form.cleaned_data['attended']], request.user,
+        )
+        messages.success(
+            request,
+            f'Closed out {event.name}: {result.completed} completed, {result.absent} absent, '
+            f'{result.credited} credited with {event.points} point(s).',
+        )
+        return redirect('close-out-event', pk=event.pk)
+
+    if form.is_bound:
+        attended = {int(pk) for pk in form['attended'].value() if str(pk).isdigit()}
+    else:
+        attended = {member.pk for member in members if member.attend_status in ('attending', 'completed')}
+    context = {
+        'event': event,
+        'form': form,
+        'members': members,
+        'attended': attended,
+    }
+    return render(request, 'events/close_out_event.html', context)
 
 
 @login_required(login_url='login')
@@ -420,7 +604,7 @@ def search_event_category(request):
 def search_event(request):
     if request.method == 'POST':
        data = request.POST['search']
-       events = Event.objects.filter(name__icontains=data)
+       events = Event.objects.with_capacity().select_related('category', 'eventimage').search(data)
        context = {
            'events': events
        }
@@ -430,15 +614,23 @@ def search_event(request):
 
 # PUBLIC VIEWS FOR NON-AUTHENTICATED USERS
 
-class PublicEventListView(ListView):
+class PublicEventListView(CursorPaginationMixin, ListView):
     """Public event listing that doesn't require authentication"""
     model = Event
     template_name = 'events/public_event_list.html'
     context_object_name = 'events'
-    paginate_by = 10
+    cursor_ordering = ('-start_date', '-id')
+    cursor_page_size = 10
     
     def get_queryset(self):
-        return Event.objects.filter(status='active').order_by('-start_date')
+        return Event.objects.filter(status='active').with_capacity().select_related(
+            'category', 'eventimage'
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['events'] = event_cache.attach_versions(context['events'])
+        return context
 
 
 class PublicEventDetailView(DetailView):
@@ -456,59 +648,218 @@ def join_event(request, event_id):
     """Allow authenticated users to join an event"""
     event = get_object_or_404(Event, id=event_id, status='active')
     
-    # Check if user is already registered
-    existing_member = EventMember.objects.filter(event=event, user=request.user).first()
+    outcome = event.register_member(request.user)
+    event.refresh_from_db(fields=['registered_count', 'waiting_count'])
     
-    if existing_member:
+    if outcome == JOIN_ALREADY_REGISTERED:
         messages.warning(request, 'You are already registered for this event.')
+    elif outcome == JOIN_WAITLISTED:
+        position = EventMember.objects.with_waitlist_rank().get(event=event, user=request.user).waitlist_rank
+        messages.info(request, f'{event.name} is full, so you have been added to the waitlist at position {position}. You will get a seat automatically when one frees up.')
+    elif outcome == JOIN_CLOSED:
+        messages.error(request, f'Registration for {event.name} is closed.')
     else:
-        # Check if event is full using our new method
-        if event.is_full():
-            messages.error(request, f'This event is full. Registration closed. ({event.get_registration_count()}/{event.maximum_attende} registered)')
-        else:
-            # Register user for event
-            EventMember.objects.create(
-                event=event,
-                user=request.user,
-                attend_status='waiting',
-                status='active',
-                created_user=request.user,
-                updated_user=request.user
-            )
-            # Show updated count after registration
-            new_count = event.get_registration_count() + 1  # +1 because we just added one
-            messages.success(request, f'Successfully registered for {event.name}! ({new_count}/{event.maximum_attende} registered)')
+        messages.success(request, f'Successfully registered for {event.name}! ({event.get_registration_count()}/{event.maximum_attende} registered)')
     
     return redirect('public-event-detail', pk=event.id)
 
 
 def public_search_events(request):
     """Public event search functionality"""
-    events = Event.objects.filter(status='active').order_by('-start_date')
+    events = Event.objects.filter(status='active').with_capacity().select_related(
+        'category', 'eventimage'
+    ).order_by('-start_date')
     
     if request.method == 'POST':
         search_query = request.POST.get('search', '')
         if search_query:
-            events = events.filter(name__icontains=search_query)
+            events = events.search(search_query)
     
     context = {
-        'events': events,
+        'events': event_cache.attach_versions(events),
         'search_query': request.POST.get('search', '') if request.method == 'POST' else ''
     }
     return render(request, 'events/public_event_list.html', context)
 
 
+# READ-ONLY JSON API
+
+# Largest ?limit= the event list accepts
+API_PAGE_MAX = 100
+
+
+def api_response(request, etag, render_response):
+    """A 304 if the client already holds etag, otherwise render_response(); either way
+    carrying the ETag and asking caches to revalidate"""
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = render_response()
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+    return response
+
+
+class EventApiListView(CursorPaginationMixin, ListView):
+    """Active events as JSON, soonest-starting last, with ?fields=, filters and a cursor"""
+    model = Event
+    cursor_ordering = ('-start_date', '-id')
+    cursor_page_size = 20
+
+    def get(self, request, *args, **kwargs):
+        try:
+            self.fields = api.parse_fields(request.GET.get('fields'), api.EVENT_FIELDS, api.DEFAULT_EVENT_FIELDS)
+        except ValueError as error:
+            return HttpResponseBadRequest(str(error))
+        try:
+            self.cursor_page_size = min(max(int(request.GET.get('limit', self.cursor_page_size)), 1), API_PAGE_MAX)
+        except ValueError:
+            return HttpResponseBadRequest('limit must be a number.')
+        self.filters = EventApiFilterForm(request.GET)
+        if not self.filters.is_valid():
+            return HttpResponseBadRequest(self.filters.errors.as_text())
+        etag = api.etag(event_cache.page_version(), request.get_full_path())
+        return api_response(request, etag, lambda: super(EventApiListView, self).get(request, *args, **kwargs))
+
+    def get_queryset(self):
+        # The cursor is built from the ordering columns, so they are always loaded
+        queryset = api.events(self.fields, always=('id', 'start_date'))
+        filters = self.filters.cleaned_data
+        if filters['category']:
+            queryset = queryset.filter(category_id=filters['category'])
+        if filters['start_from']:
+            queryset = queryset.filter(start_date__gte=filters['start_from'])
+        if filters['start_to']:
+            queryset = queryset.filter(start_date__lte=filters['start_to'])
+        if filters['q']:
+            queryset = queryset.search(filters['q'])
+        return queryset
+
+    def render_to_response(self, context, **response_kwargs):
+        page = context['page_obj']
+        return JsonResponse({
+            'events': [api.serialize(event, self.fields, api.EVENT_FIELDS) for event in context['object_list']],
+            'next': page.next_querystring if page.has_next else None,
+            'previous': page.previous_querystring if page.has_previous else None,
+        })
+
+
+def event_api_detail(request, pk):
+    """One active event as JSON; ?fields= may include agenda"""
+    try:
+        fields = api.parse_fields(request.GET.get('fields'), api.EVENT_FIELDS, api.DEFAULT_EVENT_FIELDS + ('description', 'agenda'))
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+
+    def render_event():
+        event = get_object_or_404(api.events(fields), pk=pk)
+        return JsonResponse(api.serialize(event, fields, api.EVENT_FIELDS))
+    return api_response(request, api.events_etag([pk], request.get_full_path()), render_event)
+
+
+def event_api_batch(request):
+    """Several active events by ?ids=1,2,3 in one query, in the order asked for"""
+    try:
+        fields = api.parse_fields(request.GET.get('fields'), api.EVENT_FIELDS, api.DEFAULT_EVENT_FIELDS)
+        ids = api.parse_ids(request.GET.get('ids', ''))
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+
+    def render_events():
+        found = {event.id: event for event in api.events(fields).filter(pk__in=ids)}
+        return JsonResponse({
+            'events': [api.serialize(found[pk], fields, api.EVENT_FIELDS) for pk in ids if pk in found],
+            'missing': [pk for pk in ids if pk not in found],
+        })
+    return api_response(request, api.events_etag(ids, request.get_full_path()), render_events)
+
+
+def category_api_list(request):
+    """Active event categories as JSON, by priority"""
+    try:
+        fields = api.parse_fields(request.GET.get('fields'), api.CATEGORY_FIELDS, api.DEFAULT_CATEGORY_FIELDS)
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+
+    def render_categories():
+        return JsonResponse({
+            'categories': [api.serialize(category, fields, api.CATEGORY_FIELDS) for category in api.categories(fields)],
+        })
+    return api_response(request, api.etag(event_cache.page_version(), request.get_full_path()), render_categories)
+
+
+# ICALENDAR FEEDS
+
+# Seconds a calendar client or proxy may reuse a feed before revalidating
+CALENDAR_FEED_MAX_AGE = 300
+
+
+def calendar_response(request, feed, build, private=False):
+    """Serve a feed from its version stamp: a 304 when the client is current, the cached
+    text when there is one, otherwise stream build() -> (title, events) and cache it"""
+    version = event_cache.page_version()
+    key = calendar.feed_key(feed, request.get_host(), version)
+    etag = calendar.feed_etag(key)
+    response = get_conditional_response(request, etag=etag, last_modified=int(version))
+    if response is None:
+        content = calendar.cached_feed(key)
+        if content is not None:
+            response = HttpResponse(content, content_type='text/calendar; charset=utf-8')
+        else:
+            title, events = build()
+            event_url = lambda event: request.build_absolute_uri(reverse('public-event-detail', args=[event.pk]))
+            response = StreamingHttpResponse(
+                calendar.caching(key, calendar.render_feed(title, events, version, event_url)),
+                content_type='text/calendar; charset=utf-8',
+            )
+        response['Content-Disposition'] = f'inline; filename="{feed.split(":")[0]}.ics"'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(version)
+    patch_cache_control(response, max_age=CALENDAR_FEED_MAX_AGE, **{'private' if private else 'public': True})
+    return response
+
+
+def calendar_feed(request):
+    """Every active event as an iCalendar feed"""
+    return calendar_response(request, 'events', lambda: ('Events', calendar.public_events()))
+
+
+def category_calendar_feed(request, pk):
+    """The active events of one category as an iCalendar feed"""
+    # Resolved before calendar_response, so an unknown category is a 404
+    # rather than a 304 for a client that sends a matching ETag
+    category = get_object_or_404(EventCategory.objects.only('name'), pk=pk, status='active')
+    return calendar_response(
+        request, f'category-{pk}', lambda: (category.name, calendar.category_events(category.pk)),
+    )
+
+
+def user_calendar_feed(request, token):
+    """A user's registrations as an iCalendar feed, found by the signed token in the URL"""
+    user_id = calendar.user_id_from_token(token)
+    if user_id is None:
+        raise Http404('Unknown calendar.')
+    return calendar_response(
+        request, f'my-events:{user_id}', lambda: ('My Events', calendar.member_events(user_id)), private=True,
+    )
+
+
 # ADMIN MESSAGES VIEWS
-class AdminMessageListView(AdminRequiredMixin, ListView):
+class AdminMessageListView(AdminRequiredMixin, CursorPaginationMixin, ListView):
     """View for administrators to see all messages from users"""
     model = AdminMessage
     template_name = 'events/admin_message_list.html'
     context_object_name = 'messages'
-    paginate_by = 20
+    cursor_page_size = 20
 
     def get_queryset(self):
         return AdminMessage.objects.all().select_related('sender', 'responded_by')
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # The cursor pages never count, so the badge total is one COUNT of its own
+        context['message_total'] = AdminMessage.objects.count()
+        return context
+
 
 class AdminMessageDetailView(AdminRequiredMixin, DetailView):
     """View for administrators to see message details and respond"""
@@ -596,18 +947,21 @@ class EventDetailWithCommentsView(DetailView):
     template_name = 'events/event_detail_with_comments.html'
     context_object_name = 'event'
 
+    def get_queryset(self):
+        return Event.objects.with_capacity().select_related('category', 'eventimage')
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        event = self.get_object()
+        event = self.object
         
-        # Get comments for this event
-        comments = EventComment.objects.filter(
-            event=event, 
-            status='active', 
-            parent=None
-        ).select_related('user').prefetch_related('replies')
+        # Only the first page of threads is rendered; the rest load on scroll
+        page_view = EventCommentPageView()
+        page_view.setup(self.request, pk=event.pk)
+        page_view.object_list = page_view.get_queryset()
+        page_context = page_view.get_context_data()
         
-        context['comments'] = comments
+        context['comments'] = page_context['comments']
+        context['comment_page'] = page_context['page_obj']
         context['comment_form'] = EventCommentForm()
         
         # Check if user is registered for this event
@@ -621,6 +975,62 @@ class EventDetailWithCommentsView(DetailView):
         return context
 
 
+class EventCommentPageView(CursorPaginationMixin, ListView):
+    """Cursor-paged top-level comments for an event, newest first, with replies collapsed.
+
+    Returns an HTML fragment for the detail page's infinite scroll, or JSON
+    with ?format=json.
+    """
+    model = EventComment
+    template_name = 'events/comment_page.html'
+    context_object_name = 'comments'
+    cursor_page_size = 20
+
+    def get_queryset(self):
+        return EventComment.objects.filter(
+            event_id=self.kwargs['pk'], status='active', parent=None
+        ).select_related('user')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        comments = context['comments']
+        # Reply totals for the whole page in one query on the thread root,
+        # leaving out replies under a hidden comment as the thread does
+        reply_counts = EventComment.objects.filter(
+            root_id__in=[comment.pk for comment in comments], status='active'
+        ).reply_counts()
+        for comment in comments:
+            comment.reply_count = reply_counts.get(comment.pk, 0)
+            comment.children = []
+        context['event_id'] = self.kwargs['pk']
+        return context
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.GET.get('format') != 'json':
+            return super().render_to_response(context, **response_kwargs)
+        page = context['page_obj']
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.pk,
+                    'user': comment.user.get_full_name() or comment.user.username,
+                    'comment': comment.comment,
+                    'created_date': comment.created_date,
+                    'reply_count': comment.reply_count,
+                }
+                for comment in context['comments']
+            ],
+            'next': page.next_querystring if page.has_next else None,
+        })
+
+
+def comment_thread(request, comment_id):
+    """HTML fragment with every active reply under a top-level comment"""
+    root = get_object_or_404(EventComment, id=comment_id, status='active', parent=None)
+    comments = EventComment.objects.filter(Q(pk=root.pk) | Q(root=root), status='active').tree()
+    return render(request, 'events/comment_node.html', {'comment': comments[0]})
+
+
 @login_required
 def add_event_comment(request, event_id):
     """View to add a comment to an event"""